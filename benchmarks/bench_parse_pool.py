@@ -0,0 +1,95 @@
+"""
+Benchmark of the parser workers of the asynchronous path: pages/s against the number of workers.
+
+Parses the same pages with a thread pool and a process pool of 1, 2, 4, ... workers (up
+to the number of cores) through ``parse_pool.parse_page``, as the asynchronous path does,
+and reports the throughput and the speedup over a single worker. The thread pool stays
+flat because BeautifulSoup holds the GIL; the process pool should scale with the cores.
+
+The pages are the ones saved in fixtures record mode for the 'static' and 'json' scrapers
+or, with ``--synthetic`` (or when none are saved), generated Farmex product pages of
+``--page-kb`` KiB.
+
+Usage:
+    python -m benchmarks.bench_parse_pool [--workers 1 2 4 8] [--pages 400] [--synthetic --page-kb 300]
+"""
+
+import argparse
+import json
+import os
+import time
+
+from src.utils import fixtures, registry
+from src.utils import pharmacy  # noqa: F401
+from src.utils.async_http import supports
+from src.utils.parse_pool import make_pool, parse_page
+
+def synthetic_page(index, size_kb):
+    """
+    Returns a Farmex product page of about ``size_kb`` KiB, padded with a grid of related products.
+    """
+    product = {'@type': 'Product', 'sku': f'SKU{index}', 'brand': {'@type': 'Brand', 'name': 'Laboratorio Chile'}}
+    head = (f'<html><head><title>Producto {index}</title>'
+            f'<script type="application/ld+json">{json.dumps(product)}</script></head><body>'
+            f'<h1 class="page-heading">Producto {index} 10 mg x 30 comprimidos</h1>'
+            f'<div class="product-price"><div class="detail-price">${index % 90 + 10}.990</div>'
+            f'<pre>Stock: {index % 7}</pre></div>')
+    card = ('<div class="product-card"><a href="/producto/{0}"><img src="/img/{0}.jpg" alt="Producto {0}"></a>'
+            '<span class="name">Producto relacionado {0}</span><span class="price">${0}.990</span>'
+            '<ul><li>Bioequivalente</li><li>Receta simple</li><li>Despacho a domicilio</li></ul></div>')
+    cards = []
+    size = len(head)
+    while size < size_kb * 1024:
+        cards.append(card.format(len(cards)))
+        size += len(cards[-1])
+    return ('farmex', f'https://www.farmex.cl/producto-{index}', (head + ''.join(cards) + '</body></html>').encode())
+
+def saved_pages():
+    """
+    Returns the pages saved for the 'static' and 'json' scrapers, as ``(name, url, content)``.
+    """
+    return [(spec.name, url, content)
+            for spec in registry.specs() if supports(spec)
+            for url, content in fixtures.recorded_pages(spec.name)]
+
+def bench(kind, workers, pages):
+    """
+    Parses the pages with a pool of ``workers`` workers and returns the pages parsed per second.
+    """
+    with make_pool({'parse_pool': kind, 'parse_workers': workers}) as pool:
+        # Arrancar los workers (e importar los scrapers) antes de medir
+        list(pool.map(parse_page, *zip(*[(name, url, content, {'url': url}) for name, url, content in pages[:workers]])))
+        start = time.perf_counter()
+        futures = [pool.submit(parse_page, name, url, content, {'url': url}) for name, url, content in pages]
+        errors = sum(1 for future in futures if future.exception() is not None)
+        seconds = time.perf_counter() - start
+    return len(pages) / seconds, errors
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    cores = os.cpu_count() or 1
+    parser.add_argument('--workers', type=int, nargs='+',
+                        default=sorted({1, *(2 ** i for i in range(1, cores.bit_length()) if 2 ** i <= cores), cores}))
+    parser.add_argument('--pages', type=int, default=400, help='pages parsed per measurement')
+    parser.add_argument('--synthetic', action='store_true', help='use generated pages even if there are saved ones')
+    parser.add_argument('--page-kb', type=int, default=300, help='size of the generated pages')
+    args = parser.parse_args()
+
+    pages = [] if args.synthetic else saved_pages()
+    source = 'fixtures'
+    if not pages:
+        pages = [synthetic_page(index, args.page_kb) for index in range(50)]
+        source = f'sintéticas de {args.page_kb} KiB'
+    pages = [pages[index % len(pages)] for index in range(args.pages)]
+    print(f'{len(pages)} páginas ({source}), {cores} núcleos')
+
+    print(f"{'workers':>8}{'thread p/s':>12}{'process p/s':>13}{'speedup':>9}{'errores':>9}")
+    base = None
+    for workers in args.workers:
+        thread_rate, _ = bench('thread', workers, pages)
+        process_rate, errors = bench('process', workers, pages)
+        base = base or process_rate
+        print(f'{workers:>8}{thread_rate:>12.1f}{process_rate:>13.1f}{process_rate / base:>8.2f}x{errors:>9}')
+
+if __name__ == '__main__':
+    main()
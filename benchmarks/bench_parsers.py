@@ -0,0 +1,66 @@
+"""
+Micro-benchmark of the HTML parser backends on saved product pages.
+
+For every scraper with saved pages in the fixtures directory (``<fixtures>/<scraper>/*.html``),
+compares the parse time and the peak memory of 'html.parser' and 'lxml', building the
+whole document and only the part declared by the scraper's SoupStrainer.
+
+Usage:
+    python -m benchmarks.bench_parsers [--fixtures <fixtures.dir>] [--repeat 5]
+"""
+
+import argparse
+import glob
+import os
+import pathlib
+import time
+import tracemalloc
+
+from src.utils import fixtures
+from src.utils import pharmacy as p
+from src.utils.parsing import make_soup
+
+PARSERS = ('html.parser', 'lxml')
+
+def measure(content, parser, parse_only, repeat):
+    """
+    Returns the best parse time (seconds) over ``repeat`` runs and the peak memory (bytes) of one run.
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        make_soup(content, parse_only, parser)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    make_soup(content, parse_only, parser)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fixtures', default=fixtures.FIXTURES_DIR)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'scraper':<20}{'parser':<13}{'strainer':<10}{'pages':>6}{'ms/page':>10}{'peak KiB':>10}")
+    for directory in sorted(glob.glob(os.path.join(args.fixtures, '*'))):
+        name = os.path.basename(directory)
+        scraper = getattr(p, name, None)
+        files = sorted(glob.glob(os.path.join(directory, '*.html')))
+        if scraper is None or not files:
+            continue
+        pages = [pathlib.Path(file).read_bytes() for file in files]
+        strainer = getattr(scraper, 'parse_only', None)
+
+        for parser_name in PARSERS:
+            for parse_only in ([None, strainer] if strainer else [None]):
+                results = [measure(page, parser_name, parse_only, args.repeat) for page in pages]
+                seconds = sum(r[0] for r in results) / len(results)
+                peak = max(r[1] for r in results)
+                print(f"{name:<20}{parser_name:<13}{'yes' if parse_only else 'no':<10}{len(pages):>6}"
+                      f"{seconds * 1000:>10.2f}{peak / 1024:>10.0f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""
+Offline benchmark of the pharmacy scrapers on the pages saved in fixtures record mode.
+
+Reports, for every scraper with saved pages, the parse latency (p50 and mean), the
+throughput (pages/s) and the peak memory of running the scraper on the saved page,
+and optionally the wall time of a full ``main.py`` run in replay mode (no network), with
+every output in a temporary directory.
+
+With ``--baseline`` the results are compared with a previous ``--json`` output and the
+script exits with status 1 if any latency got slower than the tolerance, so it can be
+used to catch performance regressions in CI.
+
+Usage:
+    python -m benchmarks.bench_scrapers [--repeat 3] [--e2e] [--json results.json]
+                                        [--baseline baseline.json --tolerance 0.25]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import yaml
+
+from src.utils import fixtures
+from src.utils import registry
+from src.utils.config import CONFIG_ENV, load_config
+import src.utils.pharmacy  # noqa: F401
+
+def scrapers():
+    """
+    Returns the registered scrapers, by name.
+    """
+    return {spec.name: spec.scraper for spec in registry.specs()}
+
+def bench_scraper(scraper, pages, repeat):
+    """
+    Runs a scraper on its saved pages and returns its latency, throughput and memory.
+    """
+    timings = []
+    errors = 0
+    for _ in range(repeat):
+        for url, content in pages:
+            start = time.perf_counter()
+            try:
+                scraper.parse(url, content, {'url': url})
+            except Exception:
+                errors += 1
+            timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    for url, content in pages:
+        try:
+            scraper.parse(url, content, {'url': url})
+        except Exception:
+            pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'pages': len(pages),
+        'errors': errors // repeat,
+        'p50_ms': statistics.median(timings) * 1000,
+        'mean_ms': statistics.fmean(timings) * 1000,
+        'pages_per_s': len(timings) / sum(timings),
+        'peak_kib': peak / 1024,
+    }
+
+def bench_config(tmp):
+    """
+    Returns the configuration of the replay run: every file it writes goes to ``tmp`` and
+    the checkpoint, the incremental mode and the metrics are off, so the run never
+    resumes (or removes) a real checkpoint nor writes to ./data and ./logs.
+    """
+    config = load_config()
+    config['paths'].update(output_file=os.path.join(tmp, 'output_data.csv'),
+                           log_file=os.path.join(tmp, 'extract_data.log'),
+                           input_file=os.path.abspath(config['paths']['input_file']))
+    config['instrumentation']['report_dir'] = os.path.join(tmp, 'reports')
+    config['metrics'].update(port=None, textfile=None)
+    config['loading']['parquet_dir'] = os.path.join(tmp, 'parquet')
+    config['loading']['database']['path'] = os.path.join(tmp, 'prices.sqlite')
+    config['sharding'].update(dir=os.path.join(tmp, 'shards'), lock_dir=os.path.join(tmp, 'shards', 'locks'))
+    config['queue']['path'] = os.path.join(tmp, 'queue.sqlite')
+    config['checkpoint'].update(enabled=False, path=os.path.join(tmp, 'checkpoint.jsonl'))
+    config['incremental'].update(enabled=False, state_db=os.path.join(tmp, 'scrape_state.sqlite'))
+    config['http_cache'].update(enabled=False, dir=os.path.join(tmp, 'http_cache'))
+    config['fixtures'].update(mode='replay', dir=fixtures.FIXTURES_DIR)
+    return config
+
+def bench_main():
+    """
+    Runs ``main.py`` in replay mode in a separate process, with the configuration of
+    ``bench_config``, and returns its wall time (including the start of the interpreter).
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'config.yaml')
+        with open(path, 'w') as file:
+            yaml.safe_dump(bench_config(tmp), file, allow_unicode=True)
+        start = time.perf_counter()
+        subprocess.run([sys.executable, 'main.py'], check=True, stdout=subprocess.DEVNULL,
+                       env={**os.environ, CONFIG_ENV: path})
+        return time.perf_counter() - start
+
+def regressions(results, baseline, tolerance):
+    """
+    Returns the metrics that are slower than the baseline by more than ``tolerance``.
+    """
+    slower = []
+    for name, result in results['scrapers'].items():
+        previous = baseline.get('scrapers', {}).get(name)
+        if previous and result['mean_ms'] > previous['mean_ms'] * (1 + tolerance):
+            slower.append(f"{name}: {previous['mean_ms']:.2f} -> {result['mean_ms']:.2f} ms/page")
+    if 'main_seconds' in results and 'main_seconds' in baseline:
+        if results['main_seconds'] > baseline['main_seconds'] * (1 + tolerance):
+            slower.append(f"main.py: {baseline['main_seconds']:.2f} -> {results['main_seconds']:.2f} s")
+    return slower
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--e2e', action='store_true', help='also time main.py in replay mode')
+    parser.add_argument('--json', help='write the results to this file')
+    parser.add_argument('--baseline', help='results of a previous run to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args()
+
+    results = {'scrapers': {}}
+    print(f"{'scraper':<20}{'pages':>6}{'errors':>7}{'p50 ms':>9}{'mean ms':>9}{'pages/s':>9}{'peak KiB':>10}")
+    for name, scraper in sorted(scrapers().items()):
+        pages = fixtures.recorded_pages(name)
+        if not pages:
+            continue
+        result = bench_scraper(scraper, pages, args.repeat)
+        results['scrapers'][name] = result
+        print(f"{name:<20}{result['pages']:>6}{result['errors']:>7}{result['p50_ms']:>9.2f}"
+              f"{result['mean_ms']:>9.2f}{result['pages_per_s']:>9.1f}{result['peak_kib']:>10.0f}")
+
+    if args.e2e:
+        results['main_seconds'] = bench_main()
+        print(f"main.py (replay): {results['main_seconds']:.2f} s")
+
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            slower = regressions(results, json.load(file), args.tolerance)
+        for line in slower:
+            print(f'REGRESSION {line}')
+        if slower:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark of ``transform_data`` on synthetic records.
+
+Compares the vectorized transform with the previous row-by-row version (``apply`` with
+lambdas and a Python ``clean_price``), on records with the price shapes seen in the
+scrapers ('$12.990', '$ 12,990', '12990.0', numbers and missing prices).
+
+Usage:
+    python -m benchmarks.bench_transform [--rows 1000000] [--repeat 3]
+"""
+
+import argparse
+import random
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.transformation.transform_data import transform_data
+
+PHARMACIES = ('Salcobrand', 'Cruz Verde', 'Ahumada', 'El Búho', 'Dr. Simi', 'Farmaloop')
+LABS = ('laboratorio chile', 'SAVAL', 'recalcine', 'Mintlab', None)
+PRINCIPLES = ('rosuvastatina', 'LEVONORGESTREL', 'paracetamol', None)
+
+def make_records(rows, seed=0):
+    """
+    Returns ``rows`` synthetic scraped records.
+    """
+    rng = random.Random(seed)
+    price_formats = (
+        lambda value: f'${value // 1000}.{value % 1000:03d}',
+        lambda value: f'$ {value // 1000},{value % 1000:03d}',
+        lambda value: f'{value}.0',
+        lambda value: value,
+        lambda value: None,
+    )
+    records = []
+    for index in range(rows):
+        value = rng.randrange(1000, 90000)
+        records.append({
+            'date': '2024-07-01',
+            'name': f'Remedio {index % 500}',
+            'pharmacy': rng.choice(PHARMACIES),
+            'price': rng.choice(price_formats)(value),
+            'lab_name': rng.choice(LABS),
+            'bioequivalent': rng.choice((True, False, None)),
+            'is_available': rng.choice((True, False)),
+            'active_principle': rng.choice(PRINCIPLES),
+            'sku': str(rng.randrange(10**6)),
+            'web_name': f'Producto {index}',
+            'url': f'https://example.cl/producto-{index}',
+        })
+    return records
+
+def transform_data_apply(records):
+    """
+    Previous version of ``transform_data``, with ``apply`` and a per-row ``clean_price``.
+    """
+    df = pd.DataFrame(records)
+    pd.set_option('future.no_silent_downcasting', True)
+    df = df.replace({None: np.nan})
+    df['date'] = pd.to_datetime(df['date'], errors='coerce')
+    df['active_principle'] = df['active_principle'].apply(lambda x: x.title() if isinstance(x, str) else x)
+    df['lab_name'] = df['lab_name'].apply(lambda x: x.title() if isinstance(x, str) else x)
+
+    def clean_price(prc):
+        if pd.isna(prc):
+            return prc
+        prc = str(prc).replace(' ', '').replace('$', '').replace(',', '')
+        if '.' in prc and prc.endswith('.0'):
+            prc = prc.rstrip('.0')
+        prc = prc.replace('.', '')
+        return int(prc)
+
+    df['price'] = df['price'].apply(clean_price)
+    return df
+
+def measure(function, records, repeat):
+    """
+    Returns the best time (seconds) of ``function(records)`` over ``repeat`` runs.
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(records)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    records = make_records(args.rows)
+    # Construir el DataFrame es común a ambas versiones
+    build = measure(pd.DataFrame, records, args.repeat)
+    before = measure(transform_data_apply, records, args.repeat)
+    after = measure(transform_data, records, args.repeat)
+
+    print(f"{'version':<12}{'rows':>10}{'seconds':>10}{'rows/s':>12}{'columns s':>11}")
+    for name, seconds in (('apply', before), ('vectorized', after)):
+        print(f'{name:<12}{args.rows:>10}{seconds:>10.2f}{args.rows / seconds:>12.0f}{seconds - build:>11.2f}')
+    print(f'Speedup: {before / after:.1f}x total, {(before - build) / (after - build):.1f}x '
+          f'excluding the DataFrame construction ({build:.2f}s)')
+
+if __name__ == '__main__':
+    main()
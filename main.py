@@ -1,22 +1,168 @@
 """
 This script orchestrates the ETL (Extract, Transform, Load) process for medication data.
 
+Usage:
+    python main.py                # every row in this process
+    python main.py --shards 4     # 4 shard processes on this host, then merge and load
+    python main.py --shard 2/4    # only shard 2 of 4 (e.g. on another host)
+    python main.py --merge 4      # merge and load the files of the 4 shards
+    python main.py --role producer              # publish a scrape job per row to the queue
+    python main.py --role worker [--jobs http]  # scrape jobs from the queue (browser, http or both)
+    python main.py --role loader                # load the scraped records from the queue
+
 Functions:
+- batched: Groups the items of an iterable into lists of at most ``size`` items.
+- parse_args: Parses the command line arguments.
+- run_shards: Runs every shard in its own process and waits for them.
+- run_loader: Loads the records published by the queue workers.
+- finish_run: Prints the summary of the run and writes its report and metrics.
 - main: Main function to execute the ETL process.
 """
 
-from src.extraction.extract_data import extract_data
+import argparse
+import subprocess
+import sys
+import time
+from itertools import islice
+from src.extraction.extract_data import extract_data, extract_records
+from src.extraction.jobs import JOB_KINDS, produce_jobs, run_worker, topic
 from src.transformation.transform_data import transform_data
-from src.loading.load_data import load_data
+from src.loading.sinks import make_sinks
+from src.utils.checkpoint import get_checkpoint
 from src.utils.config import load_config
+from src.utils.http_cache import get_cache
+from src.utils.instrumentation import get_report
+from src.utils.job_queue import make_queue
+from src.utils import metrics, sharding
 import os
 
-def main():
+def batched(iterable, size):
+    """
+    Groups the items of an iterable into lists of at most ``size`` items, consuming it lazily.
+    """
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+def parse_args(argv=None):
+    """
+    Parses the command line arguments (see the usage in the module docstring).
+    """
+    parser = argparse.ArgumentParser(description='Scraper de precios de medicamentos en farmacias.')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--shards', type=int, metavar='N',
+                      help='dividir la entrada en N shards, scrapear cada uno en su propio proceso y cargar el resultado')
+    mode.add_argument('--shard', type=sharding.parse_shard, metavar='i/N',
+                      help='scrapear solo el shard i de N (0 <= i < N) y guardarlo en sharding.dir')
+    mode.add_argument('--merge', type=int, metavar='N',
+                      help='cargar los archivos de los N shards, en el orden del archivo de entrada')
+    mode.add_argument('--role', choices=['producer', 'worker', 'loader'],
+                      help='modo cola: publicar los trabajos, scrapearlos o cargar los registros')
+    parser.add_argument('--jobs', choices=['all', *JOB_KINDS], default='all',
+                        help="trabajos que toma un worker: 'browser' (Selenium), 'http' o ambos")
+    return parser.parse_args(argv)
+
+def run_shards(count):
+    """
+    Runs every shard of the input in its own process (``main.py --shard i/N``) and waits for them.
+
+    Raises
+    ------
+    SystemExit
+        If a shard failed; the shards that finished keep their files and the failed ones
+        resume from their checkpoint when the run is repeated.
+    """
+    processes = [subprocess.Popen([sys.executable, os.path.abspath(__file__), '--shard', f'{index}/{count}'])
+                 for index in range(count)]
+    failed = [index for index, process in enumerate(processes) if process.wait() != 0]
+    if failed:
+        raise SystemExit(f"Shards con error: {', '.join(map(str, failed))}")
+
+def run_loader(queue, sinks, batch_size, idle_timeout=None):
+    """
+    Loads the records published by the queue workers, transforming and writing them to the
+    sinks in batches of ``batch_size``.
+
+    A partial batch is written once no record arrives for a second. The records are
+    acknowledged after they are written, so a loader that dies does not lose them.
+
+    Parameters
+    ----------
+    queue : JobQueue
+        The queue.
+    sinks : list of Sink
+        The sinks.
+    batch_size : int
+        The maximum number of records per batch.
+    idle_timeout : float, optional
+        Seconds without records after which the loader stops (never if not given).
+
+    Returns
+    -------
+    int
+        The number of records loaded.
+    """
+    results = topic('results')
+    loaded = 0
+    handles, batch = [], []
+    idle_since = time.monotonic()
+    while True:
+        message = queue.get(results, 1.0)
+        if message is not None:
+            handles.append(message[0])
+            batch.append(message[1])
+            idle_since = time.monotonic()
+        if batch and (message is None or len(batch) >= batch_size):
+            transformed_df = transform_data(batch)
+            for sink in sinks:
+                sink.write(transformed_df)
+            queue.ack_many(results, handles)
+            loaded += len(batch)
+            handles, batch = [], []
+        if message is None and idle_timeout is not None and time.monotonic() - idle_since >= idle_timeout:
+            return loaded
+
+def finish_run(config):
+    """
+    Prints the summary of the run and writes its timing report, its metrics textfile and
+    the HTTP cache statistics. Called on every exit path of ``main``.
+    """
+    report = get_report()
+    report.print_summary()
+    print(f"Informe de tiempos: {report.write(os.path.abspath(config['instrumentation']['report_dir']))}")
+    metrics.finish(config.get('metrics', {}))
+    cache = get_cache()
+    if cache:
+        stats = cache.stats()
+        print(f"Caché HTTP: {stats['hits']} hits, {stats['misses']} misses, "
+              f"{stats['entries']} entradas ({stats['bytes'] / 1024 / 1024:.1f} MB)")
+
+def main(argv=None):
     """
     Main function to execute the ETL process for extracting, transforming, and loading medication data.
 
     This function loads the configuration, extracts data from the input file, transforms it, and loads it into the output file.
-    
+    With ``pipeline.streaming`` enabled the scraped records are transformed and appended to the
+    output file in batches of ``pipeline.batch_size`` as they complete, so memory stays bounded
+    and a failure only loses the batch in progress. The data is written to every sink listed
+    in ``loading.sinks`` (CSV file and/or partitioned Parquet dataset). With ``checkpoint.enabled`` an interrupted
+    run is resumed from its write-ahead log instead of scraping every row again.
+
+    With ``--shards N`` the input is split into N shards scraped by separate processes, whose
+    records are then merged in the order of the input file and loaded like a single run;
+    ``--shard i/N`` scrapes a single shard into its file (to spread the shards across hosts)
+    and ``--merge N`` loads the files of the N shards.
+
+    With ``--role`` the run is split between processes that communicate through the queue of
+    the 'queue' section of the configuration: the producer publishes a scrape job per row,
+    the workers scrape them (``--jobs browser`` or ``--jobs http`` to scale each kind on its
+    own) and the loader writes the records to the sinks.
+
+    Parameters
+    ----------
+    argv : list of str, optional
+        The command line arguments (``sys.argv[1:]`` if not given).
+
     Returns
     -------
     None
@@ -26,15 +172,98 @@ def main():
     config = load_config()
     input_file = os.path.abspath(config['paths']['input_file'])
     output_file = os.path.abspath(config['paths']['output_file'])
-    
-    # Extracción de datos
-    med_data = extract_data(input_file)
-    
-    # Transformación de datos
-    transformed_df = transform_data(med_data)
-    
-    # Carga de datos
-    load_data(transformed_df, output_file)
+    args = parse_args(argv)
+    pipeline = config.get('pipeline', {})
+
+    if args.role:
+        # Modo cola: productor, workers y cargador en procesos separados
+        metrics.start(config.get('metrics', {}), role=args.role)
+        settings = config['queue']
+        queue = make_queue(settings)
+        match args.role:
+            case 'producer':
+                counts = produce_jobs(queue, input_file)
+                print(f"Trabajos publicados: {counts['browser']} browser, {counts['http']} http")
+            case 'worker':
+                kinds = JOB_KINDS if args.jobs == 'all' else (args.jobs,)
+                scraped, failed = run_worker(queue, kinds, settings.get('idle_timeout'))
+                print(f'Trabajos scrapeados: {scraped}, intentos con error: {failed}')
+            case 'loader':
+                sinks = make_sinks(config.get('loading', {}), output_file)
+                loaded = run_loader(queue, sinks, pipeline.get('batch_size', 25), settings.get('idle_timeout'))
+                for sink in sinks:
+                    sink.close()
+                print(f'Registros guardados: {loaded}')
+        queue.close()
+        finish_run(config)
+        return
+
+    if args.shards or args.merge:
+        # Scrapear los shards (si corresponde) y cargar sus registros en el orden de la entrada
+        count = args.shards or args.merge
+        metrics.start(config.get('metrics', {}))
+        if args.shards:
+            run_shards(count)
+        sinks = make_sinks(config.get('loading', {}), output_file)
+        loaded = 0
+        for batch in batched(sharding.merge(input_file, count), pipeline.get('batch_size', 25)):
+            transformed_df = transform_data(batch)
+            for sink in sinks:
+                sink.write(transformed_df)
+            loaded += len(batch)
+        for sink in sinks:
+            sink.close()
+        print(f'Registros guardados: {loaded} de {count} shards')
+        finish_run(config)
+        return
+
+    if args.shard:
+        sharding.configure(*args.shard)
+    metrics.start(config.get('metrics', {}))
+
+    checkpoint = get_checkpoint()
+    sinks = [] if args.shard else make_sinks(config.get('loading', {}), output_file)
+    if args.shard:
+        # Un shard solo guarda sus registros; se transforman y cargan al unir los shards
+        writer = sharding.ShardWriter(sharding.shard_file(*args.shard))
+        loaded = 0
+        for batch in batched(extract_records(input_file), pipeline.get('batch_size', 25)):
+            writer.write(batch)
+            if checkpoint:
+                checkpoint.mark_loaded(batch)
+            loaded += len(batch)
+        writer.close()
+        print(f'Registros del shard {args.shard[0]}/{args.shard[1]}: {loaded} ({writer.path})')
+    elif pipeline.get('streaming', False):
+        # Extracción, transformación y carga por lotes
+        loaded = 0
+        for batch in batched(extract_records(input_file), pipeline.get('batch_size', 25)):
+            transformed_df = transform_data(batch)
+            for sink in sinks:
+                sink.write(transformed_df)
+            if checkpoint:
+                checkpoint.mark_loaded(batch)
+            loaded += len(batch)
+        print(f'Registros guardados: {loaded}')
+    else:
+        # Extracción de datos
+        med_data = extract_data(input_file)
+
+        # Transformación de datos
+        transformed_df = transform_data(med_data)
+
+        # Carga de datos
+        for sink in sinks:
+            sink.write(transformed_df)
+
+    for sink in sinks:
+        sink.close()
+
+    # La ejecución terminó: descartar el checkpoint
+    if checkpoint:
+        checkpoint.finish()
+
+    finish_run(config)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
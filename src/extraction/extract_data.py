@@ -2,20 +2,43 @@
 This module contains functions to extract medication data from various pharmacy websites.
 
 Functions:
+- scrape_row: Scrapes a single row of the input CSV with the scraper matching its URL.
+- get_domain: Returns the hostname of a URL without the 'www.' prefix.
+- extract_records: Scrapes the rows of a CSV file, yielding each record as soon as it is scraped.
 - extract_data: Extracts medication data from a CSV file and scrapes additional information from pharmacy websites.
 """
 
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import ExitStack, closing
 from datetime import datetime
-from src.utils import pharmacy as p
+import os
+import queue
+import threading
+import time
+from urllib.parse import urlparse
+from src.utils import async_http, instrumentation, metrics, registry, sharding
+from src.utils.parse_pool import discard_pool, get_pool, parse_page
+# Importar los scrapers los registra por dominio
+import src.utils.pharmacy  # noqa: F401
 import pandas as pd
 import logging
+from src.utils.checkpoint import get_checkpoint, row_key
 from src.utils.config import load_config
+from src.utils.state_store import get_state_store
+from src.utils.retry import backoff_delay, is_transient
+from src.utils.throttle import CircuitOpenError, get_throttle
 
 # Configurar el logging
 # logging.basicConfig(filename='extract_data.log', level=logging.ERROR, 
 #                     format='%(asctime)s:%(levelname)s:%(message)s')
 
 config = load_config()
+registry.load_entry_points()
+# logs/ no se versiona: crear la carpeta del archivo de log si no existe
+os.makedirs(os.path.dirname(os.path.abspath(config['paths']['log_file'])), exist_ok=True)
 logging.basicConfig(filename=config['paths']['log_file'], 
                     level=config['logging']['level'], 
                     format=config['logging']['format'])
@@ -66,10 +89,479 @@ med_data = {
 }
 '''
 
+def scrape_row(row):
+    """
+    Scrapes a single row of the input CSV with the scraper matching its URL.
+
+    Parameters
+    ----------
+    row : dict
+        A row of the input CSV with the keys 'product_name', 'pharmacy' and 'url'.
+
+    Returns
+    -------
+    dict
+        The dictionary with the input info updated with the scraped data.
+    """
+    url = row['url'].strip('"')
+    product_name = row['product_name']
+    pharmacy = row['pharmacy']
+    print(url)
+
+    # Tiempos por etapa de la fila para el informe de la ejecución
+    instrumentation.start_row(pharmacy)
+    try:
+        data = _scrape(url, product_name, pharmacy)
+    except Exception as e:
+        instrumentation.finish_row(pharmacy, e)
+        raise
+    instrumentation.finish_row(pharmacy)
+
+    print(data['price'])
+    return data
+
+def _new_record(url, product_name, pharmacy):
+    """
+    Returns the record of a row with the info of the input CSV and the scraped fields empty.
+    """
+    # Add info from input_urls.csv
+    return {
+        'date': datetime.now().strftime('%Y-%m-%d'),
+        'name': product_name,
+        'pharmacy': pharmacy,
+        'price': None,
+        'lab_name': None,
+        'bioequivalent': None,
+        'is_available': None,
+        'active_principle': None,
+        'sku': None,
+        # 'more_products': None,
+        'web_name': None,
+        'url': url
+    }
+
+def _scrape(url, product_name, pharmacy):
+    """
+    Builds the record of a row and fills it with the scraper matching its URL.
+    """
+    data = _new_record(url, product_name, pharmacy)
+
+    # Llamar a la función de scraping registrada para el dominio
+    spec = registry.lookup(url)
+    if spec is None:
+        raise ValueError(f"URL no reconocida: {url}")
+    data.update(spec.scraper(url, data))  # type: ignore
+
+    return data
+
+def get_domain(url):
+    """
+    Returns the hostname of a URL without the 'www.' prefix (e.g. 'salcobrand.cl').
+    """
+    host = urlparse(url.strip('"')).hostname or ''
+    return host.removeprefix('www.')
+
+def _domain_limit(domain):
+    """
+    Returns the maximum number of rows of a domain scraped at the same time.
+
+    Raises
+    ------
+    ValueError
+        If the limit is not a positive integer (the scheduler would never start a row of the domain).
+    """
+    spec = registry.lookup_host(domain)
+    if spec and spec.concurrency is not None:
+        limit = spec.concurrency
+    else:
+        limit = config['extraction'].get('default_concurrency', 1)
+    if not isinstance(limit, int) or limit < 1:
+        raise ValueError(f"Límite de concurrencia inválido para {domain}: {limit!r} (debe ser al menos 1)")
+    return limit
+
+def _scrape_throttled(row):
+    """
+    Scrapes a row after waiting for the rate limiter of its domain, recording the outcome.
+
+    In a sharded run the row also waits for a concurrency slot of its domain shared with
+    the other shards.
+
+    Raises
+    ------
+    CircuitOpenError
+        If the circuit of the domain is open (the row is not scraped).
+    """
+    domain = get_domain(row['url'])
+    with sharding.domain_slot(domain, _domain_limit(domain)):
+        throttle = get_throttle()
+        if throttle is None:
+            return scrape_row(row)
+
+        throttle.acquire(domain)
+        start = time.monotonic()
+        try:
+            data = scrape_row(row)
+        except Exception as e:
+            throttle.record(domain, _site_latency(start), e)
+            raise
+        throttle.record(domain, _site_latency(start))
+        return data
+
+def _site_latency(start):
+    # Latencia de la fila para el rate limiter, sin la espera por un driver del pool: un
+    # pool congestionado no debe bajar la tasa de un sitio que responde bien
+    checkout = instrumentation.last_row().get('driver_checkout', 0.0)
+    return max(0.0, time.monotonic() - start - checkout)
+
+def _run_sequential(rows):
+    """
+    Scrapes the rows one after another, yielding ``(index, data, error)`` for each row.
+    """
+    for index, row in enumerate(rows):
+        try:
+            yield index, _scrape_throttled(row), None
+        except Exception as e:
+            yield index, None, e
+
+def _run_concurrent(rows, max_workers):
+    """
+    Scrapes the rows in a thread pool, yielding ``(index, data, error)`` as each row finishes.
+
+    A row is only submitted when there is a free worker and its domain has not reached
+    its concurrency limit (the ``concurrency`` of its registered scraper), so a slow
+    pharmacy never ties up workers waiting for a slot.
+
+    Parameters
+    ----------
+    rows : list of dict
+        The rows of the input CSV.
+    max_workers : int
+        The maximum number of rows scraped at the same time.
+    """
+    pending = {}
+    for index, row in enumerate(rows):
+        pending.setdefault(get_domain(row['url']), deque()).append(index)
+    running = {domain: 0 for domain in pending}
+    limits = {domain: _domain_limit(domain) for domain in pending}
+    futures = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while pending or futures:
+            # Enviar filas mientras haya workers y cupo en el dominio
+            for domain in list(pending):
+                queue = pending[domain]
+                while queue and len(futures) < max_workers and running[domain] < limits[domain]:
+                    index = queue.popleft()
+                    futures[executor.submit(_scrape_throttled, rows[index])] = (index, domain)
+                    running[domain] += 1
+                if not queue:
+                    del pending[domain]
+
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                index, domain = futures.pop(future)
+                running[domain] -= 1
+                error = future.exception()
+                yield index, (None if error else future.result()), error
+
+def _start_fetched_row(pharmacy, started, stages):
+    # Registrar en el hilo actual una fila cuya página se descargó en el event loop
+    instrumentation.start_row(pharmacy, started)
+    for stage, seconds in stages.items():
+        instrumentation.record(stage, seconds)
+
+async def _scrape_async(row, fetcher, host_limits):
+    """
+    Scrapes a row of a 'static' or 'json' scraper: the page is downloaded in the event loop,
+    within the concurrency limit and the rate limiter of its domain, and parsed in the pool
+    of parser workers (see ``parse_pool``).
+
+    Raises
+    ------
+    CircuitOpenError
+        If the circuit of the domain is open (the row is not scraped).
+    """
+    url = row['url'].strip('"')
+    pharmacy = row['pharmacy']
+    spec = registry.lookup(url)
+    domain = get_domain(url)
+    throttle = get_throttle()
+    stages = {}
+
+    async with host_limits[domain]:
+        with ExitStack() as stack:
+            if sharding.current_shard():
+                # El lock de los shards bloquea: tomarlo fuera del event loop
+                await asyncio.to_thread(stack.enter_context, sharding.domain_slot(domain, _domain_limit(domain)))
+            if throttle:
+                bucket = throttle.admit(domain)
+                while (delay := bucket.reserve()) > 0:
+                    await asyncio.sleep(delay)
+
+            started = time.perf_counter()
+            start = time.monotonic()
+            try:
+                content = await fetcher.fetch(spec, url, pharmacy, stages)
+            except Exception as e:
+                if throttle:
+                    throttle.record(domain, time.monotonic() - start, e)
+                _start_fetched_row(pharmacy, started, stages)
+                instrumentation.finish_row(pharmacy, e)
+                raise
+            if throttle:
+                throttle.record(domain, time.monotonic() - start)
+
+    # El parseo no bloquea el event loop ni ocupa el cupo del dominio; con un pool de procesos
+    # solo viajan la página y el registro extraído
+    data = _new_record(url, row['product_name'], pharmacy)
+    pool = get_pool()
+    try:
+        result, parse_stages = await asyncio.get_running_loop().run_in_executor(
+            pool, parse_page, spec.name, url, content, data)
+    except Exception as e:
+        if isinstance(e, BrokenProcessPool):
+            # Murió un proceso del pool: la fila se reintenta con un pool nuevo
+            discard_pool(pool)
+        _start_fetched_row(pharmacy, started, stages)
+        instrumentation.finish_row(pharmacy, e)
+        raise
+    _start_fetched_row(pharmacy, started, {**stages, **parse_stages})
+    instrumentation.finish_row(pharmacy)
+    data.update(result)
+    return data
+
+async def _run_async(rows, settings, emit):
+    """
+    Scrapes the rows of 'static' and 'json' scrapers in an event loop, calling
+    ``emit(index, data, error)`` as each row finishes.
+
+    Every row is started at once; the concurrency limit of each domain (as in
+    ``_run_concurrent``) and ``async_http.max_in_flight`` bound the requests in flight.
+    """
+    fetcher = async_http.AsyncFetcher(settings, config['http'])
+    host_limits = {domain: asyncio.Semaphore(_domain_limit(domain))
+                   for domain in {get_domain(row['url']) for row in rows}}
+
+    async def scrape(index):
+        try:
+            data = await _scrape_async(rows[index], fetcher, host_limits)
+        except Exception as e:
+            emit(index, None, e)
+        else:
+            emit(index, data, None)
+
+    try:
+        await asyncio.gather(*(scrape(index) for index in range(len(rows))))
+    finally:
+        await fetcher.aclose()
+
+def _run_mixed(rows, runner, settings):
+    """
+    Scrapes the rows of the 'static' and 'json' scrapers on the asynchronous path and the
+    rest with ``runner`` (``_run_concurrent`` or ``_run_sequential``) at the same time,
+    yielding ``(index, data, error)`` as each row finishes.
+
+    If one side raises, the other is stopped (the event loop is cancelled, the runner stops
+    after its rows in progress) and waited for before the error is re-raised.
+    """
+    groups = {True: [], False: []}
+    for index, row in enumerate(rows):
+        groups[async_http.supports(registry.lookup(row['url']))].append(index)
+    results = queue.Queue()
+    # Si un lado falla (o se deja de consumir el generador), el otro se detiene
+    stop = threading.Event()
+    async_task = []
+
+    def run_async(indices):
+        async def scrape():
+            async_task.append((asyncio.get_running_loop(), asyncio.current_task()))
+            if stop.is_set():
+                return
+            await _run_async([rows[index] for index in indices], settings,
+                             lambda position, data, error: results.put((indices[position], data, error)))
+
+        asyncio.run(scrape())
+
+    def run_threads(indices):
+        with closing(runner([rows[index] for index in indices])) as scraped:
+            for position, data, error in scraped:
+                results.put((indices[position], data, error))
+                if stop.is_set():
+                    return
+
+    def run(target, indices):
+        try:
+            target(indices)
+        except BaseException as e:
+            results.put(e)
+        finally:
+            results.put(None)
+
+    running = 0
+    for target, indices in ((run_async, groups[True]), (run_threads, groups[False])):
+        if indices:
+            threading.Thread(target=run, args=(target, indices), daemon=True).start()
+            running += 1
+    try:
+        while running:
+            item = results.get()
+            if item is None:
+                running -= 1
+            elif isinstance(item, BaseException):
+                raise item
+            else:
+                yield item
+    finally:
+        if running:
+            stop.set()
+            for loop, task in async_task:
+                try:
+                    loop.call_soon_threadsafe(task.cancel)
+                except RuntimeError:  # El event loop ya terminó
+                    pass
+            # Esperar a que el otro lado termine las filas en curso
+            while running:
+                if results.get() is None:
+                    running -= 1
+
+def _scrape_file(file_path):
+    """
+    Scrapes the rows of the input CSV, yielding ``(index, data)`` for every row scraped successfully.
+
+    In a sharded run only the rows of the shard of the process are scraped.
+    With checkpointing enabled, the rows of an interrupted run that were already loaded are
+    skipped and the ones scraped but not loaded are yielded again without scraping them.
+    The rows that fail with a transient error (or are skipped because the circuit of their
+    domain is open) are retried after the first pass, with jittered exponential backoff, up
+    to ``retry.max_attempts`` attempts; permanent errors are reported and not retried.
+    """
+    input_data = pd.read_csv(file_path)
+    rows = input_data.to_dict('records')
+    extraction = config.get('extraction', {})
+    # En una ejecución por shards, solo las filas del shard de este proceso
+    pending = sharding.select(rows)
+
+    # Reanudar una ejecución interrumpida
+    checkpoint = get_checkpoint()
+    if checkpoint and checkpoint.begin(file_path):
+        print(f'Reanudando: {len(checkpoint.loaded)} filas ya guardadas, '
+              f'{len(checkpoint.scraped) - len(checkpoint.loaded)} por guardar')
+        todo = []
+        for index in pending:
+            key = row_key(rows[index])
+            if key in checkpoint.loaded:
+                continue
+            if key in checkpoint.scraped:
+                yield index, checkpoint.scraped[key]
+            else:
+                todo.append(index)
+        pending = todo
+
+    # Modo incremental: omitir las filas scrapeadas hace poco
+    incremental = config.get('incremental', {})
+    store = get_state_store() if incremental.get('enabled', False) else None
+    if store:
+        freshness = incremental['freshness_hours'] * 3600
+        total_rows = len(pending)
+        pending = [index for index in pending if store.needs_scrape(rows[index], freshness)]
+        print(f'Modo incremental: {total_rows - len(pending)} filas recientes omitidas, {len(pending)} por scrapear')
+
+    async_settings = config.get('async_http', {})
+    retry = config.get('retry', {})
+    max_attempts = retry.get('max_attempts', 1)
+    attempts = dict.fromkeys(pending, 0)
+    scheduled = []
+    permanent = exhausted = 0
+    while pending:
+        batch = [rows[index] for index in pending]
+        if extraction.get('concurrent', False):
+            runner = lambda batch: _run_concurrent(batch, extraction['max_workers'])
+        else:
+            runner = _run_sequential
+        if async_settings.get('enabled', False):
+            # Scrapers 'static' y 'json' en el event loop, el resto con el runner
+            results = _run_mixed(batch, runner, async_settings)
+        else:
+            results = runner(batch)
+
+        for position, data, error in results:
+            index = pending[position]
+            if error is None:
+                if store:
+                    store.mark_success(rows[index])
+                if checkpoint:
+                    checkpoint.mark_scraped(data)
+                yield index, data
+                continue
+
+            if isinstance(error, CircuitOpenError):
+                # No se envió ninguna solicitud: reintentar cuando el circuito deje pasar una
+                # sonda, sin gastar un intento de la fila
+                scheduled.append((error.retry_at or time.monotonic(), index))
+                metrics.RETRIES.labels(rows[index]['pharmacy']).inc()
+                continue
+
+            attempts[index] += 1
+            url = rows[index]['url'].strip('"')
+            transient = is_transient(error)
+            if transient and attempts[index] < max_attempts:
+                # Reintentar tras el backoff
+                ready_at = time.monotonic() + backoff_delay(attempts[index], retry['base_delay'], retry['max_delay'])
+                scheduled.append((ready_at, index))
+                metrics.RETRIES.labels(rows[index]['pharmacy']).inc()
+                continue
+
+            if transient:
+                exhausted += 1
+                logging.error(f"Error transitorio al procesar la URL {url} tras {attempts[index]} intentos: {error}")
+            else:
+                permanent += 1
+                logging.error(f"Error permanente al procesar la URL {url}: {error}")
+            if store:
+                store.mark_error(rows[index], error)
+
+        if not scheduled:
+            break
+        # Siguiente pasada con las filas cuyo backoff ya terminó
+        time.sleep(max(0, min(ready_at for ready_at, _ in scheduled) - time.monotonic()))
+        now = time.monotonic()
+        pending = sorted(index for ready_at, index in scheduled if ready_at <= now)
+        scheduled = [(ready_at, index) for ready_at, index in scheduled if ready_at > now]
+        print(f'Reintentando {len(pending)} filas con errores transitorios')
+
+    if permanent or exhausted:
+        print(f'Filas con error: {permanent} permanentes, {exhausted} transitorios sin más intentos')
+
+def extract_records(file_path):
+    """
+    Scrapes the rows of a CSV file, yielding each record as soon as it is scraped.
+
+    Unlike ``extract_data``, nothing is accumulated: the records are yielded in completion
+    order so they can be transformed and loaded in batches while the scraping goes on.
+
+    Parameters
+    ----------
+    file_path : str
+        The path to the CSV file containing the initial medication data.
+
+    Yields
+    ------
+    dict
+        The scraped data of a row (same keys as the values of ``extract_data``).
+    """
+    for _, data in _scrape_file(file_path):
+        yield data
+
 def extract_data(file_path):
     """
     Extracts medication data from a CSV file and scrapes additional information from pharmacy websites.
 
+    The rows are scraped one after another, or in a thread pool when ``extraction.concurrent``
+    is enabled in the configuration; with ``async_http.enabled`` the rows of the 'static' and
+    'json' scrapers are fetched in an event loop instead. When ``incremental.enabled`` is set, only the rows that
+    failed last time or whose last successful scrape is older than ``incremental.freshness_hours``
+    are scraped.
+
     Parameters
     ----------
     file_path : str
@@ -80,77 +572,14 @@ def extract_data(file_path):
     dict
         A dictionary containing the extracted and scraped medication data.
     """
-    input_data = pd.read_csv(file_path)
-    med_data = {}
-
-    for index, row in input_data.iterrows():
-        url = row['url'].strip('"')
-        product_name = row['product_name']
-        pharmacy = row['pharmacy']
-        print(url)
-
-        # Add info from input_urls.csv
-        data = {
-            'date': datetime.now().strftime('%Y-%m-%d'),
-            'name': product_name,
-            'pharmacy': pharmacy,
-            'price': None,
-            'lab_name': None,
-            'bioequivalent': None,
-            'is_available': None,
-            'active_principle': None,
-            'sku': None,
-            # 'more_products': None,
-            'web_name': None,
-            'url': url
-        }
+    scraped = dict(_scrape_file(file_path))
 
-        try:
-            # Llamar a la función de scraping correspondiente
-            match url:
-                case url if 'buhochile.com' in url:
-                    data.update(p.buhochile(url, data))  # type: ignore
-                case url if 'farmaciasahumada.cl' in url:
-                    data.update(p.ahumada(url, data))  # type: ignore
-                case url if 'farmex.cl' in url:
-                    data.update(p.farmex(url, data))  # type: ignore
-                case url if 'farmaciaelquimico.cl' in url:
-                    data.update(p.elquimico(url, data))  # type: ignore
-                case url if 'salcobrand.cl' in url:
-                    data.update(p.salcobrand(url, data))  # type: ignore
-                case url if 'novasalud.cl' in url:
-                    data.update(p.novasalud(url, data))  # type: ignore
-                case url if 'drsimi.cl' in url:
-                    data.update(p.drsimi(url, data))  # type: ignore
-                case url if 'ecofarmacias.cl' in url:
-                    data.update(p.ecofarmacias(url, data))  # type: ignore
-                case url if 'mercadofarma.cl' in url:
-                    data.update(p.mercadofarma(url, data))  # type: ignore
-                case url if 'farmaciameki.cl' in url:
-                    data.update(p.meki(url, data))  # type: ignore
-                case url if 'cruzverde.cl' in url:
-                    data.update(p.cruzverde(url, data))  # type: ignore
-                case url if 'profar.cl' in url:
-                    data.update(p.profar(url, data))  # type: ignore
-                case url if 'farmaciasknop.com' in url:
-                    data.update(p.knoplab(url, data))  # type: ignore
-                case url if 'farmaciajvf' in url:
-                    data.update(p.farmaciajvf(url, data))  # type: ignore
-                case url if 'anticonceptivo.cl' in url:
-                    data.update(p.anticonceptivo_cl(url, data))  # type: ignore
-                case url if 'farmaloop.cl' in url:
-                    data.update(p.farmaloop(url, data))  # type: ignore
-                case _:
-                    raise ValueError(f"URL no reconocida: {url}")
+    # Mantener el orden del archivo de entrada
+    med_data = {}
+    for index in sorted(scraped):
+        data = scraped[index]
+        if data['name'] not in med_data:
+            med_data[data['name']] = {}
+        med_data[data['name']][data['pharmacy']] = data
 
-        except Exception as e:
-            logging.error(f"Error al procesar la URL {url}: {e}")
-            continue
-        
-        print(data['price'])
-        # update the dict
-        if product_name not in med_data:
-            med_data[product_name] = {}
-        med_data[product_name][pharmacy] = data
-    
     return med_data
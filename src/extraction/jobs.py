@@ -0,0 +1,166 @@
+"""
+This module contains the producer and the workers of the queue mode.
+
+The producer turns the rows of the input CSV into scrape jobs, published to a topic per
+kind of worker: 'browser' for the scrapers that render the page with Selenium and 'http'
+for the ones that only make requests, so each kind can be scaled on its own. The workers
+take jobs from their topics, scrape them and publish the records to the results topic,
+which is drained by the loader (``main.py --role loader``).
+
+Functions:
+- topic: Returns the full name of a topic of the queue.
+- job_kind: Returns the kind of worker that scrapes a row.
+- produce_jobs: Publishes a scrape job for every row of the input CSV.
+- run_worker: Takes scrape jobs from the queue, scrapes them and publishes the records.
+"""
+
+import logging
+import time
+
+import pandas as pd
+
+from src.utils import metrics, registry
+from src.utils.config import load_config
+from src.utils.retry import backoff_delay, is_transient
+from src.utils.state_store import get_state_store
+from src.utils.throttle import CircuitOpenError
+
+from .extract_data import _scrape_throttled
+
+JOB_KINDS = ('browser', 'http')
+
+config = load_config()
+
+def topic(name):
+    """
+    Returns the full name of a topic of the queue ('jobs.browser', 'jobs.http' or 'results'),
+    with the ``queue.topic_prefix`` of the configuration.
+    """
+    return f"{config['queue']['topic_prefix']}.{name}"
+
+def job_kind(row):
+    """
+    Returns the kind of worker that scrapes a row: 'browser' for the scrapers that render
+    the page, 'http' for the rest (unknown URLs included, which fail in the worker).
+    """
+    spec = registry.lookup(row['url'])
+    return 'browser' if spec is not None and spec.fetch_mode == 'rendered' else 'http'
+
+def produce_jobs(queue, file_path):
+    """
+    Publishes a scrape job for every row of the input CSV.
+
+    When ``incremental.enabled`` is set, the rows scraped recently are not published.
+
+    Parameters
+    ----------
+    queue : JobQueue
+        The queue.
+    file_path : str
+        The path to the CSV file containing the initial medication data.
+
+    Returns
+    -------
+    dict
+        The number of jobs published for each kind of worker.
+    """
+    rows = pd.read_csv(file_path).to_dict('records')
+
+    # Modo incremental: no publicar las filas scrapeadas hace poco
+    incremental = config.get('incremental', {})
+    if incremental.get('enabled', False):
+        store = get_state_store()
+        freshness = incremental['freshness_hours'] * 3600
+        rows = [row for row in rows if store.needs_scrape(row, freshness)]
+
+    jobs = {kind: [] for kind in JOB_KINDS}
+    for row in rows:
+        jobs[job_kind(row)].append({'row': row, 'attempt': 0})
+    for kind, messages in jobs.items():
+        queue.put_many(topic(f'jobs.{kind}'), messages)
+    return {kind: len(messages) for kind, messages in jobs.items()}
+
+def _process(queue, job_topic, message):
+    """
+    Scrapes a job and publishes its record, or publishes the job again if it failed with
+    a transient error and has attempts left.
+
+    Returns
+    -------
+    bool
+        True if the row was scraped.
+    """
+    row = message['row']
+    store = get_state_store() if config.get('incremental', {}).get('enabled', False) else None
+    try:
+        data = _scrape_throttled(row)
+    except Exception as e:
+        retry = config.get('retry', {})
+        url = row['url'].strip('"')
+        if isinstance(e, CircuitOpenError):
+            # No se envió ninguna solicitud: volver a publicar el trabajo cuando el circuito
+            # deje pasar una sonda, sin gastar un intento
+            delay = max(0, (e.retry_at or time.monotonic()) - time.monotonic())
+            queue.put(job_topic, {'row': row, 'attempt': message['attempt']}, delay)
+            metrics.RETRIES.labels(row['pharmacy']).inc()
+            return False
+
+        attempt = message['attempt'] + 1
+        if is_transient(e) and attempt < retry.get('max_attempts', 1):
+            # Volver a publicar el trabajo tras el backoff
+            delay = backoff_delay(attempt, retry['base_delay'], retry['max_delay'])
+            queue.put(job_topic, {'row': row, 'attempt': attempt}, delay)
+            metrics.RETRIES.labels(row['pharmacy']).inc()
+        else:
+            logging.error(f"Error al procesar la URL {url} tras {attempt} intentos: {e}")
+            if store:
+                store.mark_error(row, e)
+        return False
+
+    if store:
+        store.mark_success(row)
+    queue.put(topic('results'), data)
+    return True
+
+def run_worker(queue, kinds=JOB_KINDS, idle_timeout=None):
+    """
+    Takes scrape jobs from the queue, scrapes them and publishes the records to the results topic.
+
+    The worker scrapes one job at a time; it is scaled by running more worker processes.
+    A job is acknowledged only after its record (or its retry) has been published, so the
+    jobs of a worker that dies are delivered again to another one.
+
+    Parameters
+    ----------
+    queue : JobQueue
+        The queue.
+    kinds : tuple of str, optional
+        The kinds of jobs taken by the worker ('browser' and/or 'http').
+    idle_timeout : float, optional
+        Seconds without jobs after which the worker stops (never if not given).
+
+    Returns
+    -------
+    tuple of int
+        The number of jobs scraped successfully and of attempts that failed (retried or not).
+    """
+    topics = [topic(f'jobs.{kind}') for kind in kinds]
+    # Esperar poco en cada tópico si el worker toma trabajos de varios
+    poll = 1.0 if len(topics) == 1 else 0.2
+    scraped = failed = 0
+    idle_since = time.monotonic()
+    while True:
+        for job_topic in topics:
+            job = queue.get(job_topic, poll)
+            if job is None:
+                continue
+            handle, message = job
+            if _process(queue, job_topic, message):
+                scraped += 1
+            else:
+                failed += 1
+            queue.ack(job_topic, handle)
+            idle_since = time.monotonic()
+
+        if idle_timeout is not None and time.monotonic() - idle_since >= idle_timeout:
+            return scraped, failed
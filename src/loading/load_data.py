@@ -1,13 +1,85 @@
 """
 This module contains functions to load data into CSV files.
 
+Classes:
+- KeyIndex: On-disk index of the (Fecha, Farmacia, URL) keys already written to a CSV file.
+
 Functions:
 - load_data: Loads a pandas DataFrame into a CSV file, appending if the file already exists.
 """
 
+import hashlib
 import os
+import sqlite3
+
+import pandas as pd
+
+KEY_COLUMNS = ['Fecha', 'Farmacia', 'URL']
+
+
+class KeyIndex:
+    """
+    On-disk index of the (Fecha, Farmacia, URL) keys already written to a CSV file.
 
-def load_data(df,output_file):
+    The keys are stored as 16-byte hashes in a SQLite table next to the CSV
+    (``<output_file>.keys.sqlite``), so checking a row is a single index lookup and the
+    output file never has to be read again. If the CSV exists but the index does not,
+    the index is built once from the file.
+
+    Parameters
+    ----------
+    output_file : str
+        The path of the CSV file.
+    """
+
+    def __init__(self, output_file):
+        path = f'{output_file}.keys.sqlite'
+        exists = os.path.exists(path)
+        self._db = sqlite3.connect(path)
+        self._db.execute('CREATE TABLE IF NOT EXISTS keys (key BLOB PRIMARY KEY) WITHOUT ROWID')
+        self._db.commit()
+        if not exists and os.path.isfile(output_file):
+            for chunk in pd.read_csv(output_file, usecols=KEY_COLUMNS, dtype=str, chunksize=100_000):
+                self._db.executemany('INSERT OR IGNORE INTO keys VALUES (?)',
+                                     [(self._hash(key),) for key in chunk.itertuples(index=False)])
+            self._db.commit()
+
+    @staticmethod
+    def _hash(key):
+        return hashlib.blake2b('\x1f'.join(str(value) for value in key).encode(), digest_size=16).digest()
+
+    def add_new(self, keys):
+        """
+        Adds the keys that are not in the index yet, without committing.
+
+        Parameters
+        ----------
+        keys : iterable of tuple
+            The (Fecha, Farmacia, URL) keys of the rows to write, with the date as 'YYYY-MM-DD'.
+
+        Returns
+        -------
+        list of bool
+            For every key, True if it is new (also False for repeated keys within ``keys``).
+        """
+        cursor = self._db.cursor()
+        new = []
+        for key in keys:
+            cursor.execute('INSERT OR IGNORE INTO keys VALUES (?)', (self._hash(key),))
+            new.append(cursor.rowcount == 1)
+        return new
+
+    def commit(self):
+        self._db.commit()
+
+    def rollback(self):
+        self._db.rollback()
+
+    def close(self):
+        self._db.close()
+
+
+def load_data(df,output_file, key_index=None):
     """
     Loads a pandas DataFrame into a CSV file, appending if the file already exists.
 
@@ -17,13 +89,33 @@ def load_data(df,output_file):
         The pandas DataFrame to be loaded into the CSV file.
     output_file : str
         The name of the output CSV file.
+    key_index : KeyIndex, optional
+        Index of the keys already written. If given, the rows whose (Fecha, Farmacia, URL)
+        is already in the file are skipped.
 
     Returns
     -------
-    None
+    int
+        The number of duplicated rows that were skipped.
     """
+    skipped = 0
+    if key_index is not None and not df.empty:
+        keys = zip(df['Fecha'].dt.strftime('%Y-%m-%d'), df['Farmacia'].astype(str), df['URL'].astype(str))
+        new = key_index.add_new(keys)
+        skipped = len(new) - sum(new)
+        df = df[new]
+
     # Check if the file already exists
     file_exists = os.path.isfile(output_file)
-    
+
     # Save the DataFrame to the file
-    df.to_csv(output_file, mode='a', header=not file_exists, index=False)
+    try:
+        df.to_csv(output_file, mode='a', header=not file_exists, index=False)
+    except Exception:
+        if key_index is not None:
+            key_index.rollback()
+        raise
+    # Confirmar las claves solo después de escribir las filas
+    if key_index is not None:
+        key_index.commit()
+    return skipped
@@ -0,0 +1,280 @@
+"""
+This module contains the sinks the transformed data can be written to.
+
+Every sink receives the DataFrames returned by ``transform_data`` (one per batch in the
+streaming pipeline) and writes them to its destination.
+
+Classes:
+- Sink: Interface of the data sinks.
+- CsvSink: Appends the data to a CSV file.
+- ParquetSink: Writes the data to a Parquet dataset partitioned by date and pharmacy.
+- DatabaseSink: Upserts the data into a SQLite or ODBC (SQL Server) table.
+
+Functions:
+- make_sinks: Builds the sinks listed in the 'loading' section of the configuration.
+"""
+
+import os
+import sqlite3
+import uuid
+
+import pandas as pd
+
+from src.utils import metrics
+
+from .load_data import KeyIndex, load_data
+
+
+class Sink:
+    """
+    Interface of the data sinks.
+    """
+
+    def write(self, df):
+        """
+        Writes a DataFrame returned by ``transform_data``.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """
+        Releases the resources of the sink once the run has finished.
+        """
+
+
+class CsvSink(Sink):
+    """
+    Appends the data to a CSV file, writing the header only when the file is created.
+
+    Parameters
+    ----------
+    output_file : str
+        The path of the CSV file.
+    dedup : bool, optional
+        Skip the rows whose (Fecha, Farmacia, URL) was already written, using a ``KeyIndex``.
+    """
+
+    def __init__(self, output_file, dedup=False):
+        self.output_file = output_file
+        self.key_index = KeyIndex(output_file) if dedup else None
+        self.skipped = 0
+
+    def write(self, df):
+        skipped = load_data(df, self.output_file, self.key_index)
+        self.skipped += skipped
+        metrics.ROWS_LOADED.labels('csv').inc(len(df) - skipped)
+
+    def close(self):
+        if self.key_index is not None:
+            self.key_index.close()
+            print(f'CSV: {self.skipped} filas duplicadas omitidas')
+
+
+class ParquetSink(Sink):
+    """
+    Writes the data to a Parquet dataset partitioned by 'Fecha' and 'Farmacia'.
+
+    The dataset uses Hive partitioning (``Fecha=2024-07-01/Farmacia=Salcobrand/part-*.parquet``)
+    and dictionary-encoded, compressed columns, so readers can prune partitions and columns:
+    ``pyarrow.parquet.read_table(root, columns=['Precio'], filters=[('Farmacia', '=', 'Salcobrand')])``.
+
+    Parameters
+    ----------
+    root : str
+        The directory of the dataset.
+    compression : str, optional
+        The Parquet compression codec ('zstd', 'snappy', 'gzip', ...).
+    """
+
+    PARTITION_COLS = ['Fecha', 'Farmacia']
+
+    def __init__(self, root, compression='zstd'):
+        # pyarrow solo es necesario si se usa este destino
+        import pyarrow
+        import pyarrow.parquet
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        self.root = root
+        self.compression = compression
+        os.makedirs(root, exist_ok=True)
+
+    def write(self, df):
+        if df.empty:
+            return
+        df = df.copy()
+        # Particiones por día, no por instante
+        df['Fecha'] = df['Fecha'].dt.strftime('%Y-%m-%d')
+        table = self._pa.Table.from_pandas(df, preserve_index=False)
+        # Un nombre de archivo distinto por lote para no sobrescribir los anteriores
+        self._pq.write_to_dataset(table, self.root, partition_cols=self.PARTITION_COLS,
+                                  compression=self.compression, use_dictionary=True,
+                                  basename_template=f'part-{uuid.uuid4().hex}-{{i}}.parquet',
+                                  existing_data_behavior='overwrite_or_ignore')
+        metrics.ROWS_LOADED.labels('parquet').inc(len(df))
+
+
+class DatabaseSink(Sink):
+    """
+    Upserts the data into a SQLite or ODBC (SQL Server) table keyed on (fecha, farmacia, url).
+
+    Every DataFrame is written in one transaction with ``executemany`` in chunks of
+    ``chunk_size`` rows, so re-running a day updates its rows instead of duplicating them.
+    SQLite uses ``INSERT ... ON CONFLICT DO UPDATE``; the ODBC target bulk-loads a temporary
+    table with ``fast_executemany`` and merges it into the table with ``MERGE``. The table
+    and the indexes for price-history queries are created if they do not exist.
+
+    Parameters
+    ----------
+    driver : str
+        'sqlite' or 'odbc'.
+    target : str
+        The path of the SQLite database, or the ODBC connection string.
+    table : str, optional
+        The name of the table.
+    chunk_size : int, optional
+        Rows sent per ``executemany`` call.
+    """
+
+    # Columna del DataFrame, columna de la tabla, tipo en SQLite, tipo en SQL Server
+    COLUMNS = [
+        ('Fecha', 'fecha', 'TEXT', 'DATE'),
+        ('Nombre del Remedio', 'nombre', 'TEXT', 'NVARCHAR(200)'),
+        ('Farmacia', 'farmacia', 'TEXT', 'NVARCHAR(100)'),
+        ('Precio', 'precio', 'INTEGER', 'INT'),
+        ('Laboratorio', 'laboratorio', 'TEXT', 'NVARCHAR(200)'),
+        ('¿Es Bioequivalente?', 'bioequivalente', 'TEXT', 'NVARCHAR(50)'),
+        ('¿Stock?', 'stock', 'INTEGER', 'BIT'),
+        ('Principio Activo', 'principio_activo', 'TEXT', 'NVARCHAR(400)'),
+        ('SKU', 'sku', 'TEXT', 'NVARCHAR(100)'),
+        ('Nombre (webpage)', 'nombre_web', 'TEXT', 'NVARCHAR(400)'),
+        ('URL', 'url', 'TEXT', 'NVARCHAR(450)'),
+    ]
+    KEY = ('fecha', 'farmacia', 'url')
+    INDEXES = {
+        'farmacia_nombre_fecha': ('farmacia', 'nombre', 'fecha'),
+        'nombre_fecha': ('nombre', 'fecha'),
+    }
+
+    def __init__(self, driver, target, table='precios', chunk_size=1000):
+        self.driver = driver
+        self.table = table
+        self.chunk_size = chunk_size
+        if driver == 'sqlite':
+            os.makedirs(os.path.dirname(target) or '.', exist_ok=True)
+            self._conn = sqlite3.connect(target)
+        elif driver == 'odbc':
+            # pyodbc solo es necesario si se usa este destino
+            import pyodbc
+            self._conn = pyodbc.connect(target, autocommit=False)
+        else:
+            raise ValueError(f"Driver de base de datos no reconocido: {driver}")
+        self._create_table()
+
+    def _create_table(self):
+        cursor = self._conn.cursor()
+        type_index = 2 if self.driver == 'sqlite' else 3
+        columns = ', '.join(f'{column[1]} {column[type_index]}' for column in self.COLUMNS)
+        ddl = f"CREATE TABLE {self.table} ({columns}, PRIMARY KEY ({', '.join(self.KEY)}))"
+        if self.driver == 'sqlite':
+            cursor.execute(ddl.replace('CREATE TABLE', 'CREATE TABLE IF NOT EXISTS', 1))
+            for name, columns in self.INDEXES.items():
+                cursor.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_{name} ON {self.table} ({', '.join(columns)})")
+        else:
+            cursor.execute(f"IF OBJECT_ID(N'{self.table}', N'U') IS NULL {ddl}")
+            for name, columns in self.INDEXES.items():
+                cursor.execute(f"IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = N'{self.table}_{name}') "
+                               f"CREATE INDEX {self.table}_{name} ON {self.table} ({', '.join(columns)})")
+        self._conn.commit()
+
+    @staticmethod
+    def _value(value):
+        # Convertir los tipos de pandas/numpy a tipos que entienden los drivers
+        if value is None or value is pd.NA or value is pd.NaT or (isinstance(value, float) and value != value):
+            return None
+        if isinstance(value, pd.Timestamp):
+            return value.strftime('%Y-%m-%d')
+        if hasattr(value, 'item'):
+            return value.item()
+        return value
+
+    def _rows(self, df):
+        columns = [column[0] for column in self.COLUMNS]
+        # Una fila por clave: MERGE no admite actualizar la misma fila dos veces
+        df = df.drop_duplicates(subset=['Fecha', 'Farmacia', 'URL'], keep='last').astype(object)
+        return [tuple(self._value(value) for value in row) for row in df[columns].itertuples(index=False)]
+
+    def write(self, df):
+        if df.empty:
+            return
+        rows = self._rows(df)
+        names = [column[1] for column in self.COLUMNS]
+        updates = [name for name in names if name not in self.KEY]
+        placeholders = ', '.join('?' for _ in names)
+        cursor = self._conn.cursor()
+        try:
+            if self.driver == 'sqlite':
+                sql = (f"INSERT INTO {self.table} ({', '.join(names)}) VALUES ({placeholders}) "
+                       f"ON CONFLICT ({', '.join(self.KEY)}) DO UPDATE SET "
+                       + ', '.join(f'{name} = excluded.{name}' for name in updates))
+                for start in range(0, len(rows), self.chunk_size):
+                    cursor.executemany(sql, rows[start:start + self.chunk_size])
+            else:
+                cursor.fast_executemany = True
+                staging = f'#{self.table}_staging'
+                cursor.execute(f'SELECT TOP 0 * INTO {staging} FROM {self.table}')
+                insert = f"INSERT INTO {staging} ({', '.join(names)}) VALUES ({placeholders})"
+                for start in range(0, len(rows), self.chunk_size):
+                    cursor.executemany(insert, rows[start:start + self.chunk_size])
+                cursor.execute(
+                    f"MERGE {self.table} AS t USING {staging} AS s ON "
+                    + ' AND '.join(f't.{name} = s.{name}' for name in self.KEY)
+                    + ' WHEN MATCHED THEN UPDATE SET ' + ', '.join(f't.{name} = s.{name}' for name in updates)
+                    + f" WHEN NOT MATCHED THEN INSERT ({', '.join(names)}) VALUES ("
+                    + ', '.join(f's.{name}' for name in names) + ');')
+                cursor.execute(f'DROP TABLE {staging}')
+            self._conn.commit()
+            metrics.ROWS_LOADED.labels('database').inc(len(rows))
+        except Exception:
+            self._conn.rollback()
+            raise
+
+    def close(self):
+        self._conn.close()
+
+
+def make_sinks(settings, output_file):
+    """
+    Builds the sinks listed in the 'loading' section of the configuration.
+
+    Parameters
+    ----------
+    settings : dict
+        The 'loading' section of the configuration.
+    output_file : str
+        The path of the CSV file, used by the 'csv' sink.
+
+    Returns
+    -------
+    list of Sink
+        The sinks, in the order they are listed.
+    """
+    sinks = []
+    for name in settings.get('sinks', ['csv']):
+        match name:
+            case 'csv':
+                sinks.append(CsvSink(output_file, settings.get('csv_dedup', False)))
+            case 'parquet':
+                sinks.append(ParquetSink(os.path.abspath(settings['parquet_dir']),
+                                         settings.get('compression', 'zstd')))
+            case 'database':
+                # SQLite local o destino ODBC con la cadena de conexión en una variable de entorno
+                database = settings['database']
+                if database['driver'] == 'sqlite':
+                    target = os.path.abspath(database['path'])
+                else:
+                    target = os.environ[database['connection_env']]
+                sinks.append(DatabaseSink(database['driver'], target, database.get('table', 'precios'),
+                                          database.get('chunk_size', 1000)))
+            case _:
+                raise ValueError(f"Destino no reconocido: {name}")
+    return sinks
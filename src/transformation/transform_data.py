@@ -3,6 +3,7 @@
 This module contains functions to transform medication data.
 
 Functions:
+- clean_price: Converts scraped prices ('$12.990', '$ 12,990', '12990.00', 12990.5) into integers.
 - transform_data: Transforms medication data into a pandas DataFrame with cleaned and formatted columns.
 """
 
@@ -10,48 +11,62 @@ import pandas as pd
 import numpy as np
 
 
+def clean_price(prices):
+    """
+    Converts scraped prices ('$12.990', '$ 12,990', '12990.00', 12990.5) into integers.
+
+    Parameters
+    ----------
+    prices : pd.Series
+        The scraped prices, as strings or numbers.
+
+    Returns
+    -------
+    pd.Series
+        The prices as a nullable integer (Int64) series, without the decimal part; missing
+        or unreadable prices are <NA>.
+    """
+    # Primero se descarta la parte decimal final ('.0', '.00', ',5'; los separadores de
+    # miles siempre van seguidos de tres dígitos) y luego todo lo que no sea dígito
+    # (símbolo de moneda, espacios y separadores de miles)
+    digits = (prices.astype('string')
+              .str.replace(r'[.,]\d{1,2}\s*$', '', regex=True)
+              .str.replace(r'\D', '', regex=True))
+    return digits.replace('', pd.NA).astype('Int64')
+
 def transform_data(med_data):
     """
     Transforms medication data into a pandas DataFrame with cleaned and formatted columns.
 
     Parameters
     ----------
-    med_data : dict
-        A dictionary containing medication data.
+    med_data : dict or list of dict
+        A dictionary containing medication data (as returned by ``extract_data``), or a
+        list of scraped records (a batch of ``extract_records``).
 
     Returns
     -------
     pd.DataFrame
         A pandas DataFrame with transformed medication data.
     """
-    output_data = []
-    for name, pharmacy in med_data.items():
-        for pharmacy, rowdata in pharmacy.items():
-            output_data.append(rowdata)
+    if isinstance(med_data, dict):
+        output_data = []
+        for name, pharmacy in med_data.items():
+            for pharmacy, rowdata in pharmacy.items():
+                output_data.append(rowdata)
+    else:
+        output_data = list(med_data)
 
     df = pd.DataFrame(output_data)
     pd.set_option('future.no_silent_downcasting', True)
     df = df.replace({None: np.nan})
     df['date'] = pd.to_datetime(df['date'], errors='coerce')
 
-    # Aplicar transformaciones solo a las filas que no son NaN
-    df['active_principle'] = df['active_principle'].apply(lambda x: x.title() if isinstance(x, str) else x)
-    df['lab_name'] = df['lab_name'].apply(lambda x: x.title() if isinstance(x, str) else x)
-    
-    
-    def clean_price(prc):
-        if pd.isna(prc):
-            return prc
-        # Eliminar símbolos de moneda y caracteres no numéricos
-        prc = str(prc).replace(' ', '').replace('$', '').replace(',', '')
-        # Eliminar decimales si existen
-        if '.' in prc and prc.endswith('.0'):
-            prc = prc.rstrip('.0')
-        # Eliminar puntos de separación de miles
-        prc = prc.replace('.', '')
-        return int(prc)
-
-    df['price'] = df['price'].apply(clean_price)
+    # Operaciones vectorizadas: los valores nulos se mantienen como NaN
+    df['active_principle'] = df['active_principle'].astype('string').str.title()
+    df['lab_name'] = df['lab_name'].astype('string').str.title().astype('category')
+    df['pharmacy'] = df['pharmacy'].astype('category')
+    df['price'] = clean_price(df['price'])
 
     # Renombrar las columnas
     df = df.rename(columns={
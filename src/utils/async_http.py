@@ -0,0 +1,208 @@
+"""
+This module contains the asynchronous HTTP client used to fetch the pages of the 'static'
+and 'json' scrapers from an event loop instead of one thread per row.
+
+Requests are sent with an ``httpx.AsyncClient`` that keeps the connections to every host
+alive and negotiates HTTP/2 when the server supports it (and the ``h2`` package is
+installed). Hundreds of requests can be in flight at once, up to ``async_http.max_in_flight``.
+Responses to 429/5xx and network errors are retried with exponential backoff (or after
+the ``Retry-After`` of the server) like the pooled sessions of ``http_client``. The HTTP cache, the fixtures and the errors raised
+are the same as in the synchronous path, so the scrapers and the retry classification do
+not change.
+
+Classes:
+- AsyncFetcher: Fetches the pages of the scrapers with an asynchronous HTTP client.
+
+Functions:
+- supports: Tells whether a scraper can be run on the asynchronous path.
+"""
+
+import asyncio
+import time
+
+import requests
+from urllib3.exceptions import InvalidHeader
+from urllib3.util.retry import Retry
+
+from . import fixtures, http_cache, metrics
+from .http_client import RETRY_STATUS
+
+try:
+    import h2  # noqa: F401
+    HTTP2 = True
+except ImportError:
+    HTTP2 = False
+
+# Eventos de httpcore (``http11.*``, ``http2.*`` o ``connection.*``) y la etapa en la que se registran
+TRACE_STAGES = {'connect_tcp': 'connect', 'start_tls': 'tls', 'receive_response_body': 'download'}
+
+def _retry_after(response):
+    # Segundos pedidos por el servidor en Retry-After (429/503), como urllib3 en la ruta síncrona
+    value = response.headers.get('Retry-After')
+    if response.status_code not in Retry.RETRY_AFTER_STATUS_CODES or not value:
+        return None
+    try:
+        return Retry().parse_retry_after(value)
+    except InvalidHeader:
+        return None
+
+def supports(spec):
+    """
+    Tells whether a scraper can be run on the asynchronous path: the 'static' and 'json'
+    scrapers, which fetch a single page declared by their ``request_url``.
+    """
+    return spec is not None and spec.fetch_mode in ('static', 'json') and hasattr(spec.scraper, 'request_url')
+
+
+class AsyncFetcher:
+    """
+    Fetches the pages of the scrapers with an asynchronous HTTP client.
+
+    Must be created and used inside a running event loop.
+
+    Parameters
+    ----------
+    settings : dict
+        The 'async_http' section of the configuration.
+    http_settings : dict
+        The 'http' section of the configuration (timeouts and retries).
+    """
+
+    def __init__(self, settings, http_settings):
+        # httpx solo es necesario si se usa la ruta asíncrona
+        import httpx
+        self._httpx = httpx
+        self.http_settings = http_settings
+        max_in_flight = settings.get('max_in_flight', 200)
+        self._client = httpx.AsyncClient(
+            http2=HTTP2 and settings.get('http2', True),
+            limits=httpx.Limits(max_connections=max_in_flight, max_keepalive_connections=max_in_flight),
+            timeout=httpx.Timeout(http_settings['read_timeout'], connect=http_settings['connect_timeout']),
+            follow_redirects=True)
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+
+    async def _send(self, url, headers, stages):
+        started = {}
+
+        async def trace(event, info):
+            # Tiempos de conexión, TLS, primer byte y descarga de httpcore
+            step, _, phase = event.rpartition('.')
+            step = step.rpartition('.')[2]
+            now = time.perf_counter()
+            if phase == 'started':
+                started[step] = now
+            elif phase == 'complete' and step in started:
+                if step in TRACE_STAGES:
+                    stage = TRACE_STAGES[step]
+                    stages[stage] = stages.get(stage, 0.0) + now - started[step]
+                elif step == 'receive_response_headers' and 'send_request_headers' in started:
+                    stages['ttfb'] = stages.get('ttfb', 0.0) + now - started['send_request_headers']
+
+        async with self._in_flight:
+            return await self._client.get(url, headers=headers, extensions={'trace': trace})
+
+    async def get(self, url, headers=None, stages=None):
+        """
+        Sends a GET request, retrying 429/5xx responses and network errors with exponential backoff.
+
+        The ``Retry-After`` header of a 429/503 response is honoured instead of the backoff,
+        like the pooled sessions of ``http_client``.
+
+        Parameters
+        ----------
+        url : str
+            The URL to request.
+        headers : dict, optional
+            Extra request headers.
+        stages : dict, optional
+            Dictionary where the seconds spent connecting, in the TLS handshake, until the
+            first byte and downloading are added.
+
+        Returns
+        -------
+        httpx.Response
+            The last response.
+
+        Raises
+        ------
+        requests.exceptions.Timeout, requests.exceptions.ConnectionError
+            If the request still fails after the retries (the same errors as the synchronous path).
+        """
+        stages = {} if stages is None else stages
+        retries = self.http_settings['retries']
+        for attempt in range(retries + 1):
+            try:
+                response = await self._send(url, headers, stages)
+            except self._httpx.TransportError as e:
+                if attempt == retries:
+                    error = requests.exceptions.Timeout if isinstance(e, self._httpx.TimeoutException) \
+                        else requests.exceptions.ConnectionError
+                    raise error(f'{type(e).__name__}: {e}') from e
+            else:
+                if response.status_code not in RETRY_STATUS or attempt == retries:
+                    return response
+                # El Retry-After del servidor reemplaza al backoff
+                delay = _retry_after(response)
+                if delay is not None:
+                    await asyncio.sleep(delay)
+                    continue
+            await asyncio.sleep(self.http_settings['backoff_factor'] * 2 ** attempt)
+
+    async def fetch(self, spec, url, pharmacy, stages):
+        """
+        Downloads the page of a scraper (or serves it from the fixtures in replay mode) and
+        returns its raw content, like ``decorators._fetch``.
+
+        If the page is in the HTTP cache, the request is conditional and a 304 response reuses
+        the cached body. The reads and writes of the cache and the fixtures run in a worker
+        thread, so the disk I/O does not block the event loop.
+
+        Parameters
+        ----------
+        spec : ScraperSpec
+            The scraper.
+        url : str
+            The URL of the product (the scraper's ``request_url`` gives the page to fetch).
+        pharmacy : str
+            The pharmacy of the row, for the metrics.
+        stages : dict
+            Dictionary where the timings of the request are added.
+
+        Raises
+        ------
+        requests.exceptions.HTTPError
+            If the page is not answered with a 200 (or a 304 served from the cache).
+        """
+        metrics.REQUESTS.labels(pharmacy, spec.fetch_mode).inc()
+        page_url = spec.scraper.request_url(url)
+        ext = spec.scraper.fixture_ext
+        if fixtures.MODE == 'replay':
+            response = await self.get(fixtures.replay_url(spec.name, page_url, ext), stages=stages)
+            cache = None
+        else:
+            cache = http_cache.get_cache() if spec.cache else None
+            # Acceso a disco fuera del event loop
+            headers = await asyncio.to_thread(cache.validators, page_url) if cache else {}
+            response = await self.get(page_url, headers=headers, stages=stages)
+            if response.status_code == 304 and cache:
+                content = await asyncio.to_thread(cache.load, page_url)
+                if content is not None:
+                    metrics.CACHE.labels(pharmacy, 'hit').inc()
+                    return content
+                # El archivo en caché ya no existe: descargar la página completa
+                response = await self.get(page_url, stages=stages)
+
+        if response.status_code != 200:
+            raise requests.exceptions.HTTPError(f'Error en la solicitud: {response.status_code}', response=response)
+        if cache:
+            metrics.CACHE.labels(pharmacy, 'miss').inc()
+            await asyncio.to_thread(cache.store, page_url, response)
+        if fixtures.MODE == 'record':
+            await asyncio.to_thread(fixtures.record, spec.name, page_url, response.content, ext)
+        return response.content
+
+    async def aclose(self):
+        """
+        Closes the connections of the client.
+        """
+        await self._client.aclose()
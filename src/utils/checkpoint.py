@@ -0,0 +1,170 @@
+"""
+This module contains the write-ahead log used to resume an interrupted extraction run.
+
+Every scraped record is appended to a JSONL file (and flushed to disk) as soon as it is
+scraped, and every batch written to the output file is marked as loaded. If the process
+dies, the next run of the same day over the same input file skips the rows already
+loaded, replays the ones scraped but not loaded yet and only scrapes the rest. The log
+is removed when a run finishes.
+
+Classes:
+- Checkpoint: Write-ahead log of the scraped and loaded rows of a run.
+
+Functions:
+- row_key: Returns the key of a row of the input CSV.
+- record_key: Returns the key of a scraped record.
+- drop_torn_line: Truncates an append-only JSONL file after its last complete line.
+- get_checkpoint: Returns the process-wide checkpoint, or None if it is disabled in the configuration.
+"""
+
+import json
+import os
+import threading
+from datetime import datetime
+
+from . import sharding
+from .config import load_config
+
+
+def row_key(row):
+    """
+    Returns the key of a row of the input CSV: ``(product_name, pharmacy, url)``.
+    """
+    return (row['product_name'], row['pharmacy'], row['url'].strip('"'))
+
+def record_key(data):
+    """
+    Returns the key of a scraped record, equal to the key of the row it comes from.
+    """
+    return (data['name'], data['pharmacy'], data['url'])
+
+def drop_torn_line(path):
+    """
+    Truncates an append-only JSONL file after its last complete line, removing the line
+    left incomplete by a crash during a write, so new lines are not appended to it.
+    """
+    with open(path, 'rb+') as file:
+        size = file.seek(0, os.SEEK_END)
+        position = size
+        while position > 0:
+            step = min(65536, position)
+            file.seek(position - step)
+            end = file.read(step).rfind(b'\n')
+            if end != -1:
+                position = position - step + end + 1
+                break
+            position -= step
+        if position < size:
+            file.truncate(position)
+
+
+class Checkpoint:
+    """
+    Write-ahead log of the scraped and loaded rows of a run.
+
+    Parameters
+    ----------
+    path : str
+        Path of the JSONL log.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.scraped = {}
+        self.loaded = set()
+        self._file = None
+        self._lock = threading.Lock()
+
+    def begin(self, input_file):
+        """
+        Opens the log for a run over ``input_file``, resuming the previous run if it was
+        interrupted today over the same file and starting a new log otherwise.
+
+        Returns
+        -------
+        int
+            The number of rows recovered from the previous run.
+        """
+        run = {'type': 'run', 'date': datetime.now().strftime('%Y-%m-%d'), 'input': os.path.abspath(input_file)}
+        entries = []
+        if os.path.exists(self.path):
+            # Descartar la línea incompleta de una caída antes de seguir escribiendo a continuación
+            drop_torn_line(self.path)
+            with open(self.path, encoding='utf-8') as log:
+                for line in log:
+                    try:
+                        entries.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        continue
+
+        self.scraped, self.loaded = {}, set()
+        if entries and entries[0] == run:
+            for entry in entries[1:]:
+                if entry['type'] == 'scraped':
+                    self.scraped[record_key(entry['data'])] = entry['data']
+                elif entry['type'] == 'loaded':
+                    self.loaded.update(tuple(key) for key in entry['keys'])
+            mode = 'a'
+        else:
+            mode = 'w'
+
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._file = open(self.path, mode, encoding='utf-8')
+        if mode == 'w':
+            self._write(run)
+        return len(self.scraped)
+
+    def _write(self, entry):
+        with self._lock:
+            self._file.write(json.dumps(entry, ensure_ascii=False, default=str) + '\n')
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def mark_scraped(self, data):
+        """
+        Appends a scraped record to the log.
+        """
+        self.scraped[record_key(data)] = data
+        self._write({'type': 'scraped', 'data': data})
+
+    def mark_loaded(self, records):
+        """
+        Marks a batch of records as written to the output file.
+        """
+        keys = [record_key(data) for data in records]
+        self.loaded.update(keys)
+        self._write({'type': 'loaded', 'keys': keys})
+
+    def finish(self):
+        """
+        Closes and removes the log once the run has finished.
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+_checkpoint = None
+_checkpoint_loaded = False
+_checkpoint_lock = threading.Lock()
+
+def get_checkpoint():
+    """
+    Returns the process-wide checkpoint built from the 'checkpoint' section of the configuration.
+
+    Returns
+    -------
+    Checkpoint or None
+        The shared checkpoint, or None if checkpointing is disabled.
+    """
+    global _checkpoint, _checkpoint_loaded
+    with _checkpoint_lock:
+        if not _checkpoint_loaded:
+            settings = load_config().get('checkpoint', {})
+            if settings.get('enabled', False):
+                # Un log por shard cuando varios procesos corren en el mismo host
+                _checkpoint = Checkpoint(os.path.abspath(sharding.suffix(settings['path'])))
+            _checkpoint_loaded = True
+    return _checkpoint
@@ -1,7 +1,11 @@
 import yaml
 import os
 
-def load_config(config_path=os.path.abspath('./src/utils/config.yaml')):
+# Variable de entorno con otra configuración (p. ej. la de los benchmarks, con rutas temporales)
+CONFIG_ENV = 'PHARMACY_SCRAPER_CONFIG'
+
+def load_config(config_path=None):
+    config_path = config_path or os.environ.get(CONFIG_ENV) or os.path.abspath('./src/utils/config.yaml')
     with open(config_path, 'r') as file:
         config = yaml.safe_load(file)
     return config
@@ -1,45 +1,213 @@
 from functools import wraps
+import json
+import time
 import requests
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
+
+from . import fixtures, http_cache, http_client, instrumentation, metrics, registry, structured_data
+from .driver_pool import get_driver_pool
+from .parsing import make_soup
+from .readiness import wait_until_ready
+
+# Cada scraper declara una única forma de obtener la página (atributo ``fetch_mode``):
+# - 'static': HTML descargado con requests
+# - 'json': JSON embebido en un <script> del HTML o entregado por la API de la tienda
+# - 'rendered': DOM renderizado por Chrome
+#
+# El atributo ``parse(url, content, data)`` ejecuta el scraper sobre una página ya
+# descargada (p. ej. las guardadas en modo 'record'), sin red ni navegador. Los scrapers
+# 'static' y 'json' declaran además la página que descargan (``request_url(url)`` y
+# ``fixture_ext``), para que la ruta asíncrona (ver async_http) los ejecute sin bloquear.
+#
+# Los decoradores registran el tiempo de cada etapa (checkout del driver, carga,
+# espera, parseo y validación) en la fila que se está scrapeando (ver instrumentation)
+# y actualizan las métricas de Prometheus con la farmacia de la fila como etiqueta.
+FETCH_MODES = ('static', 'json', 'rendered')
+
+def _pharmacy(name):
+    # Farmacia de la fila en curso, o el nombre del scraper fuera de una ejecución
+    return instrumentation.current_pharmacy() or name
+
+def _count_request(name, fetch_mode):
+    metrics.REQUESTS.labels(_pharmacy(name), fetch_mode).inc()
+
+def _page_url(url):
+    # Los scrapers de HTML descargan la misma página del producto
+    return url
+
+def _fetch(url, name, ext='html'):
+    """
+    Downloads a page (or serves it from the fixtures in replay mode) and returns its raw content.
+
+    If the page is in the HTTP cache, the request is conditional and a 304 response reuses the cached body.
+    """
+    if fixtures.MODE == 'replay':
+        response = http_client.get(fixtures.replay_url(name, url, ext))
+        cache = None
+    else:
+        spec = registry.get_spec(name)
+        cache = http_cache.get_cache() if spec is None or spec.cache else None
+        headers = cache.validators(url) if cache else {}
+        response = http_client.get(url, headers=headers)
+        if response.status_code == 304 and cache:
+            content = cache.load(url)
+            if content is not None:
+                metrics.CACHE.labels(_pharmacy(name), 'hit').inc()
+                return content
+            # El archivo en caché ya no existe: descargar la página completa
+            response = http_client.get(url)
+
+    if response.status_code != 200:
+        raise requests.exceptions.HTTPError(f'Error en la solicitud: {response.status_code}', response=response)
+    if cache:
+        metrics.CACHE.labels(_pharmacy(name), 'miss').inc()
+        cache.store(url, response)
+    if fixtures.MODE == 'record':
+        fixtures.record(name, url, response.content, ext)
+    return response.content
 
 def initialize_driver(func):
     @wraps(func)
     def wrapper(url, *args, **kwargs):
-        options = Options()
-        options.add_argument("--headless")
-        options.add_argument("--incognito")
-        # options.binary_location = "/usr/bin/google-chrome"
-        # service = Service('/usr/local/bin/chromedriver')
-        driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-        try:
-            result = func(url, driver, *args, **kwargs)
-        finally:
-            driver.quit()
-        return result
+        _count_request(func.__name__, 'rendered')
+        # El driver vuelve al pool (limpio) al salir del bloque
+        start = time.perf_counter()
+        with get_driver_pool().checkout() as driver:
+            instrumentation.record('driver_checkout', time.perf_counter() - start)
+            with instrumentation.timed('browser'):
+                result = func(url, driver, *args, **kwargs)
+            if fixtures.MODE == 'record':
+                fixtures.record(func.__name__, url, driver.page_source)
+            return result
+
+    def parse(url, content, *args, **kwargs):
+        page_source = content.decode('utf-8') if isinstance(content, bytes) else content
+        return func(url, fixtures.FakeDriver(page_source, url), *args, **kwargs)
+
+    wrapper.fetch_mode = 'rendered'
+    wrapper.parse = parse
     return wrapper
 
+def render_page(ready=None, parse_only=None):
+    def decorator(func):
+        @wraps(func)
+        def wrapper(url, *args, **kwargs):
+            _count_request(func.__name__, 'rendered')
+            start = time.perf_counter()
+            with get_driver_pool().checkout() as driver:
+                instrumentation.record('driver_checkout', time.perf_counter() - start)
+                with instrumentation.timed('page_load'):
+                    driver.get(url)
+                if ready:
+                    # wait_until_ready registra la etapa 'wait'
+                    wait_until_ready(driver, **ready, name=func.__name__)
+                page_source = driver.page_source
+                if fixtures.MODE == 'record':
+                    fixtures.record(func.__name__, url, page_source)
+                with instrumentation.timed('parse'):
+                    soup = make_soup(page_source, parse_only)
+                    return func(url, driver, soup, *args, **kwargs)
+
+        def parse(url, content, *args, **kwargs):
+            page_source = content.decode('utf-8') if isinstance(content, bytes) else content
+            soup = make_soup(page_source, parse_only)
+            return func(url, fixtures.FakeDriver(page_source, url), soup, *args, **kwargs)
+
+        wrapper.fetch_mode = 'rendered'
+        wrapper.parse_only = parse_only
+        wrapper.ready = ready
+        wrapper.parse = parse
+        return wrapper
+    return decorator
+
+def check_required(data, required_keys):
+    """
+    Raises a ValueError if any of the required keys of a scraped record is missing or None.
+    """
+    with instrumentation.timed('validate'):
+        for key in required_keys:
+            if data.get(key) is None:
+                raise ValueError(f'Missing required data: {key}')
+
 def validate_data(required_keys):
     def decorator(func):
         @wraps(func)
         def wrapper(*args, **kwargs):
             data = func(*args, **kwargs)
-            for key in required_keys:
-                if data.get(key) is None:
-                    raise ValueError(f'Missing required data: {key}')
+            check_required(data, required_keys)
             return data
+
+        wrapper.required_keys = tuple(required_keys)
+        return wrapper
+    return decorator
+
+def handle_http_request(func=None, parse_only=None, raw=False):
+    # Se puede usar como @handle_http_request o @handle_http_request(parse_only=SoupStrainer(...))
+    # Con raw=True el scraper recibe además el HTML sin procesar, para leer los datos
+    # estructurados (JSON-LD, variables de JavaScript) con structured_data
+    if func is None:
+        return lambda func: handle_http_request(func, parse_only, raw)
+
+    def parse(url, content, *args, **kwargs):
+        with instrumentation.timed('parse'):
+            soup = make_soup(content, parse_only)
+            if raw:
+                return func(url, soup, content, *args, **kwargs)
+            return func(url, soup, *args, **kwargs)
+
+    @wraps(func)
+    def wrapper(url, *args, **kwargs):
+        _count_request(func.__name__, 'static')
+        content = _fetch(url, func.__name__)
+        return parse(url, content, *args, **kwargs)
+
+    wrapper.fetch_mode = 'static'
+    wrapper.parse_only = parse_only
+    wrapper.parse = parse
+    wrapper.request_url = _page_url
+    wrapper.fixture_ext = 'html'
+    return wrapper
+
+def handle_json_request(script_id):
+    def decorator(func):
+        def parse(url, content, *args, **kwargs):
+            # Solo se decodifica el <script> con el JSON, sin construir el documento
+            with instrumentation.timed('parse'):
+                payload = structured_data.embedded_json(content, script_id=script_id)
+                if payload is None:
+                    raise ValueError(f'Missing embedded JSON: {script_id}')
+                return func(url, payload, content.decode('utf-8', errors='replace'), *args, **kwargs)
+
+        @wraps(func)
+        def wrapper(url, *args, **kwargs):
+            _count_request(func.__name__, 'json')
+            content = _fetch(url, func.__name__)
+            return parse(url, content, *args, **kwargs)
+
+        wrapper.fetch_mode = 'json'
+        wrapper.parse = parse
+        wrapper.request_url = _page_url
+        wrapper.fixture_ext = 'html'
         return wrapper
     return decorator
 
-def handle_http_request(func):
+def handle_vtex_request(func):
+    def parse(url, content, *args, **kwargs):
+        with instrumentation.timed('parse'):
+            products = json.loads(content)
+            if not products:
+                raise ValueError(f'Product not found in VTEX catalog: {url}')
+            return func(url, products[0], *args, **kwargs)
+
     @wraps(func)
     def wrapper(url, *args, **kwargs):
-        response = requests.get(url)
-        if response.status_code != 200:
-            raise requests.exceptions.HTTPError(f'Error en la solicitud: {response.status_code}')
-        soup = BeautifulSoup(response.content, 'html.parser')
-        return func(url, soup, *args, **kwargs)
-    return wrapper
\ No newline at end of file
+        _count_request(func.__name__, 'json')
+        # API de catálogo de VTEX en vez del HTML de la página
+        catalog_url = structured_data.vtex_catalog_url(url)
+        content = _fetch(catalog_url, func.__name__, ext='json')
+        return parse(url, content, *args, **kwargs)
+
+    wrapper.fetch_mode = 'json'
+    wrapper.parse = parse
+    wrapper.request_url = structured_data.vtex_catalog_url
+    wrapper.fixture_ext = 'json'
+    return wrapper
@@ -0,0 +1,237 @@
+"""
+This module contains a pool of reusable headless Chrome drivers for the Selenium scrapers.
+
+Classes:
+- DriverPool: Keeps N long-lived drivers that are checked out per URL and recycled.
+
+Functions:
+- get_driver_pool: Returns the process-wide driver pool, creating it from the configuration.
+"""
+
+import atexit
+import logging
+import threading
+from contextlib import contextmanager
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+from webdriver_manager.chrome import ChromeDriverManager
+
+from . import fixtures, metrics, registry
+from .config import load_config
+
+logger = logging.getLogger(__name__)
+
+# Campos de una cookie de Network.getAllCookies que acepta Network.setCookies
+_COOKIE_PARAMS = ('name', 'value', 'domain', 'path', 'secure', 'httpOnly', 'sameSite', 'expires')
+
+
+class DriverPool:
+    """
+    Pool of long-lived headless Chrome drivers.
+
+    Drivers are created lazily up to ``size``. After each use the cookies and the
+    storage of the driver are cleared, and the driver is recycled (closed and later
+    replaced) once it has served ``max_pages`` pages or when it stops responding.
+
+    Cookies of the domains listed in ``keep_cookies`` (e.g. a cookie-consent banner
+    already accepted) survive between uses, together with the per-session state
+    returned by ``session_state``, until the driver is recycled.
+
+    Parameters
+    ----------
+    size : int
+        Maximum number of drivers open at the same time.
+    max_pages : int
+        Number of pages a driver serves before being recycled.
+    arguments : list of str
+        Command line arguments passed to Chrome.
+    keep_cookies : list of str, optional
+        Domains whose cookies are kept between uses of the same driver.
+    driver_factory : callable, optional
+        Creates the drivers instead of starting Chrome (e.g. ``fixtures.FakeDriver`` in replay mode).
+    """
+
+    def __init__(self, size, max_pages, arguments, keep_cookies=(), driver_factory=None):
+        self.size = size
+        self.max_pages = max_pages
+        self.arguments = list(arguments)
+        self.keep_cookies = tuple(keep_cookies)
+        self._idle = []
+        self._lock = threading.Lock()
+        # Protege los drivers libres y el número de drivers creados; se notifica cuando se
+        # devuelve un driver o se descarta uno (queda un cupo para crear otro)
+        self._available = threading.Condition(threading.Lock())
+        self._created = 0
+        self._pages = {}
+        self._state = {}
+        self._driver_path = None
+        self._driver_factory = driver_factory
+        self._closed = False
+        metrics.DRIVER_POOL_SIZE.set(size)
+
+    def _service(self):
+        # ChromeDriverManager().install() solo se ejecuta una vez por proceso
+        with self._lock:
+            if self._driver_path is None:
+                self._driver_path = ChromeDriverManager().install()
+        return Service(self._driver_path)
+
+    def _create(self):
+        if self._driver_factory is not None:
+            return self._driver_factory()
+        options = Options()
+        for argument in self.arguments:
+            options.add_argument(argument)
+        return webdriver.Chrome(service=self._service(), options=options)
+
+    def _acquire(self):
+        with self._available:
+            while True:
+                if self._idle:
+                    return self._idle.pop()
+                if self._created < self.size:
+                    self._created += 1
+                    metrics.DRIVERS_CREATED.set(self._created)
+                    break
+                # Esperar a que otro hilo devuelva o descarte un driver
+                self._available.wait()
+
+        try:
+            return self._create()
+        except Exception:
+            self._free_slot()
+            raise
+
+    def _free_slot(self):
+        with self._available:
+            self._created -= 1
+            metrics.DRIVERS_CREATED.set(self._created)
+            self._available.notify()
+
+    @contextmanager
+    def checkout(self):
+        """
+        Checks out a driver for the duration of a ``with`` block.
+
+        Yields
+        ------
+        WebDriver
+            A driver with no cookies or storage from previous pages, except the
+            cookies of the ``keep_cookies`` domains.
+        """
+        if self._closed:
+            raise RuntimeError('The driver pool is closed')
+
+        driver = self._acquire()
+        metrics.DRIVERS_IN_USE.inc()
+        try:
+            yield driver
+        finally:
+            metrics.DRIVERS_IN_USE.dec()
+            self._release(driver)
+
+    def session_state(self, driver):
+        """
+        Returns a dictionary kept for the whole life of a driver (e.g. whether a cookie banner was accepted).
+
+        Parameters
+        ----------
+        driver : WebDriver
+            A driver checked out from this pool.
+
+        Returns
+        -------
+        dict
+            The state of the driver session, emptied when the driver is recycled.
+        """
+        return self._state.setdefault(driver, {})
+
+    def _release(self, driver):
+        pages = self._pages.get(driver, 0) + 1
+        healthy = not self._closed and pages < self.max_pages and self._reset(driver)
+        if healthy:
+            self._pages[driver] = pages
+            with self._available:
+                self._idle.append(driver)
+                self._available.notify()
+        else:
+            self._discard(driver)
+
+    def _reset(self, driver):
+        """
+        Clears cookies, cache and storage of every origin. Returns False if the driver crashed.
+        """
+        try:
+            kept = self._kept_cookies(driver) if self.keep_cookies else []
+            driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+            driver.execute_cdp_cmd('Storage.clearDataForOrigin', {'origin': '*', 'storageTypes': 'all'})
+            if kept:
+                driver.execute_cdp_cmd('Network.setCookies', {'cookies': kept})
+            driver.get('about:blank')
+            return True
+        except WebDriverException as e:
+            logger.warning(f'Driver descartado: {e}')
+            return False
+
+    def _kept_cookies(self, driver):
+        cookies = driver.execute_cdp_cmd('Network.getAllCookies', {})['cookies']
+        kept = []
+        for cookie in cookies:
+            if not cookie['domain'].lstrip('.').endswith(self.keep_cookies):
+                continue
+            params = {key: cookie[key] for key in _COOKIE_PARAMS if key in cookie}
+            if cookie.get('session'):
+                params.pop('expires', None)
+            kept.append(params)
+        return kept
+
+    def _discard(self, driver):
+        self._pages.pop(driver, None)
+        self._state.pop(driver, None)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        self._free_slot()
+
+    def close(self):
+        """
+        Closes every idle driver. Drivers still checked out are closed when returned.
+        """
+        self._closed = True
+        with self._available:
+            idle, self._idle = self._idle, []
+        for driver in idle:
+            self._discard(driver)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_driver_pool():
+    """
+    Returns the process-wide driver pool, creating it from the 'driver_pool' section of the configuration.
+
+    The pool is closed automatically when the process exits. In fixtures replay mode
+    the pool hands out ``FakeDriver`` instances instead of starting Chrome.
+
+    Returns
+    -------
+    DriverPool
+        The shared driver pool.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            settings = load_config()['driver_pool']
+            factory = fixtures.FakeDriver if fixtures.MODE == 'replay' else None
+            keep_cookies = list(settings.get('keep_cookies', []))
+            for spec in registry.specs():
+                if spec.keep_cookies:
+                    keep_cookies.extend(spec.domains)
+            _pool = DriverPool(settings['size'], settings['max_pages'], settings['arguments'],
+                               keep_cookies, factory)
+            atexit.register(_pool.close)
+    return _pool
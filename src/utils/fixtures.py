@@ -0,0 +1,234 @@
+"""
+This module contains the record/replay support used to run the scrapers without network.
+
+In 'record' mode the raw HTTP responses and the rendered DOM of every page are saved
+under ``<dir>/<scraper>/<key>.<ext>``. In 'replay' mode the HTTP requests are served from
+those files by a local HTTP server and the Selenium scrapers get a ``FakeDriver`` that
+loads the saved DOM.
+
+Classes:
+- FakeDriver: Minimal stand-in for a Selenium WebDriver backed by saved pages.
+
+Functions:
+- fixture_key: Returns the file name (without extension) used for a URL.
+- record: Saves the content of a page for a scraper.
+- recorded_pages: Returns the URL and the content of every page saved for a scraper.
+- replay_url: Returns the URL of the local server that serves the saved response of a URL.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from bs4 import BeautifulSoup, Tag
+from lxml import html as lxml_html
+from selenium.common.exceptions import NoSuchElementException, WebDriverException
+from selenium.webdriver.common.by import By
+
+from .config import load_config
+
+_settings = load_config().get('fixtures', {})
+
+# 'off', 'record' o 'replay'
+MODE = _settings.get('mode', 'off')
+FIXTURES_DIR = os.path.abspath(_settings.get('dir', './data/fixtures'))
+
+_server = None
+_lock = threading.Lock()
+
+def fixture_key(url):
+    """
+    Returns the file name (without extension) used for a URL.
+    """
+    return hashlib.sha1(url.encode()).hexdigest()[:16]
+
+def record(name, url, content, ext='html'):
+    """
+    Saves the content of a page for a scraper.
+
+    Parameters
+    ----------
+    name : str
+        The name of the scraper (e.g. 'salcobrand').
+    url : str
+        The URL of the page.
+    content : bytes or str
+        The raw response or the rendered DOM.
+    ext : str, optional
+        The extension of the file ('html' for pages, 'json' for API responses).
+    """
+    directory = os.path.join(FIXTURES_DIR, name)
+    os.makedirs(directory, exist_ok=True)
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    key = fixture_key(url)
+    with open(os.path.join(directory, f'{key}.{ext}'), 'wb') as file:
+        file.write(content)
+    with _lock, open(os.path.join(directory, 'index.jsonl'), 'a', encoding='utf-8') as index:
+        index.write(json.dumps({'key': key, 'url': url, 'ext': ext}) + '\n')
+
+def recorded_pages(name):
+    """
+    Returns the URL and the content of every page saved for a scraper.
+
+    Parameters
+    ----------
+    name : str
+        The name of the scraper.
+
+    Returns
+    -------
+    list of tuple
+        ``(url, content)`` pairs, with the content as bytes.
+    """
+    path = os.path.join(FIXTURES_DIR, name, 'index.jsonl')
+    if not os.path.exists(path):
+        return []
+
+    entries = {}
+    with open(path, encoding='utf-8') as index:
+        for line in index:
+            entry = json.loads(line)
+            entries[(entry['key'], entry['ext'])] = entry['url']
+
+    pages = []
+    for (key, ext), url in sorted(entries.items()):
+        with open(os.path.join(FIXTURES_DIR, name, f'{key}.{ext}'), 'rb') as file:
+            pages.append((url, file.read()))
+    return pages
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+def _server_url():
+    global _server
+    with _lock:
+        if _server is None:
+            handler = partial(_QuietHandler, directory=FIXTURES_DIR)
+            _server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+            threading.Thread(target=_server.serve_forever, daemon=True).start()
+    host, port = _server.server_address[:2]
+    return f'http://{host}:{port}'
+
+def replay_url(name, url, ext='html'):
+    """
+    Returns the URL of the local server that serves the saved response of a URL.
+
+    The server is started on a free port the first time it is needed.
+
+    Parameters
+    ----------
+    name : str
+        The name of the scraper.
+    url : str
+        The original URL.
+    ext : str, optional
+        The extension used when the response was recorded.
+
+    Returns
+    -------
+    str
+        The local URL (a 404 is returned if the page was never recorded).
+    """
+    return f'{_server_url()}/{name}/{fixture_key(url)}.{ext}'
+
+
+class FakeElement:
+    """
+    Element returned by ``FakeDriver.find_element``.
+    """
+
+    def __init__(self, node):
+        self._node = node
+
+    @property
+    def text(self):
+        if isinstance(self._node, Tag):
+            return self._node.get_text()
+        return self._node.text_content()
+
+    def get_attribute(self, name):
+        if isinstance(self._node, Tag):
+            if name == 'innerHTML':
+                return self._node.decode_contents()
+            if name == 'outerHTML':
+                return str(self._node)
+            return self._node.get(name)
+        if name in ('innerHTML', 'outerHTML'):
+            outer = lxml_html.tostring(self._node, encoding='unicode')
+            if name == 'outerHTML':
+                return outer
+            return (self._node.text or '') + ''.join(lxml_html.tostring(child, encoding='unicode') for child in self._node)
+        return self._node.get(name)
+
+    def click(self):
+        pass
+
+    def is_displayed(self):
+        return True
+
+    def is_enabled(self):
+        return True
+
+
+class FakeDriver:
+    """
+    Minimal stand-in for a Selenium WebDriver that loads the DOM saved in record mode.
+
+    It supports the calls made by the scrapers and the driver pool: ``get``,
+    ``page_source``, ``find_element(s)`` (CSS, XPath, tag name, id, class name),
+    ``execute_script``, ``execute_cdp_cmd`` and ``quit``.
+    """
+
+    def __init__(self, page_source='', url=None):
+        self.current_url = url or 'about:blank'
+        self.page_source = page_source
+
+    def get(self, url):
+        if url == self.current_url and self.page_source:
+            return
+        self.current_url = url
+        if url == 'about:blank':
+            self.page_source = ''
+            return
+        files = glob.glob(os.path.join(FIXTURES_DIR, '*', f'{fixture_key(url)}.html'))
+        if not files:
+            raise WebDriverException(f'No recorded page for {url}')
+        with open(files[0], encoding='utf-8') as file:
+            self.page_source = file.read()
+
+    def find_elements(self, by=By.ID, value=None):
+        if by == By.XPATH:
+            return [FakeElement(node) for node in lxml_html.fromstring(self.page_source or '<html/>').xpath(value)]
+        selector = {
+            By.CSS_SELECTOR: value,
+            By.TAG_NAME: value,
+            By.ID: f'#{value}',
+            By.CLASS_NAME: f'.{value}',
+        }[by]
+        return [FakeElement(node) for node in BeautifulSoup(self.page_source, 'lxml').select(selector)]
+
+    def find_element(self, by=By.ID, value=None):
+        elements = self.find_elements(by, value)
+        if not elements:
+            raise NoSuchElementException(f'{by}={value}')
+        return elements[0]
+
+    def execute_script(self, script, *args):
+        # Las páginas guardadas ya están completas y sin solicitudes pendientes
+        if 'performance.getEntriesByType' in script:
+            return ['complete', 0]
+        if script.strip().startswith('return'):
+            return True
+        return None
+
+    def execute_cdp_cmd(self, cmd, params):
+        return {'cookies': []}
+
+    def quit(self):
+        pass
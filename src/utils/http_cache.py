@@ -0,0 +1,204 @@
+"""
+This module contains a persistent HTTP response cache with conditional requests.
+
+Bodies are stored on disk together with their validators (ETag / Last-Modified). A cached
+page is revalidated with ``If-None-Match`` / ``If-Modified-Since`` and, if the server answers
+304 Not Modified, the stored body is reused. Entries expire after a TTL and the least
+recently used ones are evicted when the cache grows over its size limit.
+
+Classes:
+- HttpCache: On-disk cache of response bodies and validators, indexed in SQLite.
+
+Functions:
+- get_cache: Returns the process-wide cache, or None if it is disabled in the configuration.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from .config import load_config
+
+
+class HttpCache:
+    """
+    On-disk cache of response bodies and validators, indexed in SQLite.
+
+    Parameters
+    ----------
+    directory : str
+        Directory where the bodies and the index are stored.
+    ttl : float
+        Seconds an entry can be reused since it was last validated by the server.
+    max_bytes : int
+        Maximum total size of the stored bodies.
+    """
+
+    def __init__(self, directory, ttl, max_bytes):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        # timeout: esperar a que otros procesos (shards) terminen de escribir
+        self._db = sqlite3.connect(os.path.join(directory, 'index.sqlite'), timeout=30, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                url TEXT PRIMARY KEY,
+                file TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                stored_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                size INTEGER NOT NULL
+            )""")
+        self._db.execute('CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)')
+        self._db.commit()
+
+    def _path(self, file):
+        return os.path.join(self.directory, file)
+
+    def validators(self, url):
+        """
+        Returns the conditional request headers for a cached URL (empty if not cached or expired).
+        """
+        with self._lock:
+            row = self._db.execute('SELECT etag, last_modified, stored_at FROM entries WHERE url = ?', (url,)).fetchone()
+        if row is None:
+            return {}
+        etag, last_modified, stored_at = row
+        if time.time() - stored_at > self.ttl:
+            self._delete(url)
+            return {}
+
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        return headers
+
+    def load(self, url):
+        """
+        Returns the cached body of a URL after a 304 response and marks it as fresh again.
+
+        Returns
+        -------
+        bytes or None
+            The cached body, or None if it is no longer on disk.
+        """
+        with self._lock:
+            row = self._db.execute('SELECT file FROM entries WHERE url = ?', (url,)).fetchone()
+        if row is None:
+            return None
+        try:
+            with open(self._path(row[0]), 'rb') as file:
+                content = file.read()
+        except FileNotFoundError:
+            self._delete(url)
+            return None
+
+        now = time.time()
+        with self._lock:
+            self._db.execute('UPDATE entries SET stored_at = ?, last_access = ? WHERE url = ?', (now, now, url))
+            self._db.commit()
+            self.hits += 1
+        return content
+
+    def store(self, url, response):
+        """
+        Stores the body of a 200 response if it has an ETag or a Last-Modified validator.
+        """
+        with self._lock:
+            self.misses += 1
+
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+
+        file = hashlib.sha1(url.encode()).hexdigest()
+        tmp_path = self._path(f'{file}.tmp{os.getpid()}-{threading.get_ident()}')
+        with open(tmp_path, 'wb') as tmp:
+            tmp.write(response.content)
+        os.replace(tmp_path, self._path(file))
+
+        now = time.time()
+        with self._lock:
+            self._db.execute('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)',
+                             (url, file, etag, last_modified, now, now, len(response.content)))
+            self._db.commit()
+        self._evict()
+
+    def _delete(self, url):
+        with self._lock:
+            row = self._db.execute('SELECT file FROM entries WHERE url = ?', (url,)).fetchone()
+            self._db.execute('DELETE FROM entries WHERE url = ?', (url,))
+            self._db.commit()
+        if row:
+            try:
+                os.remove(self._path(row[0]))
+            except FileNotFoundError:
+                pass
+
+    def _evict(self):
+        # Eliminar las entradas usadas hace más tiempo hasta volver bajo el límite
+        with self._lock:
+            total = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            victims = []
+            for url, file, size in self._db.execute('SELECT url, file, size FROM entries ORDER BY last_access'):
+                if total <= self.max_bytes:
+                    break
+                victims.append((url, file))
+                total -= size
+            self._db.executemany('DELETE FROM entries WHERE url = ?', [(url,) for url, _ in victims])
+            self._db.commit()
+        for _, file in victims:
+            try:
+                os.remove(self._path(file))
+            except FileNotFoundError:
+                pass
+
+    def stats(self):
+        """
+        Returns the hit/miss counters of the current run and the size of the cache.
+
+        Returns
+        -------
+        dict
+            Keys 'hits', 'misses', 'entries' and 'bytes'.
+        """
+        with self._lock:
+            entries, size = self._db.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries').fetchone()
+            return {'hits': self.hits, 'misses': self.misses, 'entries': entries, 'bytes': size}
+
+
+_cache = None
+_cache_loaded = False
+_cache_lock = threading.Lock()
+
+def get_cache():
+    """
+    Returns the process-wide cache built from the 'http_cache' section of the configuration.
+
+    Returns
+    -------
+    HttpCache or None
+        The shared cache, or None if the cache is disabled.
+    """
+    global _cache, _cache_loaded
+    with _cache_lock:
+        if not _cache_loaded:
+            settings = load_config().get('http_cache', {})
+            if settings.get('enabled', False):
+                _cache = HttpCache(os.path.abspath(settings['dir']), settings['ttl_hours'] * 3600,
+                                   settings['max_mb'] * 1024 * 1024)
+            _cache_loaded = True
+    return _cache
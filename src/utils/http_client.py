@@ -0,0 +1,173 @@
+"""
+This module contains the process-wide HTTP client used by the requests-based scrapers.
+
+Every host gets its own pooled ``requests.Session`` so the TCP/TLS connections are
+reused between products, with timeouts, compression and bounded retries with backoff
+on 429/5xx responses. The DNS, connect, TLS, TTFB and download times of every request
+are recorded as stages of the row being scraped.
+
+Functions:
+- get_session: Returns the pooled session for the host of a URL.
+- get: Sends a GET request through the pooled session of its host.
+"""
+
+import socket
+import threading
+import time
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from urllib3.util.connection import allowed_gai_family
+from urllib3.util.retry import Retry
+
+from . import instrumentation
+from .config import load_config
+
+# urllib3 solo descomprime brotli si el paquete está instalado
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    ACCEPT_ENCODING = 'gzip, deflate'
+
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+_settings = None
+_sessions = {}
+_lock = threading.Lock()
+
+def _get_settings():
+    global _settings
+    if _settings is None:
+        _settings = load_config()['http']
+    return _settings
+
+class _TimedConnectionMixin:
+    # Separa la resolución DNS de la conexión TCP para medir ambas etapas
+    def _new_conn(self):
+        host = self._dns_host
+        start = time.perf_counter()
+        try:
+            infos = socket.getaddrinfo(host, self.port, allowed_gai_family(), socket.SOCK_STREAM)
+        except OSError:
+            infos = []
+        if not infos:
+            # urllib3 se encarga de reportar el error de resolución
+            return super()._new_conn()
+        resolved = time.perf_counter()
+        instrumentation.record('dns', resolved - start)
+
+        # Probar cada dirección en orden, como urllib3.util.connection.create_connection,
+        # y medir solo el intento que conecta
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        error = None
+        for address in addresses:
+            attempt = time.perf_counter()
+            self._dns_host = address
+            try:
+                sock = super()._new_conn()
+            except (NewConnectionError, ConnectTimeoutError) as e:
+                error = e
+                continue
+            finally:
+                self._dns_host = host
+            connected = time.perf_counter()
+            self._connect_time = connected - start
+            instrumentation.record('connect', connected - attempt)
+            return sock
+        raise error
+
+class _TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+class _TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    def connect(self):
+        start = time.perf_counter()
+        self._connect_time = 0.0
+        super().connect()
+        instrumentation.record('tls', time.perf_counter() - start - self._connect_time)
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+class _TimedAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {'http': _TimedHTTPConnectionPool,
+                                                   'https': _TimedHTTPSConnectionPool}
+
+def _new_session(settings):
+    retry = Retry(
+        total=settings['retries'],
+        backoff_factor=settings['backoff_factor'],
+        status_forcelist=RETRY_STATUS,
+        allowed_methods=['GET', 'HEAD'],
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = _TimedAdapter(pool_connections=1, pool_maxsize=settings['pool_maxsize'], max_retries=retry)
+
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update({'Accept-Encoding': ACCEPT_ENCODING})
+    return session
+
+def get_session(url):
+    """
+    Returns the pooled session for the host of a URL, creating it on first use.
+
+    Parameters
+    ----------
+    url : str
+        Any URL of the host.
+
+    Returns
+    -------
+    requests.Session
+        The session shared by every request to that host.
+    """
+    host = urlparse(url).netloc
+    with _lock:
+        if host not in _sessions:
+            _sessions[host] = _new_session(_get_settings())
+        return _sessions[host]
+
+def get(url, **kwargs):
+    """
+    Sends a GET request through the pooled session of its host.
+
+    The connect and read timeouts from the 'http' section of the configuration are
+    used unless a ``timeout`` is given.
+
+    Parameters
+    ----------
+    url : str
+        The URL to request.
+    **kwargs
+        Extra arguments passed to ``requests.Session.get``.
+
+    Returns
+    -------
+    requests.Response
+        The response of the last attempt.
+    """
+    settings = _get_settings()
+    kwargs.setdefault('timeout', (settings['connect_timeout'], settings['read_timeout']))
+    connection = instrumentation.stage_total('dns', 'connect', 'tls')
+    start = time.perf_counter()
+    response = get_session(url).get(url, **kwargs)
+    total = time.perf_counter() - start
+
+    # elapsed llega hasta los encabezados e incluye abrir la conexión, si hizo falta
+    elapsed = response.elapsed.total_seconds()
+    connection = instrumentation.stage_total('dns', 'connect', 'tls') - connection
+    instrumentation.record('ttfb', max(0.0, elapsed - connection))
+    instrumentation.record('download', max(0.0, total - elapsed))
+    return response
@@ -0,0 +1,230 @@
+"""
+This module contains the per-row timing instrumentation and the run report.
+
+While a row is scraped, the HTTP client, the decorators and the driver pool record the
+time spent in each stage (DNS, connect, TLS, TTFB and download for HTTP requests; driver
+checkout, page load and readiness wait for Selenium; parse and validation). When the row
+finishes, its stages are added to the run report, which aggregates them per pharmacy into
+p50/p95/p99 and is written as JSON at the end of the run, and to the Prometheus metrics.
+
+Classes:
+- RunReport: Stage timings of every row of a run, aggregated per pharmacy.
+
+Functions:
+- start_row: Starts recording the stages of the row scraped by the current thread.
+- current_pharmacy: Returns the pharmacy of the row scraped by the current thread.
+- finish_row: Stops recording the current row and adds it to the run report.
+- last_row: Returns the stages of the last row finished by the current thread.
+- stop_row: Stops recording the current row without reporting it.
+- record: Adds time to a stage of the current row.
+- stage_total: Returns the time recorded so far in some stages of the current row.
+- timed: Context manager that records the time spent in its block as a stage.
+- get_report: Returns the process-wide run report.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+
+from . import metrics, sharding
+
+# Orden de las etapas en el informe
+STAGES = ('dns', 'connect', 'tls', 'ttfb', 'download', 'driver_checkout', 'page_load', 'wait',
+          'browser', 'parse', 'validate', 'total')
+PERCENTILES = (50, 95, 99)
+
+_current = threading.local()
+
+def start_row(pharmacy=None, started=None):
+    """
+    Starts recording the stages of the row scraped by the current thread.
+
+    ``started`` is the ``time.perf_counter()`` at which the row started, for rows whose
+    page was fetched elsewhere (e.g. in the event loop of ``async_http``); now if not given.
+    """
+    _current.stages = {}
+    _current.pharmacy = pharmacy
+    _current.start = time.perf_counter() if started is None else started
+
+def current_pharmacy():
+    """
+    Returns the pharmacy of the row scraped by the current thread (None outside a row).
+    """
+    return getattr(_current, 'pharmacy', None)
+
+def finish_row(pharmacy, error=None):
+    """
+    Stops recording the current row and adds it to the run report.
+
+    Parameters
+    ----------
+    pharmacy : str
+        The pharmacy of the row.
+    error : Exception, optional
+        The error raised while scraping the row, if any.
+
+    Returns
+    -------
+    dict
+        The seconds spent in each stage of the row, 'total' included.
+    """
+    stages = getattr(_current, 'stages', None) or {}
+    stages['total'] = time.perf_counter() - getattr(_current, 'start', time.perf_counter())
+    _current.stages = None
+    _current.pharmacy = None
+    _current.finished = stages
+    get_report().add_row(pharmacy, stages, error)
+    metrics.observe_row(pharmacy, stages, error)
+    return stages
+
+def last_row():
+    """
+    Returns the stages of the last row finished by the current thread (empty if none).
+    """
+    return getattr(_current, 'finished', None) or {}
+
+def stop_row():
+    """
+    Stops recording the current row without adding it to the run report (e.g. in a parser
+    process, which sends its stages back to the process that scrapes the row).
+
+    Returns
+    -------
+    dict
+        The seconds spent in each stage recorded so far.
+    """
+    stages = getattr(_current, 'stages', None) or {}
+    _current.stages = None
+    _current.pharmacy = None
+    return stages
+
+def record(stage, seconds):
+    """
+    Adds time to a stage of the current row (ignored if no row is being recorded).
+    """
+    stages = getattr(_current, 'stages', None)
+    if stages is not None:
+        stages[stage] = stages.get(stage, 0.0) + seconds
+
+def stage_total(*names):
+    """
+    Returns the time recorded so far in the given stages of the current row.
+    """
+    stages = getattr(_current, 'stages', None) or {}
+    return sum(stages.get(name, 0.0) for name in names)
+
+@contextmanager
+def timed(stage):
+    """
+    Context manager that records the time spent in its block as a stage of the current row.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - start)
+
+
+class RunReport:
+    """
+    Stage timings of every row of a run, aggregated per pharmacy.
+    """
+
+    def __init__(self):
+        self.started_at = datetime.now()
+        self._rows = {}
+        self._errors = {}
+        self._lock = threading.Lock()
+
+    def add_row(self, pharmacy, stages, error=None):
+        """
+        Adds the stage timings of a scraped row.
+        """
+        with self._lock:
+            self._rows.setdefault(pharmacy, []).append(stages)
+            if error is not None:
+                errors = self._errors.setdefault(pharmacy, {})
+                name = type(error).__name__
+                errors[name] = errors.get(name, 0) + 1
+
+    def summary(self):
+        """
+        Aggregates the stage timings per pharmacy.
+
+        Returns
+        -------
+        dict
+            ``{pharmacy: {'rows': int, 'errors': {type: count}, 'stages': {stage: {'p50': s, 'p95': s, 'p99': s, 'mean': s}}}}``,
+            with the times in seconds. A stage is only aggregated over the rows that went through it.
+        """
+        with self._lock:
+            rows = {pharmacy: list(stages) for pharmacy, stages in self._rows.items()}
+            errors = {pharmacy: dict(counts) for pharmacy, counts in self._errors.items()}
+
+        summary = {}
+        for pharmacy in sorted(rows):
+            stages = {}
+            for stage in STAGES:
+                values = [row[stage] for row in rows[pharmacy] if stage in row]
+                if not values:
+                    continue
+                p50, p95, p99 = np.percentile(values, PERCENTILES)
+                stages[stage] = {'p50': p50, 'p95': p95, 'p99': p99, 'mean': float(np.mean(values))}
+            summary[pharmacy] = {'rows': len(rows[pharmacy]), 'errors': errors.get(pharmacy, {}), 'stages': stages}
+        return summary
+
+    def write(self, directory):
+        """
+        Writes the report as JSON to ``<directory>/run-<start time>.json`` (with the shard
+        in the name in a sharded run).
+
+        Returns
+        -------
+        str
+            The path of the report.
+        """
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, sharding.suffix(f"run-{self.started_at.strftime('%Y%m%d-%H%M%S')}.json"))
+        report = {
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'finished_at': datetime.now().isoformat(timespec='seconds'),
+            'pharmacies': self.summary(),
+        }
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+        return path
+
+    def print_summary(self):
+        """
+        Prints the p50/p95 of the total time per pharmacy and the slowest stage at p95.
+        """
+        summary = self.summary()
+        if not summary:
+            return
+        print(f"{'Farmacia':<25}{'filas':>6}{'errores':>8}{'p50 s':>8}{'p95 s':>8}{'p99 s':>8}  etapa más lenta (p95)")
+        for pharmacy, stats in sorted(summary.items(), key=lambda item: -item[1]['stages']['total']['p95']):
+            total = stats['stages']['total']
+            stages = {stage: values for stage, values in stats['stages'].items() if stage != 'total'}
+            slowest = max(stages, key=lambda stage: stages[stage]['p95']) if stages else '-'
+            slowest_text = f"{slowest} {stages[slowest]['p95']:.2f}s" if stages else '-'
+            print(f"{pharmacy:<25}{stats['rows']:>6}{sum(stats['errors'].values()):>8}"
+                  f"{total['p50']:>8.2f}{total['p95']:>8.2f}{total['p99']:>8.2f}  {slowest_text}")
+
+
+_report = None
+_report_lock = threading.Lock()
+
+def get_report():
+    """
+    Returns the process-wide run report.
+    """
+    global _report
+    with _report_lock:
+        if _report is None:
+            _report = RunReport()
+    return _report
@@ -0,0 +1,259 @@
+"""
+This module contains the message queues of the producer/worker/loader mode.
+
+The producer publishes a scrape job per row of the input CSV, the workers take the jobs,
+scrape them and publish the records, and the loader drains the records into the sinks.
+Messages are JSON objects and are delivered at least once: a message taken but not
+acknowledged (e.g. by a worker that died) is delivered again.
+
+Classes:
+- JobQueue: Interface of the queue backends.
+- SqliteQueue: Queue in a local SQLite database, shared by the processes of a host.
+- KafkaQueue: Queue on Kafka topics.
+
+Functions:
+- make_queue: Builds the queue backend of the 'queue' section of the configuration.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+class JobQueue:
+    """
+    Interface of the queue backends.
+    """
+
+    def put(self, topic, message, delay=0):
+        """
+        Publishes a message (a JSON-serializable dict) to a topic, to be delivered after ``delay`` seconds.
+        """
+        raise NotImplementedError
+
+    def put_many(self, topic, messages):
+        """
+        Publishes several messages to a topic.
+        """
+        for message in messages:
+            self.put(topic, message)
+
+    def get(self, topic, timeout):
+        """
+        Takes the next message of a topic, waiting up to ``timeout`` seconds.
+
+        Returns
+        -------
+        tuple or None
+            ``(handle, message)``, where the handle is passed to ``ack``, or None if no
+            message arrived in time.
+        """
+        raise NotImplementedError
+
+    def ack(self, topic, handle):
+        """
+        Acknowledges a message taken with ``get``, so it is not delivered again.
+
+        The messages published before the call are flushed first, so a record published
+        by a worker is never lost once its job is acknowledged.
+        """
+        raise NotImplementedError
+
+    def ack_many(self, topic, handles):
+        """
+        Acknowledges several messages taken with ``get``.
+        """
+        for handle in handles:
+            self.ack(topic, handle)
+
+    def close(self):
+        """
+        Releases the resources of the queue.
+        """
+
+
+class SqliteQueue(JobQueue):
+    """
+    Queue in a local SQLite database, shared by the processes of a host.
+
+    Parameters
+    ----------
+    path : str
+        Path of the SQLite database.
+    lease : float
+        Seconds a message taken by ``get`` stays invisible; if it is not acknowledged by
+        then it is delivered again.
+    """
+
+    POLL_INTERVAL = 0.5
+
+    def __init__(self, path, lease):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.lease = lease
+        self._lock = threading.Lock()
+        # Transacciones explícitas para tomar un mensaje de forma atómica entre procesos
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                topic TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                available_at REAL NOT NULL
+            )""")
+        self._db.execute('CREATE INDEX IF NOT EXISTS messages_topic ON messages (topic, available_at)')
+
+    def put(self, topic, message, delay=0):
+        with self._lock:
+            self._db.execute('INSERT INTO messages (topic, payload, available_at) VALUES (?, ?, ?)',
+                             (topic, json.dumps(message, ensure_ascii=False, default=str), time.time() + delay))
+
+    def put_many(self, topic, messages):
+        # Una sola transacción para todo el lote
+        now = time.time()
+        # La conexión confirma la transacción al salir del bloque, o la deshace si hay un error
+        with self._lock, self._db:
+            self._db.execute('BEGIN')
+            self._db.executemany('INSERT INTO messages (topic, payload, available_at) VALUES (?, ?, ?)',
+                                 [(topic, json.dumps(message, ensure_ascii=False, default=str), now)
+                                  for message in messages])
+
+    def get(self, topic, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock, self._db:
+                now = time.time()
+                self._db.execute('BEGIN IMMEDIATE')
+                row = self._db.execute(
+                    'SELECT id, payload FROM messages WHERE topic = ? AND available_at <= ? ORDER BY available_at, id LIMIT 1',
+                    (topic, now)).fetchone()
+                if row is not None:
+                    # El mensaje queda oculto hasta que se confirme o venza el plazo
+                    self._db.execute('UPDATE messages SET available_at = ? WHERE id = ?', (now + self.lease, row[0]))
+            if row is not None:
+                return row[0], json.loads(row[1])
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(min(self.POLL_INTERVAL, max(0, deadline - time.monotonic())))
+
+    def ack(self, topic, handle):
+        with self._lock:
+            self._db.execute('DELETE FROM messages WHERE id = ?', (handle,))
+
+    def ack_many(self, topic, handles):
+        with self._lock, self._db:
+            self._db.execute('BEGIN')
+            self._db.executemany('DELETE FROM messages WHERE id = ?', [(handle,) for handle in handles])
+
+    def close(self):
+        self._db.close()
+
+
+class KafkaQueue(JobQueue):
+    """
+    Queue on Kafka topics, with a consumer group per topic.
+
+    The delay of ``put`` is carried in an ``available_at`` header and honored by ``get``:
+    a message that is not due yet is left in place and its partition is paused until then,
+    so ``get`` returns None instead of blocking the worker. Offsets are committed by
+    ``ack``, so a worker must acknowledge its messages in the order it took them.
+
+    Parameters
+    ----------
+    bootstrap_servers : str or list of str
+        The Kafka brokers.
+    group_id : str
+        Prefix of the consumer groups (one per topic).
+    """
+
+    def __init__(self, bootstrap_servers, group_id):
+        # kafka-python solo es necesario si se usa este backend
+        import kafka
+        self._kafka = kafka
+        self.bootstrap_servers = bootstrap_servers
+        self.group_id = group_id
+        self._producer = kafka.KafkaProducer(
+            bootstrap_servers=bootstrap_servers,
+            value_serializer=lambda message: json.dumps(message, ensure_ascii=False, default=str).encode('utf-8'))
+        self._consumers = {}
+        # Particiones pausadas por tópico, con el momento en que vence su siguiente mensaje
+        self._paused = {}
+
+    def _consumer(self, topic):
+        if topic not in self._consumers:
+            self._consumers[topic] = self._kafka.KafkaConsumer(
+                topic, bootstrap_servers=self.bootstrap_servers, group_id=f'{self.group_id}.{topic}',
+                enable_auto_commit=False, auto_offset_reset='earliest',
+                value_deserializer=lambda value: json.loads(value.decode('utf-8')))
+        return self._consumers[topic]
+
+    def put(self, topic, message, delay=0):
+        headers = [('available_at', str(time.time() + delay).encode())] if delay else []
+        self._producer.send(topic, value=message, headers=headers)
+
+    def put_many(self, topic, messages):
+        super().put_many(topic, messages)
+        self._producer.flush()
+
+    def get(self, topic, timeout):
+        consumer = self._consumer(topic)
+        paused = self._paused.setdefault(topic, {})
+        due = [partition for partition, available_at in paused.items() if available_at <= time.time()]
+        if due:
+            consumer.resume(*due)
+            for partition in due:
+                del paused[partition]
+
+        records = consumer.poll(timeout_ms=int(timeout * 1000), max_records=1)
+        for batch in records.values():
+            for record in batch:
+                # Kafka no tiene mensajes diferidos: si el mensaje aún no vence, volver a su
+                # offset y pausar la partición hasta entonces
+                available_at = dict(record.headers or []).get('available_at')
+                if available_at is not None and float(available_at) > time.time():
+                    partition = self._kafka.TopicPartition(record.topic, record.partition)
+                    consumer.seek(partition, record.offset)
+                    consumer.pause(partition)
+                    paused[partition] = float(available_at)
+                    return None
+                return record, record.value
+        return None
+
+    def ack(self, topic, handle):
+        self._producer.flush()
+        # Confirma todo lo consumido hasta este mensaje
+        self._consumer(topic).commit()
+
+    def ack_many(self, topic, handles):
+        if handles:
+            self.ack(topic, handles[-1])
+
+    def close(self):
+        self._producer.close()
+        for consumer in self._consumers.values():
+            consumer.close()
+
+
+def make_queue(settings):
+    """
+    Builds the queue backend of the 'queue' section of the configuration.
+
+    Parameters
+    ----------
+    settings : dict
+        The 'queue' section of the configuration.
+
+    Returns
+    -------
+    JobQueue
+        A ``SqliteQueue`` ('sqlite') or a ``KafkaQueue`` ('kafka').
+    """
+    match settings.get('backend', 'sqlite'):
+        case 'sqlite':
+            return SqliteQueue(os.path.abspath(settings['path']), settings.get('lease', 300))
+        case 'kafka':
+            return KafkaQueue(settings['bootstrap_servers'], settings['group_id'])
+        case backend:
+            raise ValueError(f"Backend de cola no reconocido: {backend}")
@@ -0,0 +1,127 @@
+"""
+This module contains the Prometheus metrics of the scraper runs.
+
+The metrics live in their own registry and are updated by the fetch decorators, the
+driver pool, the row instrumentation, the retry scheduler and the sinks, labeled by
+pharmacy. They can be served on a local ``/metrics`` endpoint while the run goes on
+(``metrics.port``) and/or written at the end of the run as a node-exporter textfile
+(``metrics.textfile``).
+
+Functions:
+- observe_row: Records the outcome and the stage timings of a scraped row.
+- start: Starts the /metrics endpoint if a port is configured.
+- finish: Writes the textfile if a path is configured.
+"""
+
+import os
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, start_http_server, write_to_textfile
+from prometheus_client.metrics_core import Metric
+
+from . import sharding
+
+REGISTRY = CollectorRegistry()
+
+REQUESTS = Counter('scraper_requests', 'Pages requested by the scrapers.',
+                   ['pharmacy', 'fetch_mode'], registry=REGISTRY)
+ROWS = Counter('scraper_rows', 'Rows scraped, by outcome.',
+               ['pharmacy', 'outcome'], registry=REGISTRY)
+FAILURES = Counter('scraper_failures', 'Rows that failed, by exception type.',
+                   ['pharmacy', 'exception'], registry=REGISTRY)
+RETRIES = Counter('scraper_retries', 'Rows scheduled for a retry.',
+                  ['pharmacy'], registry=REGISTRY)
+CACHE = Counter('scraper_http_cache', 'HTTP cache lookups (hit: 304 served from the cache).',
+                ['pharmacy', 'result'], registry=REGISTRY)
+DRIVERS_IN_USE = Gauge('scraper_driver_pool_in_use', 'Drivers checked out of the pool.', registry=REGISTRY)
+DRIVERS_CREATED = Gauge('scraper_driver_pool_created', 'Drivers started by the pool.', registry=REGISTRY)
+DRIVER_POOL_SIZE = Gauge('scraper_driver_pool_size', 'Maximum number of drivers of the pool.', registry=REGISTRY)
+ROWS_LOADED = Counter('scraper_rows_loaded', 'Rows written to a sink.', ['sink'], registry=REGISTRY)
+STAGE_SECONDS = Histogram('scraper_stage_seconds', 'Time spent in each stage of a row.',
+                          ['pharmacy', 'stage'], registry=REGISTRY,
+                          buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60))
+
+def observe_row(pharmacy, stages, error=None):
+    """
+    Records the outcome and the stage timings of a scraped row.
+
+    Parameters
+    ----------
+    pharmacy : str
+        The pharmacy of the row.
+    stages : dict
+        The seconds spent in each stage.
+    error : Exception, optional
+        The error raised while scraping the row, if any.
+    """
+    ROWS.labels(pharmacy, 'error' if error is not None else 'ok').inc()
+    if error is not None:
+        FAILURES.labels(pharmacy, type(error).__name__).inc()
+    for stage, seconds in stages.items():
+        STAGE_SECONDS.labels(pharmacy, stage).observe(seconds)
+
+class _ProcessLabels:
+    """
+    View of the scraper registry whose samples carry the labels of the process (shard and
+    role), so the textfiles of several processes of a run do not export the same series.
+    """
+
+    def __init__(self, registry, labels):
+        self._registry = registry
+        self._labels = labels
+
+    def collect(self):
+        for metric in self._registry.collect():
+            labeled = Metric(metric.name, metric.documentation, metric.type, metric.unit)
+            labeled.samples = [sample._replace(labels={**sample.labels, **self._labels}) for sample in metric.samples]
+            yield labeled
+
+_server_started = False
+_role = None
+
+def _process_labels():
+    # Etiquetas que distinguen las series de cada proceso de una ejecución
+    labels = {}
+    shard = sharding.current_shard()
+    if shard:
+        labels['shard'] = f'{shard[0]}/{shard[1]}'
+    if _role:
+        labels['role'] = _role
+        if _role == 'worker':
+            # Puede haber varios workers en el mismo host
+            labels['pid'] = str(os.getpid())
+    return labels
+
+def start(settings, role=None):
+    """
+    Starts the /metrics endpoint on ``settings['port']`` (if set), serving the scraper registry.
+
+    The endpoint is started once per process, even if several runs are made. In a sharded
+    run, shard ``i`` serves on ``port + 1 + i``. ``role`` is the role of the process in the
+    queue mode ('producer', 'worker' or 'loader'), added to the textfile by ``finish``.
+    """
+    global _server_started, _role
+    _role = role
+    if settings.get('port') and not _server_started:
+        shard = sharding.current_shard()
+        port = settings['port'] + 1 + shard[0] if shard else settings['port']
+        start_http_server(port, addr=settings.get('address', '127.0.0.1'), registry=REGISTRY)
+        _server_started = True
+
+def finish(settings):
+    """
+    Writes the metrics to ``settings['textfile']`` (if set) for the node-exporter textfile collector.
+
+    In a sharded run or in the queue mode, the shard and the role of the process are added
+    to the name of the file and as labels of every series (node-exporter rejects the same
+    series exported by several textfiles).
+    """
+    if settings.get('textfile'):
+        labels = _process_labels()
+        path = sharding.suffix(settings['textfile'])
+        if _role:
+            root, extension = os.path.splitext(path)
+            path = f"{root}.{_role}{'-' + labels['pid'] if 'pid' in labels else ''}{extension}"
+        path = os.path.abspath(path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # write_to_textfile escribe un archivo temporal y lo renombra (escritura atómica)
+        write_to_textfile(path, _ProcessLabels(REGISTRY, labels) if labels else REGISTRY)
@@ -0,0 +1,111 @@
+"""
+This module contains the pool of parser workers of the asynchronous path.
+
+Building the BeautifulSoup tree and the ``find``/``find_all`` lookups of the scrapers are
+CPU-bound Python code that holds the GIL, so parsing in threads does not scale with the
+cores. With ``async_http.parse_pool: 'process'`` the raw page is sent to a pool of parser
+processes, which look up the scraper by name in the registry, run its ``parse`` and
+validation, and send back only the extracted record and the parse timings.
+
+Functions:
+- make_pool: Builds a pool of parser workers.
+- get_pool: Returns the process-wide pool of parser workers.
+- discard_pool: Drops a broken pool so that the next ``get_pool`` builds a new one.
+- parse_page: Runs a scraper on a downloaded page (in a parser worker).
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from . import instrumentation, registry
+from .config import load_config
+
+def _init_worker():
+    # Los procesos del pool registran los scrapers al arrancar
+    import src.utils.pharmacy  # noqa: F401
+    registry.load_entry_points()
+
+def make_pool(settings):
+    """
+    Builds a pool of parser workers.
+
+    Parameters
+    ----------
+    settings : dict
+        The 'async_http' section of the configuration: ``parse_pool`` ('process' or
+        'thread') and ``parse_workers`` (the number of cores if not set).
+
+    Returns
+    -------
+    concurrent.futures.Executor
+        A ``ProcessPoolExecutor`` or a ``ThreadPoolExecutor``.
+    """
+    workers = settings.get('parse_workers') or os.cpu_count() or 1
+    match settings.get('parse_pool', 'thread'):
+        case 'process':
+            # 'spawn': el proceso principal tiene hilos (event loop, drivers) que no se deben copiar con fork
+            return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                       initializer=_init_worker)
+        case 'thread':
+            return ThreadPoolExecutor(max_workers=workers)
+        case pool:
+            raise ValueError(f"Pool de parseo no reconocido: {pool}")
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """
+    Returns the process-wide pool of parser workers built from the 'async_http' section of
+    the configuration, started on first use and reused by every pass of the run (the
+    workers only import the scrapers once).
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = make_pool(load_config().get('async_http', {}))
+    return _pool
+
+def discard_pool(pool):
+    """
+    Drops a pool whose worker process died (``BrokenProcessPool``), so that the next
+    ``get_pool`` builds a new one. Does nothing if the pool was already replaced.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not pool:
+            return
+        _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def parse_page(name, url, content, data):
+    """
+    Runs a scraper on a downloaded page and validates the record (in a parser worker).
+
+    Parameters
+    ----------
+    name : str
+        The name of the registered scraper.
+    url : str
+        The URL of the product.
+    content : bytes
+        The raw page.
+    data : dict
+        The record of the row.
+
+    Returns
+    -------
+    tuple
+        ``(result, stages)``: the fields extracted by the scraper and the seconds spent in
+        the 'parse' and 'validate' stages.
+    """
+    spec = registry.get_spec(name)
+    instrumentation.start_row()
+    try:
+        # parse incluye la validación de @validate_data (la etapa 'validate' se registra una vez)
+        result = spec.scraper.parse(url, content, data)
+    finally:
+        stages = instrumentation.stop_row()
+    return result, stages
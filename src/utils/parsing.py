@@ -0,0 +1,33 @@
+"""
+This module contains the HTML parser backend shared by the scrapers.
+
+Functions:
+- make_soup: Builds a BeautifulSoup object with the parser selected in the configuration.
+"""
+
+from bs4 import BeautifulSoup
+
+from .config import load_config
+
+# 'lxml' (por defecto) o 'html.parser'
+PARSER = load_config().get('parsing', {}).get('parser', 'lxml')
+
+def make_soup(content, parse_only=None, parser=None):
+    """
+    Builds a BeautifulSoup object with the parser selected in the configuration.
+
+    Parameters
+    ----------
+    content : bytes or str
+        The HTML to parse.
+    parse_only : SoupStrainer, optional
+        Restricts the tree to the tags matched by the strainer (and their children).
+    parser : str, optional
+        Overrides the parser of the configuration.
+
+    Returns
+    -------
+    BeautifulSoup
+        The parsed document.
+    """
+    return BeautifulSoup(content, parser or PARSER, parse_only=parse_only)
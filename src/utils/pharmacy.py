@@ -1,6 +1,9 @@
 """
 This module contains functions to scrape medication data from various pharmacy websites.
 
+Every scraper registers the hostnames it handles and its per-pharmacy settings with
+``@register`` (see registry.py); ``extract_data`` dispatches each URL through the registry.
+
 Functions:
 - farmex: Scrapes medication data from the Farmex website.
 - salcobrand: Scrapes medication data from the Salcobrand website.
@@ -19,26 +22,46 @@ Functions:
 """
 
 import re
-import json
-import time
-from bs4 import BeautifulSoup
+import unicodedata
+from bs4 import SoupStrainer
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.common.exceptions import WebDriverException
-from selenium.webdriver.support import expected_conditions as EC
-
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium import webdriver
 
-from .decorators import validate_data, handle_http_request, initialize_driver
+from .decorators import validate_data, handle_http_request, handle_json_request, handle_vtex_request, initialize_driver, render_page
+from . import structured_data
+from .registry import register
+from .driver_pool import get_driver_pool
+from .parsing import make_soup
+from .readiness import wait_until_ready
+
+# Condiciones para considerar lista la página en los scrapers con Selenium (ver readiness.py)
+READY = {
+    'elquimico': {'css': 'span.money-subtotal', 'timeout': 10},
+    'cruzverde': {'css': 'app-root h1', 'timeout': 15},
+    'farmaciajvf': {'css': 'h1.ph-product-detail-quote-title-info-main-title', 'timeout': 20},
+    'anticonceptivo_cl': {'css': 'h1.font-poppins.font-27', 'timeout': 10},
+    'farmaloop': {'css': '#__next h1', 'timeout': 10},
+}
+
+# Etiquetas que lee cada scraper: solo se construye esa parte del documento (ver parsing.py)
+STRAINERS = {
+    'ahumada': SoupStrainer(['th', 'td', 'h1', 'span', 'button']),
+    'ecofarmacias': SoupStrainer(['bdi', 'p', 'button', 'span', 'li', 'h1']),
+    'mercadofarma': SoupStrainer(['h1', 'a', 'span']),
+    'profar': SoupStrainer(['td', 'title', 'meta', 'button']),
+    'knoplab': SoupStrainer(['span', 'p']),
+    'cruzverde': SoupStrainer(['span', 'h1', 'button']),
+    'farmaloop': SoupStrainer('div', id='__next'),
+}
+
+# Párrafos con la fecha de despacho en Meki (solo se muestran si hay stock)
+MEKI_DELIVERY = re.compile(r'<p[^>]*class="MuiTypography-root MuiTypography-body1 mui-style-m99pms"[^>]*>(.*?)</p>', re.S)
 
 # Grupo de funciones según la farmacia a ser escaneada
 
-@handle_http_request
+@register('farmex.cl')
+@handle_http_request(raw=True)
 @validate_data(['price', 'lab_name', 'is_available', 'sku', 'web_name'])
-def farmex(url, soup, data) -> dict:
+def farmex(url, soup, content, data) -> dict:
     """
     Scrapes medication data from the Farmex website.
 
@@ -48,6 +71,8 @@ def farmex(url, soup, data) -> dict:
         The URL of the Farmex product page.
     soup : BeautifulSoup object
         The BeautifulSoup object containing the HTML content of the page.
+    content : bytes
+        The raw HTML of the page.
     data : dict
         A dictionary to store the scraped data.
 
@@ -68,8 +93,7 @@ def farmex(url, soup, data) -> dict:
     is_available = int(stock_text.split(': ')[1]) > 0
     
     # Extract JSON-LD script
-    json_ld_script = soup.find('script', type='application/ld+json').string
-    json_data = json.loads(json_ld_script)
+    json_data = structured_data.json_ld(content)[0]
 
     # Extract SKU and lab_name
     sku = json_data.get('sku', None)
@@ -85,9 +109,10 @@ def farmex(url, soup, data) -> dict:
 
     return data
 
-@handle_http_request
+@register('salcobrand.cl', concurrency=4)
+@handle_http_request(raw=True)
 @validate_data(['price', 'bioequivalent','is_available','web_name'])
-def salcobrand(url,soup, data) -> dict:
+def salcobrand(url,soup, content, data) -> dict:
     """
     Scrapes medication data from the Salcobrand website.
 
@@ -97,6 +122,8 @@ def salcobrand(url,soup, data) -> dict:
         The URL of the Salcobrand product page.
     soup : BeautifulSoup object
         The BeautifulSoup object containing the HTML content of the page.
+    content : bytes
+        The raw HTML of the page.
     data : dict
         A dictionary to store the scraped data.
 
@@ -105,18 +132,11 @@ def salcobrand(url,soup, data) -> dict:
     dict
         The updated dictionary with the scraped data.
     """
-    # Buscar el script que contiene 'product_traker_data'
-    script_tag = soup.find('script', string=re.compile(r'var product_traker_data ='))
-    if not script_tag:
+    # Extraer el JSON asignado a 'product_traker_data' directamente del HTML
+    product_data = structured_data.js_object(content, 'product_traker_data')
+    if not product_data:
         return {}
 
-    # Extraer el contenido del script
-    script_content = script_tag.string
-
-    # Extraer el JSON del script
-    json_data = re.search(r'var product_traker_data = ({.*});', script_content).group(1) # type: ignore
-    product_data = json.loads(json_data)
-
     # Extraer la información requerida
     name = product_data['name']
     is_available = product_data['isAvailable']
@@ -154,9 +174,10 @@ def salcobrand(url,soup, data) -> dict:
 
     return data
 
-@handle_http_request
+@register('buhochile.com')
+@handle_json_request('__NEXT_DATA__')
 @validate_data(['price', 'lab_name', 'bioequivalent', 'is_available', 'active_principle', 'web_name'])
-def buhochile(url,soup,data) -> dict:
+def buhochile(url, json_data, html, data) -> dict:
     """
     Scrapes medication data from the El Buho website.
 
@@ -164,8 +185,10 @@ def buhochile(url,soup,data) -> dict:
     ----------
     url : str
         The URL of the El Buho product page.
-    soup : BeautifulSoup object
-        The BeautifulSoup object containing the HTML content of the page.
+    json_data : dict
+        The content of the ``__NEXT_DATA__`` script of the page.
+    html : str
+        The HTML content of the page.
     data : dict
         A dictionary to store the scraped data.
 
@@ -174,38 +197,18 @@ def buhochile(url,soup,data) -> dict:
     dict
         The updated dictionary with the scraped data.
     """
-    # Encontrar el script que contiene los datos JSON
-    script = soup.find('script', {'id': '__NEXT_DATA__'})
-    json_data = json.loads(script.string) # type: ignore
-
     # Extraer los valores requeridos
     product = json_data['props']['pageProps']['product']
-    name = f'{product['name']} {product['tablets']} {product['pharmaceuticForm']}'
+    name = f"{product['name']} {product['tablets']} {product['pharmaceuticForm']}"
     active_principle = product['activePrinciple']
-    price = f'${product['minPrice']}' if product['minPrice'] != 0 else None
+    price = f"${product['minPrice']}" if product['minPrice'] != 0 else None
     bioequivalent = product['bioequivalent']
     lab_name = product['laboratory']['name']
 
-    # Extraer la disponibilidad del producto
-    # Abre la página web
-    # Configura Selenium
-    chrome_options = Options()
-    chrome_options.add_argument("--headless")  # Ejecuta el navegador en modo headless
-    chrome_options.add_argument("--incognito")
-
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
-    driver.get(url)
-
-    # Espera a que la página cargue completamente
-    time.sleep(5)  # Ajusta el tiempo según sea necesario
-
-    # Obtén el contenido de la página
-    page_source = driver.page_source
-
-    # Analiza el HTML con BeautifulSoup
-    soup = BeautifulSoup(page_source, 'html.parser')
-    stock = soup.find('strong')
-    is_available = False if stock.text.strip() == 'Sin stock disponible' and price == None else True # type: ignore
+    # Extraer la disponibilidad del producto desde el payload: unidades en 'stock' o el
+    # indicador 'hasStock'; si no vienen, hay stock cuando alguna farmacia lo ofrece (minPrice != 0)
+    stock = product.get('stock', product.get('hasStock'))
+    is_available = bool(stock) if stock is not None else product['minPrice'] != 0
 
     data.update({
         'price': price,
@@ -218,9 +221,9 @@ def buhochile(url,soup,data) -> dict:
 
     return data
 
+@register('farmaciaelquimico.cl')
 @validate_data(['price', 'lab_name', 'is_available', 'active_principle', 'sku', 'web_name'])
-@handle_http_request
-@initialize_driver
+@render_page(READY['elquimico'])
 def elquimico(url, driver, soup, data) -> dict:
     """
     Scrapes medication data from the El Químico website.
@@ -232,7 +235,7 @@ def elquimico(url, driver, soup, data) -> dict:
     driver : WebDriver
         The Selenium WebDriver instance.
     soup : BeautifulSoup object
-        The BeautifulSoup object containing the HTML content of the page.
+        The BeautifulSoup object containing the rendered HTML of the page.
     data : dict
         A dictionary to store the scraped data.
 
@@ -241,13 +244,7 @@ def elquimico(url, driver, soup, data) -> dict:
     dict
         The updated dictionary with the scraped data.
     """
-    try:
-        driver.get(url)
-    except WebDriverException as e:
-        raise Exception(f"Error al cargar la página: {e}")
-
-    wait = WebDriverWait(driver, 10)
-    price_element = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, 'span.money-subtotal')))
+    price_element = driver.find_element(By.CSS_SELECTOR, 'span.money-subtotal')
 
     # Avaiibity - stock 
     stock_elem = soup.find(lambda tag: tag.name == 'span' and tag.get('class') == ['productView-info-value'] and ('En stock' in tag.text or 'Agotado' in tag.text))
@@ -269,8 +266,6 @@ def elquimico(url, driver, soup, data) -> dict:
     # Encontrar el contenedor del vendedor
     vendor_container = soup.find('div', class_='productView-info-item')
     lab_name = vendor_container.find('span', class_='productView-info-value').text.strip() # type: ignore
-    
-    driver.quit()
 
     data.update({
         'price': price,
@@ -283,7 +278,8 @@ def elquimico(url, driver, soup, data) -> dict:
 
     return data
 
-@handle_http_request
+@register('farmaciasahumada.cl', concurrency=4)
+@handle_http_request(parse_only=STRAINERS['ahumada'])
 @validate_data(['price', 'lab_name', 'is_available', 'active_principle', 'web_name'])
 def ahumada(url,soup,data) -> dict:
     """
@@ -328,7 +324,8 @@ def ahumada(url,soup,data) -> dict:
 
     return data
 
-@handle_http_request
+@register('ecofarmacias.cl')
+@handle_http_request(parse_only=STRAINERS['ecofarmacias'])
 @validate_data(['price', 'is_available', 'sku', 'web_name'])
 def ecofarmacias(url,soup,data) -> dict:
     """
@@ -386,9 +383,14 @@ def ecofarmacias(url,soup,data) -> dict:
 
     return data
 
-@handle_http_request
+def _spec_key(name):
+    # Nombre de una especificación de VTEX sin mayúsculas ni tildes
+    return unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode().strip().lower()
+
+@register('drsimi.cl')
+@handle_vtex_request
 @validate_data(['price','bioequivalent','is_available', 'sku', 'web_name'])
-def drsimi(url,soup,data) -> dict:
+def drsimi(url, product, data) -> dict:
     """
     Scrapes medication data from the Dr Simi website.
 
@@ -396,8 +398,8 @@ def drsimi(url,soup,data) -> dict:
     ----------
     url : str
         The URL of the Dr Simi product page.
-    soup : BeautifulSoup object
-        The BeautifulSoup object containing the HTML content of the page.
+    product : dict
+        The product returned by the VTEX catalog API of the store.
     data : dict
         A dictionary to store the scraped data.
 
@@ -406,48 +408,34 @@ def drsimi(url,soup,data) -> dict:
     dict
         The updated dictionary with the scraped data.
     """
-    # Encontrar el contenedor del precio
-    price_container = soup.find('span', class_='vtex-product-price-1-x-currencyContainer')
-
-    # Encontrar el contenedor del precio con rebaja
-    price_container = soup.find('span', class_='vtex-product-price-1-x-sellingPriceValue')
-
-    # Extraer y formatear el precio
-    currency_code = price_container.find('span', class_='vtex-product-price-1-x-currencyCode').text
-    currency_integer = price_container.find_all('span', class_='vtex-product-price-1-x-currencyInteger')
-    currency_group = price_container.find('span', class_='vtex-product-price-1-x-currencyGroup').text
-
-    # Formatear el precio
-    price = f"{currency_code}{currency_integer[0].text}{currency_group}{currency_integer[1].text}"
-
-    # Encontrar el SKU
-    sku_container = soup.find('span', class_='vtex-product-identifier-0-x-product-identifier__value')
-    sku = sku_container.text.strip()
-
-    # Encontrar nombre del producto
-    name_container = soup.find('span', class_='vtex-store-components-3-x-productBrand vtex-store-components-3-x-productBrand--quickview')
-    name = name_container.text.strip()
-
-    # Encontrar el contenedor del texto de bioequivalencia
-    bioequivalent_elem = soup.find('p', class_='farmaciasdeldrsimicl-theme-2-x-bioequivalenteText')
-    if bioequivalent_elem:
-        bioequivalent_text = bioequivalent_elem.text
-        # Verificar si el texto contiene "es bioequivalente"
-        bioequivalent = "es bioequivalente" in bioequivalent_text
-    else: 
-        bioequivalent = False
+    item = product['items'][0]
+    offer = item['sellers'][0]['commertialOffer']
+
+    # Sin stock VTEX deja Price en 0: usar el precio de lista si lo hay, o ninguno
+    amount = offer.get('Price') or offer.get('ListPrice') or offer.get('PriceWithoutDiscount')
+    # Formatear el precio como en la página ($12.990)
+    price = f"${int(amount):,}".replace(',', '.') if amount else None
+
+    # Encontrar el SKU (código de referencia del producto)
+    references = item.get('referenceId') or []
+    sku = references[0]['Value'] if references else item['itemId']
+
+    name = product['productName'].strip()
+
+    # Las especificaciones de VTEX vienen como listas bajo su nombre ('Bioequivalente',
+    # 'Principio Activo'), y sus nombres en 'allSpecifications'
+    specifications = {_spec_key(key): product[key] for key in product.get('allSpecifications', []) if key in product}
+
+    # Verificar si el producto es bioequivalente (los que no lo son no traen la especificación)
+    bioequivalent_values = specifications.get('bioequivalente', [])
+    bioequivalent = any(str(value).strip().lower() in ('si', 'sí', 'true') for value in bioequivalent_values)
 
     # Extraer el principio activo
-    active_principle_elem = soup.find('td', class_='vtex-store-components-3-x-specificationItemSpecifications--principioActivo')
-    if active_principle_elem:
-        active_principle = active_principle_elem.text.strip()
-    else: 
-        active_principle = None
+    active_principle_values = specifications.get('principio activo')
+    active_principle = active_principle_values[0].strip() if active_principle_values else None
 
     # Verificar la disponibilidad del producto
-    add_to_cart_button = soup.find('button', class_='vtex-button bw1 ba fw5 v-mid relative pa0 lh-solid br2 min-h-regular t-action bg-action-primary b--action-primary c-on-action-primary hover-bg-action-primary hover-b--action-primary hover-c-on-action-primary pointer w-100')
-    product_availability = bool(add_to_cart_button)
-    is_available = True if product_availability else False
+    is_available = offer.get('AvailableQuantity', 0) > 0
 
     data.update({
         'price': price,
@@ -460,6 +448,7 @@ def drsimi(url,soup,data) -> dict:
 
     return data
 
+@register('novasalud.cl')
 @handle_http_request
 @validate_data(['price', 'lab_name','is_available', 'active_principle', 'sku', 'web_name'])
 def novasalud(url,soup,data) -> dict:
@@ -509,7 +498,8 @@ def novasalud(url,soup,data) -> dict:
 
     return data
 
-@handle_http_request
+@register('mercadofarma.cl')
+@handle_http_request(parse_only=STRAINERS['mercadofarma'])
 @validate_data(['price', 'lab_name', 'is_available', 'web_name'])
 def mercadofarma(url, soup,data) -> dict:
     """
@@ -550,9 +540,10 @@ def mercadofarma(url, soup,data) -> dict:
 
     return data
 
-@handle_http_request
+@register('farmaciameki.cl')
+@handle_json_request('__NEXT_DATA__')
 @validate_data(['price', 'lab_name', 'bioequivalent','is_available', 'active_principle', 'web_name'])
-def meki(url,soup, data) -> dict:
+def meki(url, json_data, html, data) -> dict:
     """
     Scrapes medication data from the Meki website.
 
@@ -560,8 +551,10 @@ def meki(url,soup, data) -> dict:
     ----------
     url : str
         The URL of the Meki product page.
-    soup : BeautifulSoup object
-        The BeautifulSoup object containing the HTML content of the page.
+    json_data : dict
+        The content of the ``__NEXT_DATA__`` script of the page.
+    html : str
+        The HTML content of the page.
     data : dict
         A dictionary to store the scraped data.
 
@@ -570,10 +563,6 @@ def meki(url,soup, data) -> dict:
     dict
         The updated dictionary with the scraped data.
     """
-    # Encontrar el script con el JSON
-    script_tag = soup.find('script', id='__NEXT_DATA__', type='application/json')
-    json_data = json.loads(script_tag.string)
-    
     # Extraer los datos necesarios
     product_data = json_data['props']['pageProps']['initialProduct']
     
@@ -583,8 +572,8 @@ def meki(url,soup, data) -> dict:
     name = product_data['name']
     price = product_data['price']
     is_available = False
-    for p_tag in soup.find_all('p', class_='MuiTypography-root MuiTypography-body1 mui-style-m99pms'):
-        if 'Recibe' in p_tag.text and 'mañana' in p_tag.text:
+    for p_text in MEKI_DELIVERY.findall(html):
+        if 'Recibe' in p_text and 'mañana' in p_text:
             is_available = True
             break
     
@@ -599,9 +588,9 @@ def meki(url,soup, data) -> dict:
 
     return data
 
+@register('cruzverde.cl', concurrency=2, keep_cookies=True)
 @validate_data(['price', 'lab_name','web_name'])
-@handle_http_request
-@initialize_driver
+@render_page(READY['cruzverde'], STRAINERS['cruzverde'])
 def cruzverde(url, driver, soup, data) -> dict:
     """
     Scrapes medication data from the Cruz Verde website.
@@ -613,7 +602,7 @@ def cruzverde(url, driver, soup, data) -> dict:
     driver : WebDriver
         The Selenium WebDriver instance.
     soup : BeautifulSoup object
-        The BeautifulSoup object containing the HTML content of the page.
+        The BeautifulSoup object containing the rendered HTML of the page.
     data : dict
         A dictionary to store the scraped data.
 
@@ -623,35 +612,25 @@ def cruzverde(url, driver, soup, data) -> dict:
         The updated dictionary with the scraped data.
     """
     try:
-        driver.get(url)
-
-        # Esperar a que el app-root esté presente
-        app_root = WebDriverWait(driver, 15).until(
-            EC.presence_of_element_located((By.TAG_NAME, "app-root"))
-        )
-
-        # Obtener el contenido de <app-root>
-        app_root_content = app_root.get_attribute('innerHTML')
-        soup = BeautifulSoup(app_root_content, 'html.parser') # type: ignore
-
-        # Encontrar y hacer clic en el botón "Aceptar"
-        accept_button = soup.find('button', text='Aceptar')
-        if accept_button:
-            driver.execute_script("arguments[0].click();", driver.find_element(By.XPATH, "//button[contains(text(), 'Aceptar')]"))
-
-        # Recargar la página
-        driver.get(url)
-
-        # Esperar a que el nuevo app-root esté presente
-        app_root = WebDriverWait(driver, 15).until(
-            EC.presence_of_element_located((By.TAG_NAME, "app-root"))
-        )
-
-        # Obtener el contenido de <app-root>
-        app_root_content = app_root.get_attribute('innerHTML')
-
-        # Analizar el contenido con BeautifulSoup
-        soup = BeautifulSoup(app_root_content, 'html.parser') # type: ignore
+        # El aviso de cookies se acepta una sola vez por sesión del driver (la cookie se
+        # mantiene entre usos, ver driver_pool.keep_cookies), así que solo la primera
+        # página de cada sesión se vuelve a cargar
+        session = get_driver_pool().session_state(driver)
+        if not session.get('cruzverde_consent'):
+            # Encontrar y hacer clic en el botón "Aceptar"
+            accept_button = soup.find('button', text='Aceptar')
+            if accept_button:
+                driver.execute_script("arguments[0].click();", driver.find_element(By.XPATH, "//button[contains(text(), 'Aceptar')]"))
+
+                # Recargar la página
+                driver.get(url)
+
+                # Esperar a que el nuevo app-root esté renderizado
+                wait_until_ready(driver, **READY['cruzverde'], name='cruzverde')
+
+                # Analizar el contenido con BeautifulSoup
+                soup = make_soup(driver.page_source, STRAINERS['cruzverde'])
+            session['cruzverde_consent'] = True
 
         # Extraer el precio
         price_element = soup.find('span', class_='font-bold text-prices text-16')
@@ -673,10 +652,6 @@ def cruzverde(url, driver, soup, data) -> dict:
     except Exception as e:
         print(f"Error: {e}")
 
-    finally:
-        # Cerrar el navegador
-        driver.quit()
-
     data.update({
         'price': price,
         'lab_name': lab_name.strip(), # type: ignore
@@ -685,7 +660,8 @@ def cruzverde(url, driver, soup, data) -> dict:
 
     return data
 
-@handle_http_request
+@register('profar.cl')
+@handle_http_request(parse_only=STRAINERS['profar'])
 @validate_data(['price', 'lab_name','is_available', 'active_principle', 'sku', 'web_name'])
 def profar(url, soup, data) -> dict:
     """
@@ -736,9 +712,10 @@ def profar(url, soup, data) -> dict:
 
     return data
 
-@handle_http_request
+@register('farmaciasknop.com')
+@handle_http_request(parse_only=STRAINERS['knoplab'], raw=True)
 @validate_data(['price', 'lab_name', 'is_available', 'sku', 'web_name'])
-def knoplab(url, soup,data) -> dict:
+def knoplab(url, soup, content, data) -> dict:
     """
     Scrapes medication data from the Knop Laboratorios website.
 
@@ -748,6 +725,8 @@ def knoplab(url, soup,data) -> dict:
         The URL of the Knop Laboratorios product page.
     soup : BeautifulSoup object
         The BeautifulSoup object containing the HTML content of the page.
+    content : bytes
+        The raw HTML of the page.
     data : dict
         A dictionary to store the scraped data.
 
@@ -756,8 +735,7 @@ def knoplab(url, soup,data) -> dict:
     dict
         The updated dictionary with the scraped data.
     """
-    json_ld_script = soup.find('script', type='application/ld+json').string
-    json_ld = json.loads(json_ld_script)
+    json_ld = structured_data.json_ld(content)[0]
 
     sku = json_ld.get('sku', None)
     price = json_ld.get('offers', {}).get('lowPrice')
@@ -792,7 +770,9 @@ def knoplab(url, soup,data) -> dict:
     return data
 
 
-def farmaciajvf(url,data) -> dict:
+@register('farmaciajvf.com', concurrency=1)
+@initialize_driver
+def farmaciajvf(url, driver, data) -> dict:
     """
     Scrapes medication data from the Knop Laboratorios website.
 
@@ -812,39 +792,25 @@ def farmaciajvf(url,data) -> dict:
     dict
         The updated dictionary with the scraped data.
     """
-    # Configura Selenium
-    chrome_options = Options()
-    chrome_options.add_argument("--headless")  # Ejecuta el navegador en modo headless
-    chrome_options.add_argument("--incognito")
-
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
-    
     driver.get(url)
-    try:
-        wait = WebDriverWait(driver, 10)
-        button1 = wait.until(EC.element_to_be_clickable((By.XPATH, "//button[@class='ant-btn ant-btn-block button-secondary']/span[text()='En Otro Momento']")))
-        button1.click()
-    except Exception as e: # type: ignore
-        # print(f"No se pudo encontrar el primer botón: {e}")
-        pass
 
-    time.sleep(10)  # Ajusta el tiempo según sea necesario
-    # Espera a que el segundo botón aparezca y haz clic en el botón "Ok"
-    try:
-        button2 = wait.until(EC.element_to_be_clickable((By.XPATH, "//button[@class='ant-btn ant-btn-block button-tertiary']/span[text()='Ok']")))
-        button2.click()
-    except Exception as e: # type: ignore
-        # print(f"No se pudo encontrar el segundo botón: {e}")
-        pass
+    # Espera a que la página esté lista
+    wait_until_ready(driver, **READY['farmaciajvf'], name='farmaciajvf')
 
-    # Espera a que la página cargue completamente
-    time.sleep(10)  # Ajusta el tiempo según sea necesario
+    # Cerrar los avisos "En Otro Momento" y "Ok" solo si aparecieron, sin esperarlos
+    for xpath in ("//button[@class='ant-btn ant-btn-block button-secondary']/span[text()='En Otro Momento']",
+                  "//button[@class='ant-btn ant-btn-block button-tertiary']/span[text()='Ok']"):
+        for button in driver.find_elements(By.XPATH, xpath):
+            try:
+                button.click()
+            except Exception: # type: ignore
+                pass
 
     # Obtén el contenido de la página
     page_source = driver.page_source
 
     # Analiza el HTML con BeautifulSoup
-    soup = BeautifulSoup(page_source, 'html.parser')
+    soup = make_soup(page_source)
 
     # Extrae el nombre del producto
     product_name_element = soup.find('h1', class_='ph-product-detail-quote-title-info-main-title')
@@ -890,9 +856,6 @@ def farmaciajvf(url,data) -> dict:
         else:
             continue
 
-    # Cierra el navegador
-    driver.quit()
-
     data.update({
         'price': price,
         'lab_name': lab,
@@ -905,7 +868,9 @@ def farmaciajvf(url,data) -> dict:
     return data
 
 
-def anticonceptivo_cl(url,data) -> dict:
+@register('anticonceptivo.cl', concurrency=1)
+@render_page(READY['anticonceptivo_cl'])
+def anticonceptivo_cl(url, driver, soup, data) -> dict:
     """
     Scrapes medication data from the Anticonceptivo.cl website.
 
@@ -925,24 +890,6 @@ def anticonceptivo_cl(url,data) -> dict:
     dict
         The updated dictionary with the scraped data.
     """
-    # Configura Selenium
-    chrome_options = Options()
-    chrome_options.add_argument("--headless")  # Ejecuta el navegador en modo headless
-    chrome_options.add_argument("--incognito")
-
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
-    
-    driver.get(url)
-
-    # Espera a que la página cargue completamente
-    time.sleep(5)  # Ajusta el tiempo según sea necesario
-
-    # Obtén el contenido de la página
-    page_source = driver.page_source
-
-    # Analiza el HTML con BeautifulSoup
-    soup = BeautifulSoup(page_source, 'html.parser')
-
     # Obtener el precio
     price_element = soup.find('span', class_='font-poppins font-36 bold color-009BE8')
     price = price_element.text.strip()[:7].strip('C') if price_element else None
@@ -975,9 +922,6 @@ def anticonceptivo_cl(url,data) -> dict:
     compound_element = soup.find('div', class_='font-poppins font-12 compoundProduct')
     compound = compound_element.text.strip() if compound_element else None
 
-    # Cierra el navegador
-    driver.quit()
-
     data.update({
         'price': price,
         'lab_name': lab,
@@ -990,7 +934,9 @@ def anticonceptivo_cl(url,data) -> dict:
     return data
 
 
-def farmaloop(url,data) -> dict:
+@register('farmaloop.cl', concurrency=1)
+@render_page(READY['farmaloop'], STRAINERS['farmaloop'])
+def farmaloop(url, driver, soup, data) -> dict:
     """
     Scrapes medication data from the Knop Laboratorios website.
 
@@ -1010,23 +956,6 @@ def farmaloop(url,data) -> dict:
     dict
         The updated dictionary with the scraped data.
     """
-    # Configura Selenium
-    chrome_options = Options()
-    chrome_options.add_argument("--headless")  # Ejecuta el navegador en modo headless
-    chrome_options.add_argument("--incognito")
-
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
-    
-    driver.get(url)
-    # Espera a que la página cargue completamente
-    time.sleep(5)  # Ajusta el tiempo según sea necesario
-
-    # Obtén el contenido de la página
-    page_source = driver.page_source
-
-    # Analiza el HTML con BeautifulSoup
-    soup = BeautifulSoup(page_source, 'html.parser')
-
     # Encuentra el div con id __next
     next_div = soup.find('div', id='__next')
 
@@ -1054,8 +983,6 @@ def farmaloop(url,data) -> dict:
 
     is_available = True if price else False
 
-    driver.quit()
-
     data.update({
         'price': price,
         'lab_name': lab,
@@ -0,0 +1,96 @@
+"""
+This module contains the shared wait helper used by the Selenium scrapers instead of fixed sleeps.
+
+A readiness spec is a set of keyword arguments describing when a page is ready to be parsed,
+for example ``{'css': 'h1.product-title', 'timeout': 10}``. Every condition given must hold.
+
+Functions:
+- wait_until_ready: Waits until a page satisfies a readiness spec and returns the time it took.
+"""
+
+import logging
+import time
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+from . import instrumentation
+
+logger = logging.getLogger(__name__)
+
+# Cantidad de recursos cargados por la página (fetch/XHR, imágenes, scripts...)
+_RESOURCE_COUNT_JS = "return [document.readyState, performance.getEntriesByType('resource').length];"
+
+
+class _NetworkIdle:
+    """
+    Condition that holds once the document is complete and no new resource has been
+    requested for ``idle_time`` seconds.
+    """
+
+    def __init__(self, idle_time):
+        self.idle_time = idle_time
+        self.count = None
+        self.since = None
+
+    def __call__(self, driver):
+        state, count = driver.execute_script(_RESOURCE_COUNT_JS)
+        now = time.perf_counter()
+        if state != 'complete' or count != self.count:
+            self.count = count
+            self.since = now
+            return False
+        return now - self.since >= self.idle_time
+
+
+def wait_until_ready(driver, css=None, js=None, network_idle=False, idle_time=0.5, timeout=10, name=None):
+    """
+    Waits until the page loaded in the driver satisfies a readiness spec.
+
+    The time waited is added to the 'wait' stage of the row being scraped (see instrumentation).
+
+    Parameters
+    ----------
+    driver : WebDriver
+        The Selenium WebDriver instance with the page already requested.
+    css : str, optional
+        CSS selector of an element that must be present.
+    js : str, optional
+        JavaScript predicate (e.g. ``"return window.dataLayer !== undefined"``) that must return a truthy value.
+    network_idle : bool, optional
+        Whether to wait until no new resources are requested for ``idle_time`` seconds.
+    idle_time : float, optional
+        Quiet period used by the network-idle check.
+    timeout : float, optional
+        Maximum number of seconds to wait.
+    name : str, optional
+        Name of the scraper, used when reporting the time the page took to be ready.
+
+    Returns
+    -------
+    float
+        The number of seconds the page took to become ready.
+
+    Raises
+    ------
+    selenium.common.exceptions.TimeoutException
+        If the page is not ready after ``timeout`` seconds.
+    """
+    conditions = []
+    if css:
+        conditions.append(EC.presence_of_element_located((By.CSS_SELECTOR, css)))
+    if js:
+        conditions.append(lambda d: d.execute_script(js))
+    if network_idle:
+        conditions.append(_NetworkIdle(idle_time))
+
+    start = time.perf_counter()
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=0.1).until(lambda d: all(condition(d) for condition in conditions))
+    finally:
+        # La espera se registra en la etapa 'wait' de la fila, también si se agota el plazo
+        elapsed = time.perf_counter() - start
+        instrumentation.record('wait', elapsed)
+
+    logger.info(f'{name or driver.current_url} lista en {elapsed:.2f}s')
+    return elapsed
@@ -0,0 +1,158 @@
+"""
+This module contains the registry that maps each pharmacy website to its scraper.
+
+Scrapers register themselves with the ``register`` decorator, giving the hostnames they
+handle and their per-pharmacy settings (concurrency, request rate, cookies kept between
+uses of a driver, HTTP cache). The fetch mode, the required fields and the readiness
+conditions are read from the attributes set by the decorators of ``decorators.py``.
+Scrapers defined outside this package can be registered through the
+``pharmacy_scraper.scrapers`` entry point group.
+
+Classes:
+- ScraperSpec: A registered scraper and its per-pharmacy settings.
+
+Functions:
+- register: Decorator that registers a scraper for one or more hostnames.
+- lookup: Returns the spec of the scraper for a URL.
+- lookup_host: Returns the spec of the scraper for a hostname.
+- get_spec: Returns the spec of a scraper by name.
+- specs: Returns every registered spec.
+- load_entry_points: Imports the scrapers registered through entry points.
+"""
+
+from importlib.metadata import entry_points
+from urllib.parse import urlparse
+
+ENTRY_POINT_GROUP = 'pharmacy_scraper.scrapers'
+
+
+class ScraperSpec:
+    """
+    A registered scraper and its per-pharmacy settings.
+
+    Parameters
+    ----------
+    scraper : callable
+        The scraper, called as ``scraper(url, data)``.
+    domains : tuple of str
+        The hostnames handled by the scraper, without 'www.'.
+    concurrency : int, optional
+        Maximum number of rows of the pharmacy scraped at the same time (the
+        ``extraction.default_concurrency`` of the configuration if not given).
+    rate : float, optional
+        Initial request rate, in requests per second (the ``throttle.initial_rate`` if not given).
+    keep_cookies : bool, optional
+        Keep the cookies of the pharmacy between uses of a driver (e.g. an accepted cookie banner).
+    cache : bool, optional
+        Use the HTTP cache for the pages of the pharmacy.
+    """
+
+    def __init__(self, scraper, domains, concurrency=None, rate=None, keep_cookies=False, cache=True):
+        self.scraper = scraper
+        self.name = scraper.__name__
+        self.domains = domains
+        self.concurrency = concurrency
+        self.rate = rate
+        self.keep_cookies = keep_cookies
+        self.cache = cache
+
+    @property
+    def fetch_mode(self):
+        """
+        'static', 'json' or 'rendered' (see ``decorators.FETCH_MODES``).
+        """
+        return getattr(self.scraper, 'fetch_mode', None)
+
+    @property
+    def required(self):
+        """
+        The fields checked by ``validate_data``.
+        """
+        return getattr(self.scraper, 'required_keys', ())
+
+    @property
+    def ready(self):
+        """
+        The readiness conditions of ``render_page`` (None for the other fetch modes).
+        """
+        return getattr(self.scraper, 'ready', None)
+
+    def __repr__(self):
+        return f'ScraperSpec({self.name!r}, domains={self.domains!r}, fetch_mode={self.fetch_mode!r})'
+
+
+_by_host = {}
+_by_name = {}
+
+def register(*domains, concurrency=None, rate=None, keep_cookies=False, cache=True):
+    """
+    Decorator that registers a scraper for one or more hostnames.
+
+    Parameters
+    ----------
+    *domains : str
+        The hostnames handled by the scraper (with or without 'www.').
+    concurrency, rate, keep_cookies, cache
+        The per-pharmacy settings, see ``ScraperSpec``.
+
+    Returns
+    -------
+    callable
+        A decorator that registers the scraper and returns it unchanged, with the
+        spec in its ``spec`` attribute.
+    """
+    def decorator(scraper):
+        hosts = tuple(domain.removeprefix('www.') for domain in domains)
+        spec = ScraperSpec(scraper, hosts, concurrency, rate, keep_cookies, cache)
+        for host in hosts:
+            if host in _by_host and _by_host[host].name != spec.name:
+                raise ValueError(f'{host} ya está registrado por {_by_host[host].name}')
+            _by_host[host] = spec
+        _by_name[spec.name] = spec
+        scraper.spec = spec
+        return scraper
+    return decorator
+
+def lookup_host(host):
+    """
+    Returns the spec of the scraper for a hostname, also matching its subdomains
+    (e.g. 'tienda.salcobrand.cl' falls back to 'salcobrand.cl').
+
+    Returns
+    -------
+    ScraperSpec or None
+        The spec, or None if no scraper handles the hostname.
+    """
+    host = host.removeprefix('www.')
+    while host:
+        spec = _by_host.get(host)
+        if spec is not None:
+            return spec
+        _, _, host = host.partition('.')
+    return None
+
+def lookup(url):
+    """
+    Returns the spec of the scraper for a URL, or None if no scraper handles its hostname.
+    """
+    return lookup_host(urlparse(url.strip('"')).hostname or '')
+
+def get_spec(name):
+    """
+    Returns the spec of a scraper by name (e.g. 'cruzverde'), or None if it is not registered.
+    """
+    return _by_name.get(name)
+
+def specs():
+    """
+    Returns every registered spec, in registration order.
+    """
+    return list(_by_name.values())
+
+def load_entry_points():
+    """
+    Imports the scrapers registered through the ``pharmacy_scraper.scrapers`` entry point
+    group; loading each entry point runs its ``register`` decorators.
+    """
+    for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+        entry_point.load()
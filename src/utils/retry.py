@@ -0,0 +1,68 @@
+"""
+This module contains the classification of scraping errors and the backoff of the retries.
+
+Transient errors (timeouts, connection errors, 429/5xx answers, browser failures, open
+circuits and dead parser workers) are worth retrying later in the run; permanent errors
+(4xx answers, missing data in the page, unknown URLs and parsing errors) are reported and
+not retried.
+
+Functions:
+- is_transient: Tells whether a scraping error is worth retrying.
+- backoff_delay: Returns the jittered exponential delay before a retry.
+"""
+
+import random
+from concurrent.futures.process import BrokenProcessPool
+
+import requests
+from selenium.common.exceptions import WebDriverException
+
+from .throttle import CircuitOpenError
+
+TRANSIENT_STATUS = (408, 425, 429, 500, 502, 503, 504)
+
+def is_transient(error):
+    """
+    Tells whether a scraping error is worth retrying.
+
+    Parameters
+    ----------
+    error : Exception
+        The error raised while scraping a row.
+
+    Returns
+    -------
+    bool
+        True for timeouts, connection errors, 408/425/429/5xx answers, WebDriver errors
+        (``WebDriverWait`` timeouts included), open circuits and parser workers that died
+        (``BrokenProcessPool``, the pool is rebuilt); False otherwise, e.g. for
+        404 answers or the ``ValueError`` raised by ``validate_data``.
+    """
+    if isinstance(error, (CircuitOpenError, BrokenProcessPool)):
+        return True
+    if isinstance(error, requests.exceptions.HTTPError):
+        response = error.response
+        return response is None or response.status_code in TRANSIENT_STATUS
+    if isinstance(error, (requests.exceptions.RequestException, WebDriverException)):
+        return True
+    return False
+
+def backoff_delay(attempt, base, cap):
+    """
+    Returns the delay before a retry, with exponential backoff and full jitter.
+
+    Parameters
+    ----------
+    attempt : int
+        The number of attempts already made (1 after the first failure).
+    base : float
+        The delay, in seconds, before the first retry (before jitter).
+    cap : float
+        The maximum delay, in seconds.
+
+    Returns
+    -------
+    float
+        A random delay between 0 and ``min(cap, base * 2 ** (attempt - 1))``.
+    """
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
@@ -0,0 +1,266 @@
+"""
+This module contains the sharded execution mode, which splits the input CSV across processes or hosts.
+
+The rows are assigned to one of N shards by a stable hash of their URL (or of their
+pharmacy), so every shard scrapes the same rows in every run and on every host. Each shard
+writes the records it scrapes to its own JSONL file; once every shard has finished, the
+files are merged in the order of the input CSV and loaded through ``transform_data`` and
+the sinks like a single-process run.
+
+The per-domain limits hold across shards: the concurrency limit of each domain is enforced
+with lock files (one per slot) in a directory shared by the shards, and the request rate of
+the throttle is divided by the number of shards.
+
+Classes:
+- ShardWriter: Appends the records scraped by a shard to its JSONL file.
+
+Functions:
+- parse_shard: Parses a ``--shard`` argument ('i/N').
+- configure: Sets the shard run by the current process.
+- current_shard: Returns the shard run by the current process.
+- shard_of: Returns the shard a row of the input CSV belongs to.
+- select: Keeps the rows of the input CSV that belong to the current shard.
+- suffix: Adds the shard to a per-process file name.
+- shard_file: Returns the path of the JSONL file of a shard.
+- domain_slot: Context manager that holds one of the concurrency slots of a domain across processes.
+- merge: Reads the records of every shard, in the order of the input CSV.
+"""
+
+import hashlib
+import json
+import os
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+from . import checkpoint
+from .config import load_config
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+_shard = None
+
+def parse_shard(text):
+    """
+    Parses a ``--shard`` argument.
+
+    Parameters
+    ----------
+    text : str
+        The shard as 'i/N', with ``0 <= i < N`` (e.g. '2/4').
+
+    Returns
+    -------
+    tuple of int
+        ``(index, count)``.
+
+    Raises
+    ------
+    ValueError
+        If the argument is not a valid shard.
+    """
+    index, _, count = text.partition('/')
+    try:
+        index, count = int(index), int(count)
+    except ValueError:
+        raise ValueError(f"Shard inválido: {text!r} (se espera 'i/N')") from None
+    if not 0 <= index < count:
+        raise ValueError(f'Shard inválido: {text!r} (0 <= i < N)')
+    return index, count
+
+def configure(index, count):
+    """
+    Sets the shard run by the current process (``count == 1`` runs every row).
+    """
+    global _shard
+    _shard = (index, count) if count > 1 else None
+
+def current_shard():
+    """
+    Returns the shard run by the current process as ``(index, count)``, or None outside a sharded run.
+    """
+    return _shard
+
+def shard_of(row, count, by='url'):
+    """
+    Returns the shard a row of the input CSV belongs to.
+
+    Parameters
+    ----------
+    row : dict
+        A row of the input CSV.
+    count : int
+        The number of shards.
+    by : str, optional
+        'url' (balances the rows) or 'pharmacy' (keeps every row of a pharmacy in the same shard).
+
+    Returns
+    -------
+    int
+        The shard, between 0 and ``count - 1``. The hash does not depend on the process
+        (unlike ``hash``), so a row always lands in the same shard.
+    """
+    value = row['url'].strip('"') if by == 'url' else row['pharmacy']
+    digest = hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') % count
+
+def select(rows):
+    """
+    Keeps the indices of the rows of the input CSV that belong to the current shard.
+
+    Parameters
+    ----------
+    rows : list of dict
+        The rows of the input CSV.
+
+    Returns
+    -------
+    list of int
+        The indices of the rows to scrape (every row outside a sharded run).
+    """
+    if _shard is None:
+        return list(range(len(rows)))
+    index, count = _shard
+    by = load_config().get('sharding', {}).get('by', 'url')
+    return [position for position, row in enumerate(rows) if shard_of(row, count, by) == index]
+
+def suffix(path):
+    """
+    Adds the current shard to a per-process file name ('run.json' -> 'run.shard-2-of-4.json'),
+    so the shards running on the same host do not overwrite each other's files.
+    """
+    if _shard is None:
+        return path
+    root, extension = os.path.splitext(path)
+    return f'{root}.shard-{_shard[0]}-of-{_shard[1]}{extension}'
+
+def shard_file(index, count):
+    """
+    Returns the path of the JSONL file with the records scraped by a shard.
+    """
+    directory = os.path.abspath(load_config()['sharding']['dir'])
+    return os.path.join(directory, f'shard-{index}-of-{count}.jsonl')
+
+
+class ShardWriter:
+    """
+    Appends the records scraped by a shard to its JSONL file.
+
+    The file is rewritten on every run, except when the checkpoint resumes an interrupted
+    run of the shard: then the records already written are kept and the new ones appended.
+
+    Parameters
+    ----------
+    path : str
+        The path of the JSONL file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def _open(self):
+        # Abrir al primer uso, cuando el checkpoint ya decidió si se reanuda la ejecución
+        log = checkpoint.get_checkpoint()
+        mode = 'a' if log and log.loaded else 'w'
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        if mode == 'a' and os.path.exists(self.path):
+            # Descartar la línea incompleta de una caída antes de seguir escribiendo a continuación
+            checkpoint.drop_torn_line(self.path)
+        self._file = open(self.path, mode, encoding='utf-8')
+
+    def write(self, records):
+        """
+        Appends a batch of scraped records and flushes it to disk.
+        """
+        if self._file is None:
+            self._open()
+        for data in records:
+            self._file.write(json.dumps(data, ensure_ascii=False, default=str) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is None:
+            self._open()
+        self._file.close()
+
+
+@contextmanager
+def domain_slot(domain, limit):
+    """
+    Context manager that holds one of the ``limit`` concurrency slots of a domain, shared
+    by every shard through lock files in ``sharding.lock_dir``.
+
+    Outside a sharded run (or without ``fcntl``) the limit of the in-process scheduler
+    already applies and nothing is locked.
+    """
+    if _shard is None or fcntl is None:
+        yield
+        return
+
+    directory = os.path.abspath(load_config()['sharding']['lock_dir'])
+    os.makedirs(directory, exist_ok=True)
+    handle = None
+    while handle is None:
+        for slot in range(limit):
+            file = open(os.path.join(directory, f'{domain}.{slot}.lock'), 'a')
+            try:
+                fcntl.flock(file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                file.close()
+                continue
+            handle = file
+            break
+        else:
+            # Todos los cupos del dominio están ocupados por otros shards
+            time.sleep(0.1)
+    try:
+        yield
+    finally:
+        # Cerrar el archivo libera el lock
+        handle.close()
+
+def merge(input_file, count):
+    """
+    Reads the records scraped by every shard, in the order of the input CSV.
+
+    Parameters
+    ----------
+    input_file : str
+        The path of the input CSV the shards were run on.
+    count : int
+        The number of shards.
+
+    Returns
+    -------
+    list of dict
+        The scraped records. A record written twice by a resumed shard is only kept once.
+
+    Raises
+    ------
+    FileNotFoundError
+        If the file of a shard is missing (the shard was not run or was run on another host).
+    """
+    records = {}
+    for index in range(count):
+        with open(shard_file(index, count), encoding='utf-8') as file:
+            for line in file:
+                try:
+                    data = json.loads(line)
+                except json.JSONDecodeError:
+                    # Línea incompleta por una caída durante la escritura: los registros
+                    # que un shard reanudado escribió después siguen siendo válidos
+                    continue
+                records[checkpoint.record_key(data)] = data
+
+    # Mismo orden que el archivo de entrada, sin importar el shard ni el orden de scrapeo
+    rows = pd.read_csv(input_file).to_dict('records')
+    position = {}
+    for index, row in enumerate(rows):
+        position.setdefault(checkpoint.row_key(row), index)
+    return sorted(records.values(), key=lambda data: (position.get(checkpoint.record_key(data), len(rows)), checkpoint.record_key(data)))
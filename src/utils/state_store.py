@@ -0,0 +1,118 @@
+"""
+This module contains the local state store used by the incremental extraction mode.
+
+It keeps, for every (product_name, pharmacy, url) of the input CSV, when it was last
+scraped successfully and whether the last attempt failed.
+
+Classes:
+- StateStore: SQLite table with the last scrape of every input row.
+
+Functions:
+- get_state_store: Returns the process-wide state store built from the configuration.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+from .config import load_config
+
+
+class StateStore:
+    """
+    SQLite table with the last scrape of every input row.
+
+    Parameters
+    ----------
+    path : str
+        Path of the SQLite database.
+    """
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._lock = threading.Lock()
+        # timeout: esperar a que otros procesos (shards) terminen de escribir
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS scrape_state (
+                product_name TEXT NOT NULL,
+                pharmacy TEXT NOT NULL,
+                url TEXT NOT NULL,
+                last_success REAL,
+                last_attempt REAL NOT NULL,
+                last_error TEXT,
+                PRIMARY KEY (product_name, pharmacy, url)
+            )""")
+        self._db.commit()
+
+    @staticmethod
+    def _key(row):
+        return (row['product_name'], row['pharmacy'], row['url'].strip('"'))
+
+    def needs_scrape(self, row, freshness):
+        """
+        Tells whether a row has to be scraped again.
+
+        Parameters
+        ----------
+        row : dict
+            A row of the input CSV.
+        freshness : float
+            Seconds a successful scrape stays fresh.
+
+        Returns
+        -------
+        bool
+            True if the row was never scraped, failed the last time or is older than ``freshness``.
+        """
+        with self._lock:
+            state = self._db.execute(
+                'SELECT last_success, last_error FROM scrape_state WHERE product_name = ? AND pharmacy = ? AND url = ?',
+                self._key(row)).fetchone()
+        if state is None:
+            return True
+        last_success, last_error = state
+        return last_error is not None or last_success is None or time.time() - last_success > freshness
+
+    def mark_success(self, row):
+        """
+        Records a successful scrape of a row.
+        """
+        now = time.time()
+        with self._lock:
+            self._db.execute('INSERT OR REPLACE INTO scrape_state VALUES (?, ?, ?, ?, ?, NULL)',
+                             (*self._key(row), now, now))
+            self._db.commit()
+
+    def mark_error(self, row, error):
+        """
+        Records a failed scrape of a row, keeping the time of its last success.
+        """
+        now = time.time()
+        with self._lock:
+            self._db.execute("""
+                INSERT INTO scrape_state VALUES (?, ?, ?, NULL, ?, ?)
+                ON CONFLICT (product_name, pharmacy, url)
+                DO UPDATE SET last_attempt = excluded.last_attempt, last_error = excluded.last_error""",
+                (*self._key(row), now, str(error)))
+            self._db.commit()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_state_store():
+    """
+    Returns the process-wide state store, stored at ``incremental.state_db``.
+
+    Returns
+    -------
+    StateStore
+        The shared state store.
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = StateStore(os.path.abspath(load_config()['incremental']['state_db']))
+    return _store
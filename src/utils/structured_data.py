@@ -0,0 +1,140 @@
+"""
+This module contains helpers to read structured data (embedded JSON and storefront APIs) from product pages.
+
+The helpers work on the raw bytes of the response and only decode the payload they
+need, without building a BeautifulSoup tree of the whole document.
+
+Functions:
+- script_payload: Returns the raw content of the first <script> tag matching an id or a type.
+- embedded_json: Parses the JSON content of the first <script> tag matching an id or a type.
+- json_ld: Parses every JSON-LD (application/ld+json) script of the page.
+- js_object: Parses the object literal assigned to a JavaScript variable (e.g. ``var data = {...};``).
+- vtex_catalog_url: Returns the VTEX catalog API URL for a product page.
+"""
+
+import json
+import re
+from urllib.parse import urlparse
+
+_SCRIPT_END = re.compile(rb'</script\s*>', re.IGNORECASE)
+
+def _script_open_tag(attribute, value):
+    return re.compile(rb'<script\b[^>]*\b' + attribute + rb'\s*=\s*["\']?' + re.escape(value) + rb'["\'\s>][^>]*>',
+                      re.IGNORECASE)
+
+def _iter_scripts(content, script_id=None, script_type=None):
+    if script_id is not None:
+        open_tag = _script_open_tag(rb'id', script_id.encode())
+    else:
+        open_tag = _script_open_tag(rb'type', script_type.encode())
+
+    position = 0
+    while True:
+        match = open_tag.search(content, position)
+        if not match:
+            return
+        end = _SCRIPT_END.search(content, match.end())
+        if not end:
+            return
+        yield content[match.end():end.start()]
+        position = end.end()
+
+def script_payload(content, script_id=None, script_type=None):
+    """
+    Returns the raw content of the first <script> tag matching an id or a type.
+
+    Parameters
+    ----------
+    content : bytes
+        The raw HTML of the page.
+    script_id : str, optional
+        The id of the script (e.g. '__NEXT_DATA__').
+    script_type : str, optional
+        The type of the script (e.g. 'application/ld+json'). Only used when no id is given.
+
+    Returns
+    -------
+    bytes or None
+        The content of the script, or None if the page has no such script.
+    """
+    return next(_iter_scripts(content, script_id, script_type), None)
+
+def embedded_json(content, script_id=None, script_type=None):
+    """
+    Parses the JSON content of the first <script> tag matching an id or a type.
+
+    Parameters
+    ----------
+    content : bytes
+        The raw HTML of the page.
+    script_id : str, optional
+        The id of the script (e.g. '__NEXT_DATA__').
+    script_type : str, optional
+        The type of the script. Only used when no id is given.
+
+    Returns
+    -------
+    dict or list or None
+        The parsed JSON, or None if the page has no such script.
+    """
+    payload = script_payload(content, script_id, script_type)
+    return json.loads(payload) if payload is not None else None
+
+def json_ld(content):
+    """
+    Parses every JSON-LD (application/ld+json) script of the page.
+
+    Parameters
+    ----------
+    content : bytes
+        The raw HTML of the page.
+
+    Returns
+    -------
+    list
+        The parsed JSON-LD documents, in page order.
+    """
+    return [json.loads(payload) for payload in _iter_scripts(content, script_type='application/ld+json')]
+
+def js_object(content, variable):
+    """
+    Parses the object literal assigned to a JavaScript variable (e.g. ``var product_traker_data = {...};``).
+
+    Parameters
+    ----------
+    content : bytes
+        The raw HTML of the page.
+    variable : str
+        The name of the variable.
+
+    Returns
+    -------
+    dict or None
+        The parsed object, or None if the variable is not found.
+    """
+    match = re.search(rb'\b' + re.escape(variable.encode()) + rb'\s*=\s*(?={)', content)
+    if not match:
+        return None
+    end = _SCRIPT_END.search(content, match.end())
+    literal = content[match.end():end.start() if end else len(content)].decode('utf-8', errors='replace')
+    # raw_decode se detiene al final del objeto, sin depender de lo que venga después
+    obj, _ = json.JSONDecoder().raw_decode(literal)
+    return obj
+
+def vtex_catalog_url(url):
+    """
+    Returns the VTEX catalog API URL for a product page (``https://<host>/<slug>/p``).
+
+    Parameters
+    ----------
+    url : str
+        The URL of the product page.
+
+    Returns
+    -------
+    str
+        The URL of the catalog search endpoint for the product.
+    """
+    parsed = urlparse(url)
+    slug = parsed.path.strip('/').removesuffix('/p')
+    return f'{parsed.scheme}://{parsed.netloc}/api/catalog_system/pub/products/search/{slug}/p'
@@ -0,0 +1,312 @@
+"""
+This module contains the per-domain rate limiting and circuit breaking of the scrapers.
+
+Every domain gets a token bucket whose rate adapts to the site (additive increase while
+it answers at its usual latency, multiplicative decrease when it slows down or answers
+429/503) and a circuit breaker that stops sending requests after several consecutive
+failures and lets a single probe through once a cooldown has passed.
+
+Classes:
+- CircuitOpenError: Raised when a row is not scraped because the circuit of its domain is open.
+- TokenBucket: Token bucket with an adaptive (AIMD) rate.
+- CircuitBreaker: Circuit breaker with closed, open and half-open states.
+- DomainThrottle: Token bucket and circuit breaker of every domain.
+
+Functions:
+- is_site_failure: Tells whether an error means the site failed (network error, 429/5xx answer or browser error).
+- is_throttled: Tells whether an error is a rate limiting answer of the site (429 or 503).
+- get_throttle: Returns the process-wide throttle, or None if it is disabled in the configuration.
+"""
+
+import threading
+import time
+
+import requests
+from selenium.common.exceptions import WebDriverException
+
+from . import registry, sharding
+from .config import load_config
+
+THROTTLE_STATUS = (429, 503)
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised when a row is not scraped because the circuit of its domain is open.
+    """
+
+    def __init__(self, domain, retry_at):
+        super().__init__(f'Circuito abierto para {domain}')
+        self.domain = domain
+        self.retry_at = retry_at
+
+
+def is_site_failure(error):
+    """
+    Tells whether an error means the site failed (network error, 429/5xx answer or browser
+    error), as opposed to a page that was served but is missing or could not be parsed.
+    """
+    if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+        return error.response.status_code in THROTTLE_STATUS or error.response.status_code >= 500
+    return isinstance(error, (requests.exceptions.RequestException, WebDriverException))
+
+def is_throttled(error):
+    """
+    Tells whether an error is a rate limiting answer of the site (429 or 503).
+    """
+    response = getattr(error, 'response', None)
+    return response is not None and response.status_code in THROTTLE_STATUS
+
+
+class TokenBucket:
+    """
+    Token bucket with an adaptive (AIMD) rate.
+
+    Parameters
+    ----------
+    rate : float
+        Initial rate, in requests per second.
+    burst : int
+        Maximum number of tokens that can be accumulated.
+    min_rate : float
+        Lower bound of the rate.
+    max_rate : float
+        Upper bound of the rate.
+    """
+
+    def __init__(self, rate, burst, min_rate, max_rate):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.latency = None
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """
+        Takes a token if one is available, without blocking.
+
+        Returns
+        -------
+        float
+            0 if the token was taken, otherwise the seconds until one is available.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self):
+        """
+        Blocks until a token is available and takes it.
+        """
+        while (wait := self.reserve()) > 0:
+            time.sleep(wait)
+
+    def on_success(self, latency):
+        """
+        Adapts the rate to the latency of a successful request.
+
+        The rate grows by 0.1 requests per second while the latency stays under twice its
+        moving average, and is cut by 20% when the site answers slower than that.
+        """
+        with self._lock:
+            if self.latency is not None and latency > 2 * self.latency:
+                self.rate = max(self.min_rate, self.rate * 0.8)
+            else:
+                self.rate = min(self.max_rate, self.rate + 0.1)
+            # Media móvil exponencial de la latencia
+            self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+
+    def on_throttle(self):
+        """
+        Halves the rate after a 429/503 answer.
+        """
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = 0
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker with closed, open and half-open states.
+
+    Parameters
+    ----------
+    threshold : int
+        Consecutive failures that open the circuit.
+    cooldown : float
+        Seconds the circuit stays open before a probe is let through.
+    """
+
+    def __init__(self, threshold, cooldown):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def retry_at(self):
+        """
+        Monotonic time at which a probe will be let through (None if the circuit is closed).
+        """
+        return None if self.opened_at is None else self.opened_at + self.cooldown
+
+    def allow(self):
+        """
+        Tells whether a request can be sent: always when closed, only one probe when half-open.
+        """
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self._probing or time.monotonic() < self.opened_at + self.cooldown:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            # Un fallo de la sonda vuelve a abrir el circuito
+            if self._probing or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+
+class DomainThrottle:
+    """
+    Token bucket and circuit breaker of every domain.
+
+    Parameters
+    ----------
+    settings : dict
+        The 'throttle' section of the configuration.
+    share : float, optional
+        Fraction of the request rate of every domain used by this process (``1 / N`` in a
+        run sharded across N processes, so the shards together stay within the limits).
+    """
+
+    def __init__(self, settings, share=1.0):
+        self.settings = settings
+        self.share = share
+        self._buckets = {}
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def _get(self, domain):
+        with self._lock:
+            if domain not in self._buckets:
+                s = self.settings
+                # Tasa inicial declarada por el scraper del dominio, si la hay
+                spec = registry.lookup_host(domain)
+                rate = spec.rate if spec and spec.rate else s['initial_rate']
+                self._buckets[domain] = TokenBucket(rate * self.share, max(1, round(s['burst'] * self.share)),
+                                                    s['min_rate'] * self.share, s['max_rate'] * self.share)
+                self._breakers[domain] = CircuitBreaker(s['failure_threshold'], s['cooldown'])
+            return self._buckets[domain], self._breakers[domain]
+
+    def admit(self, domain):
+        """
+        Checks that the circuit of a domain lets a request through, without waiting for a token.
+
+        Returns
+        -------
+        TokenBucket
+            The token bucket of the domain, to wait for a token with ``reserve`` (e.g.
+            without blocking an event loop).
+
+        Raises
+        ------
+        CircuitOpenError
+            If the circuit of the domain is open.
+        """
+        bucket, breaker = self._get(domain)
+        if not breaker.allow():
+            raise CircuitOpenError(domain, breaker.retry_at)
+        return bucket
+
+    def acquire(self, domain):
+        """
+        Waits for the turn of a request to a domain.
+
+        Raises
+        ------
+        CircuitOpenError
+            If the circuit of the domain is open.
+        """
+        self.admit(domain).acquire()
+
+    def record(self, domain, latency, error=None):
+        """
+        Records the outcome of a request to a domain.
+
+        Parameters
+        ----------
+        domain : str
+            The domain of the request.
+        latency : float
+            Seconds the request took.
+        error : Exception, optional
+            The error raised by the scraper, if any.
+        """
+        bucket, breaker = self._get(domain)
+        if error is not None and is_throttled(error):
+            bucket.on_throttle()
+        if error is not None and is_site_failure(error):
+            breaker.record_failure()
+            return
+        # La página respondió (aunque no se haya podido leer)
+        breaker.record_success()
+        bucket.on_success(latency)
+
+    def stats(self):
+        """
+        Returns the current rate and circuit state of every domain.
+
+        Returns
+        -------
+        dict
+            ``{domain: {'rate': float, 'open': bool}}``.
+        """
+        with self._lock:
+            return {domain: {'rate': self._buckets[domain].rate,
+                             'open': self._breakers[domain].opened_at is not None}
+                    for domain in self._buckets}
+
+
+_throttle = None
+_throttle_loaded = False
+_throttle_lock = threading.Lock()
+
+def get_throttle():
+    """
+    Returns the process-wide throttle built from the 'throttle' section of the configuration.
+
+    Returns
+    -------
+    DomainThrottle or None
+        The shared throttle, or None if it is disabled.
+    """
+    global _throttle, _throttle_loaded
+    with _throttle_lock:
+        if not _throttle_loaded:
+            settings = load_config().get('throttle', {})
+            if settings.get('enabled', False):
+                shard = sharding.current_shard()
+                _throttle = DomainThrottle(settings, 1 / shard[1] if shard else 1.0)
+            _throttle_loaded = True
+    return _throttle
@@ -0,0 +1,12 @@
+import logging
+import os
+import sys
+
+# La configuración se lee con rutas relativas a la raíz del repositorio
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(ROOT)
+sys.path.insert(0, ROOT)
+
+# Con un handler en el logger raíz, el logging.basicConfig de extract_data no abre el
+# archivo de log real durante las pruebas
+logging.getLogger().addHandler(logging.NullHandler())
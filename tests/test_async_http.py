@@ -0,0 +1,134 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.extraction import extract_data
+from src.utils import async_http
+
+HTTP_SETTINGS = {'connect_timeout': 5, 'read_timeout': 5, 'retries': 2, 'backoff_factor': 0.5}
+
+
+class Handler(BaseHTTPRequestHandler):
+    # Respuestas que se envían antes del 200, como (estado, cabeceras)
+    responses = []
+
+    def do_GET(self):
+        status, headers = self.responses.pop(0) if self.responses else (200, {})
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_port}/producto'
+    server.shutdown()
+    Handler.responses = []
+
+
+@pytest.fixture
+def delays(monkeypatch):
+    # Registrar las esperas entre reintentos sin dormir
+    recorded = []
+    sleep = asyncio.sleep
+
+    async def fake_sleep(delay, *args):
+        recorded.append(delay)
+        await sleep(0)
+
+    monkeypatch.setattr(async_http.asyncio, 'sleep', fake_sleep)
+    return recorded
+
+
+def get(url):
+    async def run():
+        fetcher = async_http.AsyncFetcher({'http2': False}, HTTP_SETTINGS)
+        try:
+            return await fetcher.get(url)
+        finally:
+            await fetcher.aclose()
+
+    return asyncio.run(run())
+
+
+def test_get_honours_retry_after(server, delays):
+    Handler.responses = [(429, {'Retry-After': '3'}), (503, {'Retry-After': '7'})]
+
+    response = get(server)
+
+    assert response.status_code == 200 and response.content == b'ok'
+    assert delays == [3, 7]
+
+
+def test_get_backs_off_without_retry_after(server, delays):
+    Handler.responses = [(503, {}), (500, {'Retry-After': '7'})]
+
+    assert get(server).status_code == 200
+    # Retry-After solo se respeta en 429/503, como en urllib3
+    assert delays == [0.5, 1.0]
+
+
+def test_get_returns_the_last_response_after_the_retries(server, delays):
+    Handler.responses = [(429, {'Retry-After': '1'})] * 3
+
+    assert get(server).status_code == 429
+    assert delays == [1, 1]
+
+
+def test_mixed_run_stops_the_async_side_when_the_runner_fails(monkeypatch):
+    started, cancelled = threading.Event(), threading.Event()
+
+    async def run_async(rows, settings, emit):
+        started.set()
+        try:
+            await asyncio.sleep(3600)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    def runner(rows):
+        started.wait(5)
+        raise RuntimeError('runner')
+        yield
+
+    monkeypatch.setattr(extract_data.registry, 'lookup', lambda url: url)
+    monkeypatch.setattr(extract_data.async_http, 'supports', lambda url: 'async' in url)
+    monkeypatch.setattr(extract_data, '_run_async', run_async)
+    rows = [{'url': 'https://async.test/p'}, {'url': 'https://browser.test/p'}]
+
+    with pytest.raises(RuntimeError, match='runner'):
+        list(extract_data._run_mixed(rows, runner, {}))
+    assert cancelled.is_set()
+
+
+def test_mixed_run_stops_the_runner_when_the_async_side_fails(monkeypatch):
+    scraped = []
+
+    async def run_async(rows, settings, emit):
+        raise RuntimeError('async')
+
+    def runner(rows):
+        for index, row in enumerate(rows):
+            scraped.append(index)
+            time.sleep(0.01)
+            yield index, row, None
+
+    monkeypatch.setattr(extract_data.registry, 'lookup', lambda url: url)
+    monkeypatch.setattr(extract_data.async_http, 'supports', lambda url: 'async' in url)
+    monkeypatch.setattr(extract_data, '_run_async', run_async)
+    rows = [{'url': 'https://async.test/p'}] + [{'url': f'https://browser.test/p{i}'} for i in range(1000)]
+
+    with pytest.raises(RuntimeError, match='async'):
+        list(extract_data._run_mixed(rows, runner, {}))
+    assert len(scraped) < 1000
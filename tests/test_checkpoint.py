@@ -0,0 +1,87 @@
+import json
+
+from src.utils.checkpoint import Checkpoint, drop_torn_line
+
+
+def record(i):
+    return {'name': f'P{i}', 'pharmacy': 'Farmex', 'url': f'https://www.farmex.cl/p{i}', 'price': '$990'}
+
+
+def test_resume_recovers_scraped_and_loaded_rows(tmp_path):
+    path = str(tmp_path / 'checkpoint.jsonl')
+    input_file = str(tmp_path / 'input.csv')
+
+    log = Checkpoint(path)
+    assert log.begin(input_file) == 0
+    log.mark_scraped(record(0))
+    log.mark_scraped(record(1))
+    log.mark_loaded([record(0)])
+    log._file.close()
+    # Línea incompleta por una caída durante la escritura
+    with open(path, 'a', encoding='utf-8') as file:
+        file.write('{"type": "scraped", "data": {"name"')
+
+    resumed = Checkpoint(path)
+    assert resumed.begin(input_file) == 2
+    assert set(resumed.scraped) == {('P0', 'Farmex', 'https://www.farmex.cl/p0'),
+                                    ('P1', 'Farmex', 'https://www.farmex.cl/p1')}
+    assert resumed.loaded == {('P0', 'Farmex', 'https://www.farmex.cl/p0')}
+    resumed.finish()
+
+
+def test_log_of_another_input_starts_a_new_run(tmp_path):
+    path = str(tmp_path / 'checkpoint.jsonl')
+
+    log = Checkpoint(path)
+    log.begin(str(tmp_path / 'a.csv'))
+    log.mark_scraped(record(0))
+    log._file.close()
+
+    other = Checkpoint(path)
+    assert other.begin(str(tmp_path / 'b.csv')) == 0
+    other._file.close()
+    with open(path, encoding='utf-8') as file:
+        entries = [json.loads(line) for line in file]
+    assert [entry['type'] for entry in entries] == ['run']
+
+
+def test_finish_removes_the_log(tmp_path):
+    path = tmp_path / 'checkpoint.jsonl'
+    log = Checkpoint(str(path))
+    log.begin(str(tmp_path / 'input.csv'))
+    log.finish()
+
+    assert not path.exists()
+
+
+def test_entries_written_after_a_torn_line_survive_the_next_resume(tmp_path):
+    path = str(tmp_path / 'checkpoint.jsonl')
+    input_file = str(tmp_path / 'input.csv')
+
+    log = Checkpoint(path)
+    log.begin(input_file)
+    log.mark_scraped(record(0))
+    log._file.close()
+    with open(path, 'a', encoding='utf-8') as file:
+        file.write('{"type": "scraped", "da')
+
+    # Primera reanudación: se escribe otra fila y el proceso vuelve a caer
+    resumed = Checkpoint(path)
+    assert resumed.begin(input_file) == 1
+    resumed.mark_scraped(record(1))
+    resumed._file.close()
+
+    again = Checkpoint(path)
+    assert again.begin(input_file) == 2
+    again.finish()
+
+
+def test_drop_torn_line(tmp_path):
+    path = tmp_path / 'log.jsonl'
+    path.write_bytes(b'{"a": 1}\n{"b": 2}\n{"c"')
+    drop_torn_line(str(path))
+    assert path.read_bytes() == b'{"a": 1}\n{"b": 2}\n'
+
+    path.write_bytes(b'{"c"')
+    drop_torn_line(str(path))
+    assert path.read_bytes() == b''
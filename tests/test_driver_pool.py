@@ -0,0 +1,53 @@
+import threading
+
+from src.utils.driver_pool import DriverPool
+
+
+class FakeDriver:
+    def execute_cdp_cmd(self, cmd, params):
+        return {}
+
+    def get(self, url):
+        pass
+
+    def quit(self):
+        pass
+
+
+def test_checkouts_finish_when_drivers_are_discarded():
+    # Con max_pages=1 cada driver se descarta al devolverlo: los hilos en espera deben poder crear otro
+    pool = DriverPool(size=2, max_pages=1, arguments=[], driver_factory=FakeDriver)
+    done = []
+
+    def work():
+        for _ in range(5):
+            with pool.checkout():
+                pass
+            done.append(1)
+
+    threads = [threading.Thread(target=work, daemon=True) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    pool.close()
+
+    assert not any(thread.is_alive() for thread in threads)
+    assert len(done) == 40
+    assert pool._created == 0
+
+
+def test_idle_drivers_are_reused():
+    created = []
+
+    def factory():
+        created.append(FakeDriver())
+        return created[-1]
+
+    pool = DriverPool(size=2, max_pages=10, arguments=[], driver_factory=factory)
+    for _ in range(5):
+        with pool.checkout():
+            pass
+    pool.close()
+
+    assert len(created) == 1
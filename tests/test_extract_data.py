@@ -0,0 +1,30 @@
+import pytest
+
+from src.extraction import extract_data
+from src.utils.registry import register
+
+
+@register('zero-concurrency.test', concurrency=0)
+def zero_concurrency(url, data):
+    return data
+
+
+def test_domain_limit_uses_the_registered_concurrency():
+    assert extract_data._domain_limit('salcobrand.cl') == 4
+
+
+def test_domain_limit_below_one_is_rejected():
+    with pytest.raises(ValueError, match='zero-concurrency.test'):
+        extract_data._domain_limit('zero-concurrency.test')
+
+
+def test_invalid_default_concurrency_is_rejected(monkeypatch):
+    monkeypatch.setitem(extract_data.config['extraction'], 'default_concurrency', 0)
+    with pytest.raises(ValueError):
+        extract_data._domain_limit('unknown.test')
+
+
+def test_concurrent_run_fails_instead_of_spinning():
+    rows = [{'url': 'https://zero-concurrency.test/p', 'pharmacy': 'Zero', 'product_name': 'X'}]
+    with pytest.raises(ValueError):
+        list(extract_data._run_concurrent(rows, max_workers=2))
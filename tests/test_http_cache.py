@@ -0,0 +1,68 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from src.utils import http_cache
+
+URL = 'https://www.farmex.cl/producto'
+
+
+def response(content=b'<html>ok</html>', **headers):
+    return SimpleNamespace(content=content, headers=headers)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = http_cache.HttpCache(str(tmp_path), ttl=3600, max_bytes=1000)
+    yield cache
+    cache._db.close()
+
+
+def test_stored_page_is_revalidated_with_its_validators(cache):
+    cache.store(URL, response(ETag='"v1"', **{'Last-Modified': 'Wed, 14 Oct 2026 10:00:00 GMT'}))
+
+    assert cache.validators(URL) == {'If-None-Match': '"v1"', 'If-Modified-Since': 'Wed, 14 Oct 2026 10:00:00 GMT'}
+    assert cache.load(URL) == b'<html>ok</html>'
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'entries': 1, 'bytes': 15}
+
+
+def test_page_without_validators_is_not_stored(cache):
+    cache.store(URL, response())
+
+    assert cache.validators(URL) == {}
+    assert cache.stats()['entries'] == 0
+
+
+def test_expired_entry_is_dropped(cache, monkeypatch):
+    cache.store(URL, response(ETag='"v1"'))
+    now = http_cache.time.time()
+    monkeypatch.setattr(http_cache.time, 'time', lambda: now + 3601)
+
+    assert cache.validators(URL) == {}
+    assert cache.load(URL) is None
+
+
+def test_missing_body_is_reported_as_not_cached(cache):
+    cache.store(URL, response(ETag='"v1"'))
+    for file in os.listdir(cache.directory):
+        if file != 'index.sqlite':
+            os.remove(os.path.join(cache.directory, file))
+
+    assert cache.load(URL) is None
+    assert cache.stats()['entries'] == 0
+
+
+def test_least_recently_used_entries_are_evicted(cache, monkeypatch):
+    clock = iter(range(1000, 2000))
+    monkeypatch.setattr(http_cache.time, 'time', lambda: next(clock))
+    for page in ('a', 'b', 'c'):
+        cache.store(f'{URL}/{page}', response(b'x' * 400, ETag=page))
+        if page == 'b':
+            # 'a' se usa después de 'b': la entrada más antigua pasa a ser 'b'
+            cache.load(f'{URL}/a')
+
+    assert cache.validators(f'{URL}/b') == {}
+    assert cache.validators(f'{URL}/a') == {'If-None-Match': 'a'}
+    assert cache.validators(f'{URL}/c') == {'If-None-Match': 'c'}
+    assert cache.stats()['bytes'] <= 1000
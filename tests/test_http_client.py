@@ -0,0 +1,49 @@
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.utils import http_client, instrumentation
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+
+
+def test_connection_falls_back_to_the_next_address(server, monkeypatch):
+    # Un puerto cerrado en la primera dirección: la conexión debe seguir con la segunda
+    closed = socket.socket()
+    closed.bind(('127.0.0.2', 0))
+    closed_address = closed.getsockname()[0]
+    closed.close()
+    getaddrinfo = socket.getaddrinfo
+
+    def fake_getaddrinfo(host, port, *args, **kwargs):
+        if host == 'shop.test':
+            return [(socket.AF_INET, socket.SOCK_STREAM, 6, '', (address, port))
+                    for address in (closed_address, '127.0.0.1')]
+        return getaddrinfo(host, port, *args, **kwargs)
+
+    monkeypatch.setattr(socket, 'getaddrinfo', fake_getaddrinfo)
+    instrumentation.start_row()
+    response = http_client.get(f'http://shop.test:{server.server_port}/producto', timeout=5)
+    stages = instrumentation.stop_row()
+
+    assert response.status_code == 200 and response.content == b'ok'
+    assert {'dns', 'connect'} <= stages.keys()
@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+from src.utils import instrumentation, sharding
+from src.utils.instrumentation import RunReport
+
+
+def test_row_stages_are_recorded_per_thread():
+    instrumentation.start_row('Farmex')
+    instrumentation.record('ttfb', 0.25)
+    instrumentation.record('ttfb', 0.25)
+    with instrumentation.timed('parse'):
+        pass
+    assert instrumentation.current_pharmacy() == 'Farmex'
+    assert instrumentation.stage_total('ttfb', 'download') == 0.5
+
+    stages = instrumentation.stop_row()
+    assert stages['ttfb'] == 0.5 and 'parse' in stages and 'total' not in stages
+    # Fuera de una fila no se registra nada
+    instrumentation.record('ttfb', 1.0)
+    assert instrumentation.stage_total('ttfb') == 0
+
+
+def test_summary_aggregates_each_stage_over_the_rows_that_went_through_it():
+    report = RunReport()
+    for seconds in range(1, 101):
+        report.add_row('Farmex', {'ttfb': seconds / 100, 'total': seconds / 10})
+    report.add_row('Farmex', {'total': 0.5}, error=ValueError())
+    report.add_row('Salcobrand', {'page_load': 2.0, 'total': 3.0}, error=TimeoutError())
+
+    summary = report.summary()
+    assert list(summary) == ['Farmex', 'Salcobrand']
+    assert summary['Farmex']['rows'] == 101
+    assert summary['Farmex']['errors'] == {'ValueError': 1}
+    assert summary['Farmex']['stages']['ttfb']['p50'] == pytest.approx(0.505)
+    assert summary['Farmex']['stages']['ttfb']['p95'] == pytest.approx(0.9505)
+    assert summary['Salcobrand']['stages'] == {
+        'page_load': {'p50': 2.0, 'p95': 2.0, 'p99': 2.0, 'mean': 2.0},
+        'total': {'p50': 3.0, 'p95': 3.0, 'p99': 3.0, 'mean': 3.0},
+    }
+
+
+def test_report_is_written_as_json_with_the_shard_in_the_name(tmp_path):
+    report = RunReport()
+    report.add_row('Farmex', {'parse': 0.01, 'total': 0.2})
+    sharding.configure(1, 2)
+    try:
+        path = report.write(str(tmp_path))
+    finally:
+        sharding.configure(0, 1)
+
+    assert path.startswith(str(tmp_path / 'run-')) and path.endswith('.shard-1-of-2.json')
+    with open(path, encoding='utf-8') as file:
+        written = json.load(file)
+    assert written['pharmacies']['Farmex']['rows'] == 1
+    assert set(written) == {'started_at', 'finished_at', 'pharmacies'}
+
+
+def test_print_summary_names_the_slowest_stage(capsys):
+    report = RunReport()
+    report.add_row('Farmex', {'ttfb': 0.1, 'parse': 0.4, 'total': 0.6})
+
+    report.print_summary()
+    assert 'parse 0.40s' in capsys.readouterr().out
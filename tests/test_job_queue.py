@@ -0,0 +1,95 @@
+import pytest
+
+from src.utils.job_queue import SqliteQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = SqliteQueue(str(tmp_path / 'queue.db'), lease=60)
+    yield queue
+    queue.close()
+
+
+def test_messages_are_leased_until_acknowledged(queue):
+    queue.put_many('jobs', [{'n': 1}, {'n': 2}])
+    first = queue.get('jobs', 0)
+    second = queue.get('jobs', 0)
+
+    assert [first[1], second[1]] == [{'n': 1}, {'n': 2}]
+    assert queue.get('jobs', 0) is None
+    queue.ack_many('jobs', [first[0], second[0]])
+    assert queue._db.execute('SELECT COUNT(*) FROM messages').fetchone() == (0,)
+
+
+def test_delayed_messages_are_not_delivered_early(queue):
+    queue.put('jobs', {'n': 1}, delay=60)
+    assert queue.get('jobs', 0) is None
+
+
+def test_failed_batch_is_rolled_back(queue):
+    with pytest.raises(TypeError):
+        # Las claves que no son texto no se pueden serializar
+        queue.put_many('jobs', [{'n': 1}, {(1, 2): 'x'}])
+
+    assert not queue._db.in_transaction
+    queue.put('jobs', {'n': 3})
+    assert queue.get('jobs', 0)[1] == {'n': 3}
+
+
+class FakeRecord:
+    def __init__(self, offset, available_at=None):
+        self.topic = 'jobs'
+        self.partition = 0
+        self.offset = offset
+        self.value = {'n': offset}
+        self.headers = [('available_at', str(available_at).encode())] if available_at else []
+
+
+class FakeConsumer:
+    def __init__(self, records):
+        self.records = records
+        self.position = 0
+        self.paused = set()
+
+    def poll(self, timeout_ms, max_records):
+        if self.paused or self.position >= len(self.records):
+            return {}
+        record = self.records[self.position]
+        self.position += 1
+        return {('jobs', 0): [record]}
+
+    def seek(self, partition, offset):
+        self.position = offset
+
+    def pause(self, *partitions):
+        self.paused.update(partitions)
+
+    def resume(self, *partitions):
+        self.paused.difference_update(partitions)
+
+
+class FakeKafka:
+    @staticmethod
+    def TopicPartition(topic, partition):
+        return (topic, partition)
+
+
+def test_kafka_delayed_message_pauses_its_partition(monkeypatch):
+    from src.utils import job_queue
+
+    now = [1000.0]
+    monkeypatch.setattr(job_queue.time, 'time', lambda: now[0])
+    queue = job_queue.KafkaQueue.__new__(job_queue.KafkaQueue)
+    queue._kafka = FakeKafka
+    queue._paused = {}
+    consumer = FakeConsumer([FakeRecord(0, available_at=1030.0), FakeRecord(1)])
+    queue._consumers = {'jobs': consumer}
+
+    # El mensaje no vence: get no espera, vuelve al offset y pausa la partición
+    assert queue.get('jobs', 1) is None
+    assert consumer.position == 0 and consumer.paused == {('jobs', 0)}
+    assert queue.get('jobs', 1) is None
+
+    now[0] = 1031.0
+    handle, message = queue.get('jobs', 1)
+    assert message == {'n': 0} and not consumer.paused
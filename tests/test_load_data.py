@@ -0,0 +1,48 @@
+import pandas as pd
+
+from src.loading.load_data import KeyIndex, load_data
+
+KEYS = [('2026-10-17', 'Farmex', 'https://www.farmex.cl/p0'),
+        ('2026-10-17', 'Farmex', 'https://www.farmex.cl/p1')]
+
+
+def test_add_new_flags_known_and_repeated_keys(tmp_path):
+    index = KeyIndex(str(tmp_path / 'out.csv'))
+
+    assert index.add_new(KEYS + [KEYS[0]]) == [True, True, False]
+    index.commit()
+    assert index.add_new([KEYS[1], ('2026-10-18', 'Farmex', 'https://www.farmex.cl/p1')]) == [False, True]
+    index.close()
+
+
+def test_rolled_back_keys_are_new_again(tmp_path):
+    index = KeyIndex(str(tmp_path / 'out.csv'))
+    index.add_new(KEYS)
+    index.rollback()
+
+    assert index.add_new(KEYS) == [True, True]
+    index.close()
+
+
+def test_index_is_built_from_an_existing_csv(tmp_path):
+    output_file = tmp_path / 'out.csv'
+    pd.DataFrame([{'Fecha': date, 'Farmacia': pharmacy, 'URL': url, 'Precio': 990}
+                  for date, pharmacy, url in KEYS]).to_csv(output_file, index=False)
+
+    index = KeyIndex(str(output_file))
+    assert index.add_new(KEYS) == [False, False]
+    index.close()
+
+
+def test_load_data_appends_only_new_rows(tmp_path):
+    output_file = str(tmp_path / 'out.csv')
+    index = KeyIndex(output_file)
+    df = pd.DataFrame({'Fecha': pd.to_datetime(['2026-10-17', '2026-10-17']), 'Farmacia': ['Farmex', 'Farmex'],
+                       'URL': ['https://www.farmex.cl/p0', 'https://www.farmex.cl/p1'], 'Precio': [990, 1990]})
+
+    assert load_data(df, output_file, index) == 0
+    assert load_data(df, output_file, index) == 2
+    index.close()
+
+    written = pd.read_csv(output_file)
+    assert written['URL'].tolist() == ['https://www.farmex.cl/p0', 'https://www.farmex.cl/p1']
@@ -0,0 +1,56 @@
+import os
+
+import pytest
+
+from src.utils import metrics, sharding
+
+
+@pytest.fixture(autouse=True)
+def single_process():
+    yield
+    sharding.configure(0, 1)
+    metrics._role = None
+
+
+def read(path):
+    with open(path, encoding='utf-8') as file:
+        return file.read()
+
+
+def test_observe_row_counts_the_outcome_and_the_exception():
+    before = metrics.ROWS.labels('Farmex', 'error')._value.get()
+    metrics.observe_row('Farmex', {'fetch': 0.2, 'parse': 0.01}, error=TimeoutError())
+
+    assert metrics.ROWS.labels('Farmex', 'error')._value.get() == before + 1
+    assert metrics.FAILURES.labels('Farmex', 'TimeoutError')._value.get() >= 1
+
+
+def test_finish_writes_the_textfile_without_labels_in_a_single_process(tmp_path):
+    textfile = tmp_path / 'scraper.prom'
+    metrics.start({})
+    metrics.finish({'textfile': str(textfile)})
+
+    content = read(textfile)
+    assert 'scraper_rows_total' in content
+    assert 'shard=' not in content and 'role=' not in content
+
+
+def test_finish_labels_the_series_of_a_shard(tmp_path):
+    sharding.configure(2, 4)
+    metrics.observe_row('Farmex', {'fetch': 0.2})
+    metrics.start({})
+    metrics.finish({'textfile': str(tmp_path / 'scraper.prom')})
+
+    path = sharding.suffix(str(tmp_path / 'scraper.prom'))
+    assert os.path.basename(path) != 'scraper.prom'
+    assert 'shard="2/4"' in read(path)
+
+
+def test_finish_labels_the_series_of_a_queue_worker(tmp_path):
+    metrics.observe_row('Farmex', {'fetch': 0.2})
+    metrics.start({}, role='worker')
+    metrics.finish({'textfile': str(tmp_path / 'scraper.prom')})
+
+    path = tmp_path / f'scraper.worker-{os.getpid()}.prom'
+    content = read(path)
+    assert 'role="worker"' in content and f'pid="{os.getpid()}"' in content
@@ -0,0 +1,81 @@
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from src.utils import instrumentation, parse_pool
+from src.utils.retry import is_transient
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+URL = 'https://www.drsimi.cl/paracetamol-500-mg-x-16-comprimidos/p'
+
+
+@pytest.fixture
+def catalog():
+    with open(os.path.join(FIXTURES, 'drsimi_catalog.json'), 'rb') as file:
+        return file.read()
+
+
+@pytest.fixture
+def fresh_pool(monkeypatch):
+    monkeypatch.setattr(parse_pool, '_pool', None)
+    yield
+    if parse_pool._pool is not None:
+        parse_pool._pool.shutdown()
+
+
+def test_parse_page_returns_the_record_and_its_stages(catalog):
+    result, stages = parse_pool.parse_page('drsimi', URL, catalog, {})
+
+    assert result['price'] is not None and result['sku']
+    assert {'parse', 'validate'} <= stages.keys()
+
+
+def test_parse_page_validates_the_record_once(catalog, monkeypatch):
+    recorded = []
+    record = instrumentation.record
+
+    def spy(stage, seconds):
+        recorded.append(stage)
+        record(stage, seconds)
+
+    monkeypatch.setattr(instrumentation, 'record', spy)
+    parse_pool.parse_page('drsimi', URL, catalog, {})
+
+    assert recorded.count('validate') == 1
+
+
+def test_parse_page_raises_when_a_required_field_is_missing():
+    with pytest.raises(ValueError):
+        parse_pool.parse_page('drsimi', URL, b'[]', {})
+
+
+def test_unknown_pool_is_rejected():
+    with pytest.raises(ValueError):
+        parse_pool.make_pool({'parse_pool': 'fork'})
+
+
+def test_get_pool_is_rebuilt_after_a_broken_pool(fresh_pool, monkeypatch):
+    monkeypatch.setattr(parse_pool, 'load_config', lambda: {'async_http': {'parse_pool': 'process', 'parse_workers': 1}})
+    pool = parse_pool.get_pool()
+    assert parse_pool.get_pool() is pool
+
+    # Un worker que muere rompe el pool
+    with pytest.raises(BrokenProcessPool) as error:
+        pool.submit(os._exit, 1).result(timeout=60)
+    assert is_transient(error.value)
+
+    parse_pool.discard_pool(pool)
+    rebuilt = parse_pool.get_pool()
+    assert rebuilt is not pool
+    assert rebuilt.submit(abs, -1).result(timeout=60) == 1
+
+
+def test_discard_pool_keeps_a_pool_already_rebuilt(fresh_pool, monkeypatch):
+    monkeypatch.setattr(parse_pool, 'load_config', lambda: {'async_http': {'parse_pool': 'thread', 'parse_workers': 1}})
+    old = parse_pool.get_pool()
+    parse_pool.discard_pool(old)
+    current = parse_pool.get_pool()
+
+    parse_pool.discard_pool(old)
+    assert parse_pool.get_pool() is current
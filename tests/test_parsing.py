@@ -0,0 +1,38 @@
+from bs4 import SoupStrainer
+
+from src.utils import pharmacy
+from src.utils.parsing import make_soup
+
+PAGE = b'''<html><head><title>Producto</title><script>var x = 1;</script></head><body>
+<div class="product-meta">
+  <h1 class="product-meta__title"> Paracetamol 500 mg x 16 </h1>
+  <a class="product-meta__vendor" href="/vendors/mintlab">Mintlab</a>
+  <span class="price"><span class="visually-hidden">Precio</span>$990</span>
+  <span class="product-form__inventory">Solo quedan 5 unidades</span>
+</div>
+<footer><p>Contacto</p></footer>
+</body></html>'''
+
+
+def test_make_soup_uses_lxml_by_default():
+    assert make_soup(PAGE).builder.NAME == 'lxml'
+
+
+def test_make_soup_with_a_strainer_keeps_only_the_matching_tags():
+    soup = make_soup(PAGE, SoupStrainer(['h1', 'span']))
+
+    assert soup.find('h1').text.strip() == 'Paracetamol 500 mg x 16'
+    assert soup.find('footer') is None and soup.find('script') is None
+
+
+def test_scraper_reads_the_same_record_with_and_without_its_strainer():
+    url = 'https://mercadofarma.cl/products/paracetamol'
+    strained = pharmacy.mercadofarma.parse(url, PAGE, {})
+    full = pharmacy.mercadofarma.__wrapped__(url, make_soup(PAGE), {})
+
+    assert strained == full == {
+        'price': '$990',
+        'lab_name': 'Mintlab',
+        'is_available': True,
+        'web_name': 'Paracetamol 500 mg x 16',
+    }
@@ -0,0 +1,60 @@
+import json
+import os
+
+import pytest
+
+from src.utils import pharmacy
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+def drsimi_catalog():
+    with open(os.path.join(FIXTURES, 'drsimi_catalog.json'), 'rb') as file:
+        return file.read()
+
+
+def test_drsimi_reads_the_catalog_specifications():
+    data = pharmacy.drsimi.parse('https://www.drsimi.cl/paracetamol-500-mg-x-16-comprimidos/p', drsimi_catalog(), {})
+
+    assert data == {
+        'price': '$990',
+        'bioequivalent': True,
+        'is_available': True,
+        'active_principle': 'Paracetamol',
+        'sku': '7800000028171',
+        'web_name': 'Paracetamol 500 mg x 16 comprimidos',
+    }
+
+
+def test_drsimi_out_of_stock_product_without_bioequivalence():
+    content = json.dumps(json.loads(drsimi_catalog())[1:]).encode()
+    # El producto no trae la especificación 'Bioequivalente': no es bioequivalente y la fila se guarda
+    data = pharmacy.drsimi.parse('https://www.drsimi.cl/losartan-50-mg-x-30-comprimidos/p', content, {})
+
+    assert data['bioequivalent'] is False
+    assert data['price'] == '$2.490'
+    assert data['is_available'] is False
+    assert data['active_principle'] == 'Losartán Potásico'
+
+
+def buhochile_page(**fields):
+    product = {'name': 'Losartán', 'tablets': '50 mg x 30', 'pharmaceuticForm': 'comprimidos',
+               'activePrinciple': 'Losartán', 'minPrice': 2490, 'bioequivalent': True,
+               'laboratory': {'name': 'Mintlab'}, **fields}
+    payload = json.dumps({'props': {'pageProps': {'product': product}}})
+    # La página trae el texto del aviso aunque el producto tenga stock
+    return (f'<html><body><strong>Sin stock disponible</strong>'
+            f'<script id="__NEXT_DATA__" type="application/json">{payload}</script></body></html>').encode()
+
+
+@pytest.mark.parametrize('fields, available', [
+    ({'stock': 12}, True),
+    ({'stock': 0}, False),
+    ({'hasStock': False}, False),
+    ({}, True),
+])
+def test_buhochile_availability_comes_from_the_payload(fields, available):
+    data = pharmacy.buhochile.parse('https://buhochile.com/producto/losartan', buhochile_page(**fields), {})
+
+    assert data['is_available'] is available
+    assert data['price'] == '$2490'
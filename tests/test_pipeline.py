@@ -0,0 +1,67 @@
+import copy
+
+import main
+from src.extraction.extract_data import _new_record
+from src.utils.config import load_config
+
+
+class RecordingSink:
+    def __init__(self):
+        self.batches = []
+        self.closed = False
+
+    def write(self, df):
+        self.batches.append(df)
+
+    def close(self):
+        self.closed = True
+
+
+def test_batched_consumes_the_iterable_lazily():
+    consumed = []
+
+    def items():
+        for i in range(5):
+            consumed.append(i)
+            yield i
+
+    batches = main.batched(items(), 2)
+    assert next(batches) == [0, 1] and consumed == [0, 1]
+    assert list(batches) == [[2, 3], [4]]
+
+
+def test_streaming_run_loads_each_batch_before_the_next_is_scraped(tmp_path, monkeypatch, capsys):
+    config = copy.deepcopy(load_config())
+    config['pipeline'] = {'streaming': True, 'batch_size': 2}
+    config['instrumentation']['report_dir'] = str(tmp_path)
+    config['metrics'] = {}
+    sink = RecordingSink()
+    scraped = []
+
+    def extract_records(input_file):
+        for i in range(5):
+            scraped.append(i)
+            record = _new_record(f'https://www.farmex.cl/p{i}', f'P{i}', 'Farmex')
+            record.update({'price': '$990', 'lab_name': 'mintlab', 'is_available': True})
+            yield record
+
+    def make_sinks(settings, output_file):
+        return [sink]
+
+    monkeypatch.setattr(main, 'load_config', lambda: config)
+    monkeypatch.setattr(main, 'extract_records', extract_records)
+    monkeypatch.setattr(main, 'make_sinks', make_sinks)
+    monkeypatch.setattr(main, 'get_checkpoint', lambda: None)
+    monkeypatch.setattr(main, 'get_cache', lambda: None)
+    # Registrar cuántas filas se habían scrapeado al cargar cada lote
+    write = sink.write
+    seen = []
+    monkeypatch.setattr(sink, 'write', lambda df: (seen.append(len(scraped)), write(df)))
+
+    main.main([])
+
+    assert [len(df) for df in sink.batches] == [2, 2, 1]
+    assert seen == [2, 4, 5]
+    assert sink.batches[0]['Precio'].tolist() == [990, 990]
+    assert sink.closed
+    assert 'Registros guardados: 5' in capsys.readouterr().out
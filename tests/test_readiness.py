@@ -0,0 +1,24 @@
+import pytest
+from selenium.common.exceptions import TimeoutException
+
+from src.utils import fixtures, instrumentation
+from src.utils.readiness import wait_until_ready
+
+
+def test_ready_time_is_recorded_as_wait_stage():
+    driver = fixtures.FakeDriver('<html><body><h1 class="title">Producto</h1></body></html>')
+    instrumentation.start_row()
+    elapsed = wait_until_ready(driver, css='h1.title', timeout=1)
+    stages = instrumentation.stop_row()
+
+    assert stages['wait'] == pytest.approx(elapsed)
+
+
+def test_timed_out_wait_is_recorded():
+    driver = fixtures.FakeDriver('<html><body></body></html>')
+    instrumentation.start_row()
+    with pytest.raises(TimeoutException):
+        wait_until_ready(driver, css='h1.title', timeout=0.2)
+    stages = instrumentation.stop_row()
+
+    assert stages['wait'] >= 0.2
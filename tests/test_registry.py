@@ -0,0 +1,82 @@
+from types import SimpleNamespace
+
+import pytest
+
+from src.extraction import extract_data
+from src.utils import pharmacy, registry
+
+
+@pytest.fixture(autouse=True)
+def isolated_registry(monkeypatch):
+    # Los registros de las pruebas no quedan en el registro del proceso
+    monkeypatch.setattr(registry, '_by_host', dict(registry._by_host))
+    monkeypatch.setattr(registry, '_by_name', dict(registry._by_name))
+
+
+@pytest.mark.parametrize('url, name', [
+    ('https://www.salcobrand.cl/products/paracetamol', 'salcobrand'),
+    ('"https://salcobrand.cl/products/paracetamol"', 'salcobrand'),
+    ('https://tienda.salcobrand.cl/products/paracetamol', 'salcobrand'),
+    ('https://www.cruzverde.cl/paracetamol/123.html', 'cruzverde'),
+    ('https://www.drsimi.cl/paracetamol/p', 'drsimi'),
+])
+def test_lookup_matches_the_hostname(url, name):
+    assert registry.lookup(url).name == name
+
+
+@pytest.mark.parametrize('url', [
+    'https://www.farmacia-desconocida.cl/p',
+    # La coincidencia es por dominio, no por subcadena de la URL
+    'https://example.com/?ref=salcobrand.cl',
+    'sin-url',
+])
+def test_lookup_of_an_unknown_host_is_none(url):
+    assert registry.lookup(url) is None
+
+
+def test_spec_reads_the_settings_of_the_decorators():
+    spec = registry.get_spec('cruzverde')
+
+    assert spec is pharmacy.cruzverde.spec
+    assert spec.fetch_mode == 'rendered' and spec.concurrency == 2 and spec.keep_cookies
+    assert spec.required == ('price', 'lab_name', 'web_name')
+    assert spec.ready is not None
+    assert registry.get_spec('salcobrand').ready is None
+
+
+def test_a_host_cannot_be_registered_by_two_scrapers():
+    def other(url, data):
+        return data
+
+    with pytest.raises(ValueError, match='salcobrand.cl'):
+        registry.register('www.salcobrand.cl')(other)
+
+
+def test_registered_scraper_is_dispatched_by_scrape_row():
+    @registry.register('www.registry.test', 'registry-mirror.test')
+    def registry_test(url, data):
+        return {'price': '$990', 'web_name': url}
+
+    row = {'url': '"https://registry-mirror.test/p"', 'product_name': 'P', 'pharmacy': 'Test'}
+    data = extract_data.scrape_row(row)
+
+    assert data['price'] == '$990' and data['web_name'] == 'https://registry-mirror.test/p'
+    assert registry.specs()[-1] is registry_test.spec
+    assert registry_test.spec.domains == ('registry.test', 'registry-mirror.test')
+
+
+def test_unknown_url_is_rejected_by_scrape_row():
+    with pytest.raises(ValueError, match='URL no reconocida'):
+        extract_data.scrape_row({'url': 'https://www.farmacia-desconocida.cl/p', 'product_name': 'P', 'pharmacy': 'X'})
+
+
+def test_entry_points_register_external_scrapers(monkeypatch):
+    def load():
+        @registry.register('plugin.test')
+        def plugin(url, data):
+            return data
+
+    monkeypatch.setattr(registry, 'entry_points', lambda group: [SimpleNamespace(load=load)] if group == registry.ENTRY_POINT_GROUP else [])
+    registry.load_entry_points()
+
+    assert registry.lookup('https://www.plugin.test/p').name == 'plugin'
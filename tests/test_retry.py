@@ -0,0 +1,78 @@
+import pandas as pd
+import pytest
+import requests
+from selenium.common.exceptions import TimeoutException
+
+from src.extraction import extract_data
+from src.utils import retry
+from src.utils.retry import backoff_delay, is_transient
+from src.utils.throttle import CircuitOpenError
+
+
+def http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.exceptions.HTTPError(f'Error en la solicitud: {status}', response=response)
+
+
+@pytest.mark.parametrize('error, transient', [
+    (requests.exceptions.Timeout(), True),
+    (requests.exceptions.ConnectionError(), True),
+    (http_error(429), True),
+    (http_error(503), True),
+    (http_error(404), False),
+    (http_error(403), False),
+    (requests.exceptions.HTTPError('sin respuesta'), True),
+    (TimeoutException(), True),
+    (CircuitOpenError('farmex.cl', None), True),
+    (ValueError('Missing required data: price'), False),
+    (AttributeError("'NoneType' object has no attribute 'text'"), False),
+])
+def test_is_transient(error, transient):
+    assert is_transient(error) is transient
+
+
+def test_backoff_delay_grows_exponentially_up_to_the_cap(monkeypatch):
+    # Sin jitter: el límite superior del intervalo
+    monkeypatch.setattr(retry.random, 'uniform', lambda low, high: high)
+
+    assert [backoff_delay(attempt, 2, 10) for attempt in range(1, 6)] == [2, 4, 8, 10, 10]
+
+
+def test_backoff_delay_is_jittered():
+    delays = {backoff_delay(3, 1, 60) for _ in range(50)}
+
+    assert all(0 <= delay <= 4 for delay in delays) and len(delays) > 1
+
+
+@pytest.fixture
+def rows(tmp_path, monkeypatch):
+    monkeypatch.setattr(extract_data, 'get_checkpoint', lambda: None)
+    monkeypatch.setitem(extract_data.config, 'extraction', {'concurrent': False})
+    monkeypatch.setitem(extract_data.config, 'async_http', {'enabled': False})
+    monkeypatch.setitem(extract_data.config, 'incremental', {'enabled': False})
+    monkeypatch.setitem(extract_data.config, 'retry', {'max_attempts': 3, 'base_delay': 0, 'max_delay': 0})
+    input_file = tmp_path / 'input.csv'
+    pd.DataFrame([{'product_name': name, 'pharmacy': 'Farmex', 'url': f'https://www.farmex.cl/{name}'}
+                  for name in ('flaky', 'down', 'gone')]).to_csv(input_file, index=False)
+    return str(input_file)
+
+
+def test_transient_errors_are_retried_up_to_max_attempts(rows, monkeypatch, capsys):
+    calls = []
+
+    def scrape(row):
+        name = row['product_name']
+        calls.append(name)
+        if name == 'flaky' and calls.count(name) == 1 or name == 'down':
+            raise requests.exceptions.Timeout()
+        if name == 'gone':
+            raise http_error(404)
+        return {'name': name, 'pharmacy': row['pharmacy']}
+
+    monkeypatch.setattr(extract_data, '_scrape_throttled', scrape)
+
+    assert [data['name'] for data in extract_data.extract_records(rows)] == ['flaky']
+    # 'flaky' se recupera en el segundo intento, 'down' agota sus 3 intentos y 'gone' no se reintenta
+    assert calls == ['flaky', 'down', 'gone', 'flaky', 'down', 'down']
+    assert 'Filas con error: 1 permanentes, 1 transitorios sin más intentos' in capsys.readouterr().out
@@ -0,0 +1,83 @@
+import json
+
+import pandas as pd
+import pytest
+
+from src.utils import sharding
+
+
+def row(i):
+    return {'product_name': f'P{i}', 'pharmacy': 'Farmex', 'url': f'https://www.farmex.cl/p{i}'}
+
+
+def record(i, price='$990'):
+    return {'name': f'P{i}', 'pharmacy': 'Farmex', 'url': f'https://www.farmex.cl/p{i}', 'price': price}
+
+
+@pytest.fixture
+def shards(tmp_path, monkeypatch):
+    monkeypatch.setattr(sharding, 'shard_file', lambda index, count: str(tmp_path / f'shard-{index}-of-{count}.jsonl'))
+    input_file = tmp_path / 'input.csv'
+    pd.DataFrame([row(i) for i in range(6)]).to_csv(input_file, index=False)
+
+    def write(index, lines):
+        with open(sharding.shard_file(index, 2), 'w', encoding='utf-8') as file:
+            file.writelines(lines)
+
+    return str(input_file), write
+
+
+def test_merge_follows_the_input_order(shards):
+    input_file, write = shards
+    write(0, [json.dumps(record(i)) + '\n' for i in (4, 0, 2)])
+    write(1, [json.dumps(record(i)) + '\n' for i in (5, 3, 1)])
+
+    assert [data['name'] for data in sharding.merge(input_file, 2)] == [f'P{i}' for i in range(6)]
+
+
+def test_merge_keeps_one_record_per_row_and_skips_a_torn_line(shards):
+    input_file, write = shards
+    # Un shard reanudado vuelve a escribir P0; la última línea quedó incompleta por una caída
+    write(0, [json.dumps(record(0, '$990')) + '\n', json.dumps(record(0, '$1.290')) + '\n', '{"name": "P2"'])
+    write(1, [json.dumps(record(1)) + '\n'])
+
+    merged = sharding.merge(input_file, 2)
+    assert [(data['name'], data['price']) for data in merged] == [('P0', '$1.290'), ('P1', '$990')]
+
+
+def test_merge_keeps_the_records_written_after_a_torn_line(shards):
+    input_file, write = shards
+    write(0, [json.dumps(record(0)) + '\n', '{"name": "P2"\n', json.dumps(record(4)) + '\n'])
+    write(1, [])
+
+    assert [data['name'] for data in sharding.merge(input_file, 2)] == ['P0', 'P4']
+
+
+def test_resumed_writer_drops_the_torn_line(tmp_path, monkeypatch):
+    path = tmp_path / 'shard-0-of-2.jsonl'
+    path.write_text(json.dumps(record(0)) + '\n{"name": "P2"', encoding='utf-8')
+    # Reanudación: el checkpoint ya marcó filas como cargadas
+    monkeypatch.setattr(sharding.checkpoint, 'get_checkpoint', lambda: type('Log', (), {'loaded': {'P0'}})())
+
+    writer = sharding.ShardWriter(str(path))
+    writer.write([record(1)])
+    writer.close()
+
+    lines = path.read_text(encoding='utf-8').splitlines()
+    assert [json.loads(line)['name'] for line in lines] == ['P0', 'P1']
+
+
+def test_merge_missing_shard(shards):
+    input_file, write = shards
+    write(0, [])
+    with pytest.raises(FileNotFoundError):
+        sharding.merge(input_file, 2)
+
+
+def test_shard_of_is_stable_and_in_range():
+    rows = [row(i) for i in range(50)]
+    assignment = [sharding.shard_of(r, 4) for r in rows]
+
+    assert assignment == [sharding.shard_of(r, 4) for r in rows]
+    assert set(assignment) <= {0, 1, 2, 3}
+    assert len({sharding.shard_of(r, 4, by='pharmacy') for r in rows}) == 1
@@ -0,0 +1,102 @@
+import sqlite3
+from contextlib import closing
+
+import pyarrow.parquet as pq
+import pytest
+
+from src.extraction.extract_data import _new_record
+from src.loading.sinks import CsvSink, DatabaseSink, ParquetSink, make_sinks
+from src.transformation.transform_data import transform_data
+
+
+def batch(*rows):
+    # Registros transformados como los recibe un destino: (día, farmacia, producto, precio)
+    records = []
+    for date, pharmacy, i, price in rows:
+        record = _new_record(f'https://www.{pharmacy.lower()}.cl/p{i}', f'P{i}', pharmacy)
+        record.update({'date': date, 'price': price, 'lab_name': 'mintlab', 'is_available': True, 'sku': str(i)})
+        records.append(record)
+    return transform_data(records)
+
+
+def test_parquet_dataset_is_partitioned_by_day_and_pharmacy(tmp_path):
+    sink = ParquetSink(str(tmp_path / 'dataset'))
+    sink.write(batch(('2026-10-16', 'Farmex', 0, '$990'), ('2026-10-17', 'Farmex', 0, '$1.090')))
+    sink.write(batch(('2026-10-17', 'Salcobrand', 1, '$2.490')))
+    sink.close()
+
+    assert sorted(path.relative_to(tmp_path / 'dataset').parts[:2]
+                  for path in (tmp_path / 'dataset').rglob('*.parquet')) == [
+        ('Fecha=2026-10-16', 'Farmacia=Farmex'),
+        ('Fecha=2026-10-17', 'Farmacia=Farmex'),
+        ('Fecha=2026-10-17', 'Farmacia=Salcobrand'),
+    ]
+    table = pq.read_table(tmp_path / 'dataset', columns=['Nombre del Remedio', 'Precio'],
+                          filters=[('Fecha', '=', '2026-10-17')])
+    assert sorted(table.to_pydict()['Precio']) == [1090, 2490]
+
+
+def test_parquet_batches_do_not_overwrite_each_other(tmp_path):
+    sink = ParquetSink(str(tmp_path / 'dataset'))
+    sink.write(batch(('2026-10-17', 'Farmex', 0, '$990')))
+    sink.write(batch(('2026-10-17', 'Farmex', 1, '$1.990')))
+    sink.write(batch(('2026-10-17', 'Farmex', 2, '$990'))[0:0])
+
+    assert pq.read_table(tmp_path / 'dataset').num_rows == 2
+
+
+def test_make_sinks_builds_the_configured_sinks(tmp_path):
+    sinks = make_sinks({'sinks': ['csv', 'parquet'], 'parquet_dir': str(tmp_path / 'dataset')},
+                       str(tmp_path / 'out.csv'))
+
+    assert [type(sink) for sink in sinks] == [CsvSink, ParquetSink]
+    for sink in sinks:
+        sink.close()
+
+
+def test_make_sinks_rejects_an_unknown_sink(tmp_path):
+    with pytest.raises(ValueError, match='kafka'):
+        make_sinks({'sinks': ['kafka']}, str(tmp_path / 'out.csv'))
+
+
+def test_database_sink_upserts_on_day_pharmacy_and_url(tmp_path):
+    path = tmp_path / 'precios.sqlite'
+    sink = DatabaseSink('sqlite', str(path), chunk_size=1)
+    sink.write(batch(('2026-10-17', 'Farmex', 0, '$990'), ('2026-10-17', 'Farmex', 1, '$1.990')))
+    # Volver a cargar el mismo día actualiza la fila en vez de duplicarla
+    sink.write(batch(('2026-10-17', 'Farmex', 0, '$890'), ('2026-10-18', 'Farmex', 0, '$890')))
+    sink.close()
+
+    with closing(sqlite3.connect(path)) as conn:
+        rows = conn.execute('SELECT fecha, url, precio, stock FROM precios ORDER BY fecha, url').fetchall()
+    assert rows == [
+        ('2026-10-17', 'https://www.farmex.cl/p0', 890, 1),
+        ('2026-10-17', 'https://www.farmex.cl/p1', 1990, 1),
+        ('2026-10-18', 'https://www.farmex.cl/p0', 890, 1),
+    ]
+
+
+def test_database_sink_keeps_the_last_row_of_a_repeated_key(tmp_path):
+    sink = DatabaseSink('sqlite', str(tmp_path / 'precios.sqlite'))
+    sink.write(batch(('2026-10-17', 'Farmex', 0, '$990'), ('2026-10-17', 'Farmex', 0, '$890')))
+
+    assert sink._conn.execute('SELECT precio FROM precios').fetchall() == [(890,)]
+    sink.close()
+
+
+def test_database_sink_rolls_back_a_failed_batch(tmp_path):
+    sink = DatabaseSink('sqlite', str(tmp_path / 'precios.sqlite'), chunk_size=1)
+    broken = batch(('2026-10-17', 'Farmex', 0, '$990'), ('2026-10-17', 'Farmex', 1, '$990'))
+    broken.loc[1, 'URL'] = None
+    sink._conn.execute('CREATE TRIGGER no_null_url BEFORE INSERT ON precios WHEN NEW.url IS NULL '
+                       "BEGIN SELECT RAISE(ABORT, 'url'); END")
+
+    with pytest.raises(sqlite3.IntegrityError):
+        sink.write(broken)
+    assert sink._conn.execute('SELECT COUNT(*) FROM precios').fetchone() == (0,)
+    sink.close()
+
+
+def test_unknown_database_driver_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        DatabaseSink('postgres', str(tmp_path / 'precios.sqlite'))
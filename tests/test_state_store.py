@@ -0,0 +1,64 @@
+import pandas as pd
+import pytest
+
+from src.extraction import extract_data
+from src.utils import state_store
+from src.utils.state_store import StateStore
+
+ROW = {'product_name': 'Paracetamol', 'pharmacy': 'Farmex', 'url': '"https://www.farmex.cl/p0"'}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return StateStore(str(tmp_path / 'state.sqlite'))
+
+
+def test_row_never_scraped_needs_scrape(store):
+    assert store.needs_scrape(ROW, freshness=3600)
+
+
+def test_fresh_row_is_skipped_until_it_gets_old(store, monkeypatch):
+    store.mark_success(ROW)
+    assert not store.needs_scrape(ROW, freshness=3600)
+
+    now = state_store.time.time()
+    monkeypatch.setattr(state_store.time, 'time', lambda: now + 3601)
+    assert store.needs_scrape(ROW, freshness=3600)
+
+
+def test_failed_row_is_scraped_again_until_it_succeeds(store):
+    store.mark_success(ROW)
+    store.mark_error(ROW, ValueError('Missing required data: price'))
+    assert store.needs_scrape(ROW, freshness=3600)
+
+    store.mark_success(ROW)
+    assert not store.needs_scrape(ROW, freshness=3600)
+
+
+def test_incremental_run_only_scrapes_stale_or_failed_rows(store, tmp_path, monkeypatch):
+    rows = [{'product_name': f'P{i}', 'pharmacy': 'Farmex', 'url': f'https://www.farmex.cl/p{i}'} for i in range(4)]
+    input_file = tmp_path / 'input.csv'
+    pd.DataFrame(rows).to_csv(input_file, index=False)
+    scraped = []
+
+    def scrape(row):
+        scraped.append(row['product_name'])
+        if row['product_name'] == 'P3':
+            raise ValueError('Missing required data: price')
+        return {'name': row['product_name'], 'pharmacy': row['pharmacy']}
+
+    monkeypatch.setattr(extract_data, '_scrape_throttled', scrape)
+    monkeypatch.setattr(extract_data, 'get_checkpoint', lambda: None)
+    monkeypatch.setattr(extract_data, 'get_state_store', lambda: store)
+    monkeypatch.setitem(extract_data.config, 'incremental', {'enabled': True, 'freshness_hours': 24})
+    monkeypatch.setitem(extract_data.config, 'extraction', {'concurrent': False})
+    monkeypatch.setitem(extract_data.config, 'async_http', {'enabled': False})
+    monkeypatch.setitem(extract_data.config, 'retry', {'max_attempts': 1})
+
+    assert [index for index, _ in extract_data._scrape_file(str(input_file))] == [0, 1, 2]
+    assert scraped == ['P0', 'P1', 'P2', 'P3']
+
+    # Segunda ejecución: solo la fila que falló
+    scraped.clear()
+    assert list(extract_data._scrape_file(str(input_file))) == []
+    assert scraped == ['P3']
@@ -0,0 +1,24 @@
+from src.utils import structured_data
+
+PAGE = b'''<html><head>
+<script type="application/ld+json">{"@type": "Product", "sku": "SKU1"}</script>
+<script type='application/ld+json'>{"@type": "BreadcrumbList"}</script>
+<script id="__NEXT_DATA__" type="application/json">{"props": {"page": 1}}</script>
+</head><body>
+<script>var product_traker_data = {"name": "Tapsin", "price": "1990"}; var other = 1;</script>
+</body></html>'''
+
+
+def test_json_ld_returns_every_document_in_order():
+    assert structured_data.json_ld(PAGE) == [{'@type': 'Product', 'sku': 'SKU1'}, {'@type': 'BreadcrumbList'}]
+
+
+def test_script_payload_by_id():
+    assert structured_data.script_payload(PAGE, script_id='__NEXT_DATA__') == b'{"props": {"page": 1}}'
+    assert structured_data.embedded_json(PAGE, script_id='__NEXT_DATA__') == {'props': {'page': 1}}
+    assert structured_data.script_payload(PAGE, script_id='missing') is None
+
+
+def test_js_object_stops_at_the_end_of_the_literal():
+    assert structured_data.js_object(PAGE, 'product_traker_data') == {'name': 'Tapsin', 'price': '1990'}
+    assert structured_data.js_object(PAGE, 'missing') is None
@@ -0,0 +1,145 @@
+import time
+
+import pandas as pd
+import pytest
+
+from src.extraction import extract_data, jobs
+from src.utils import throttle
+from src.utils.job_queue import SqliteQueue
+from src.utils.throttle import CircuitBreaker, CircuitOpenError, TokenBucket
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(throttle.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_token_bucket_burst_then_refill(clock):
+    bucket = TokenBucket(rate=2, burst=2, min_rate=1, max_rate=10)
+
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(0.5)
+    clock[0] += 0.5
+    assert bucket.reserve() == 0
+
+
+def test_token_bucket_adapts_its_rate(clock):
+    bucket = TokenBucket(rate=2, burst=2, min_rate=1, max_rate=2.15)
+
+    bucket.on_success(0.1)
+    assert bucket.rate == pytest.approx(2.1)
+    bucket.on_success(0.1)
+    assert bucket.rate == pytest.approx(2.15)
+    # Latencia mayor al doble de la media: se reduce un 20%
+    bucket.on_success(1.0)
+    assert bucket.rate == pytest.approx(2.15 * 0.8)
+    bucket.on_throttle()
+    assert bucket.rate == pytest.approx(1.0)
+    assert bucket.reserve() > 0
+
+
+def test_circuit_breaker_states(clock):
+    breaker = CircuitBreaker(threshold=2, cooldown=30)
+
+    # Cerrado
+    breaker.record_failure()
+    assert breaker.allow() and breaker.retry_at is None
+
+    # Abierto tras dos fallos seguidos
+    breaker.record_failure()
+    assert not breaker.allow()
+    assert breaker.retry_at == 130.0
+
+    # Semiabierto: una sola sonda pasa
+    clock[0] = 130.0
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    # Una sonda fallida vuelve a abrirlo
+    breaker.record_failure()
+    assert not breaker.allow()
+    assert breaker.retry_at == 160.0
+
+    # Una sonda exitosa lo cierra
+    clock[0] = 160.0
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.allow() and breaker.allow()
+    assert breaker.retry_at is None
+
+
+def test_throttle_latency_excludes_the_driver_checkout(monkeypatch):
+    from src.utils import instrumentation
+
+    def scrape_row(row):
+        instrumentation.start_row(row['pharmacy'])
+        # Espera por un driver del pool congestionado, sin solicitudes al sitio
+        instrumentation.record('driver_checkout', 5.0)
+        return instrumentation.finish_row(row['pharmacy'])
+
+    recorded = []
+
+    class Throttle:
+        def acquire(self, domain):
+            pass
+
+        def record(self, domain, latency, error=None):
+            recorded.append(latency)
+
+    clock = iter([100.0, 105.5])
+    monkeypatch.setattr(extract_data, 'scrape_row', scrape_row)
+    monkeypatch.setattr(extract_data, 'get_throttle', lambda: Throttle())
+    monkeypatch.setattr(extract_data.time, 'monotonic', lambda: next(clock))
+
+    extract_data._scrape_throttled({'url': 'https://www.farmex.cl/p', 'pharmacy': 'Farmex', 'product_name': 'P'})
+    assert recorded == [pytest.approx(0.5)]
+
+
+ROW = {'product_name': 'P0', 'pharmacy': 'Farmex', 'url': 'https://www.farmex.cl/p0'}
+
+
+@pytest.fixture
+def run_config(monkeypatch):
+    monkeypatch.setattr(extract_data, 'get_checkpoint', lambda: None)
+    monkeypatch.setitem(extract_data.config, 'extraction', {'concurrent': False})
+    monkeypatch.setitem(extract_data.config, 'async_http', {'enabled': False})
+    monkeypatch.setitem(extract_data.config, 'incremental', {'enabled': False})
+    monkeypatch.setitem(extract_data.config, 'retry', {'max_attempts': 1, 'base_delay': 0, 'max_delay': 0})
+
+
+def test_open_circuit_does_not_use_up_attempts(tmp_path, run_config, monkeypatch):
+    input_file = tmp_path / 'input.csv'
+    pd.DataFrame([ROW]).to_csv(input_file, index=False)
+    calls = []
+
+    def scrape(row):
+        calls.append(row)
+        # Tres pasadas con el circuito abierto (sonda en curso) antes de poder scrapear
+        if len(calls) <= 3:
+            raise CircuitOpenError('farmex.cl', time.monotonic())
+        return {'name': row['product_name'], 'pharmacy': row['pharmacy'], 'url': row['url'], 'price': '$990'}
+
+    monkeypatch.setattr(extract_data, '_scrape_throttled', scrape)
+    records = list(extract_data.extract_records(str(input_file)))
+
+    assert len(calls) == 4
+    assert [data['price'] for data in records] == ['$990']
+
+
+def test_worker_republishes_circuit_open_jobs_with_the_same_attempt(tmp_path, monkeypatch):
+    queue = SqliteQueue(str(tmp_path / 'queue.db'), lease=60)
+    monkeypatch.setitem(jobs.config, 'retry', {'max_attempts': 1, 'base_delay': 0, 'max_delay': 0})
+    monkeypatch.setitem(jobs.config, 'incremental', {'enabled': False})
+
+    def scrape(row):
+        raise CircuitOpenError('farmex.cl', time.monotonic())
+
+    monkeypatch.setattr(jobs, '_scrape_throttled', scrape)
+    assert jobs._process(queue, 'jobs', {'row': ROW, 'attempt': 0}) is False
+
+    _, message = queue.get('jobs', 0)
+    assert message == {'row': ROW, 'attempt': 0}
+    queue.close()
@@ -0,0 +1,32 @@
+import pandas as pd
+import pytest
+
+from src.transformation.transform_data import clean_price
+
+
+@pytest.mark.parametrize('price, expected', [
+    ('$12.990', 12990),
+    ('$ 12,990', 12990),
+    ('$1.234.990', 1234990),
+    ('12990.0', 12990),
+    ('12990.00', 12990),
+    ('$12.990,50', 12990),
+    (12990, 12990),
+    (12990.0, 12990),
+    (12990.5, 12990),
+])
+def test_clean_price_shapes(price, expected):
+    assert clean_price(pd.Series([price], dtype=object)).tolist() == [expected]
+
+
+def test_clean_price_missing_values():
+    cleaned = clean_price(pd.Series(['$990', None, 'Sin precio'], dtype=object))
+
+    assert str(cleaned.dtype) == 'Int64'
+    assert cleaned[0] == 990
+    assert cleaned[1:].isna().all()
+
+
+def test_clean_price_float_column():
+    # Columna numérica con nulos, como la deja pandas al leer precios sin formato
+    assert clean_price(pd.Series([12990.0, None, 4990.5])).tolist() == [12990, pd.NA, 4990]